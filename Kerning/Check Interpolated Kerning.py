@@ -0,0 +1,85 @@
+# MenuTitle: Check Interpolated Kerning
+# -*- coding: utf-8 -*-
+__doc__ = """
+Computes the kerning of every pair at every active instance in one pass and reports pairs that flip sign between instances, exceed a threshold, have opposite signs in different masters, or are missing in some masters. Optionally writes one kerning table per instance."""
+
+from GlyphsApp import *
+from oprCore import (
+    effective_master_values,
+    instance_weights,
+    interpolated_values,
+    interpolation_flags,
+    kerning_index_for_font,
+    kerning_matrix_from_font,
+    kerning_resolvers_for_font,
+    numpy_available,
+    write_instance_tables,
+)
+
+# Flag pairs whose absolute value exceeds this at any instance; None to skip
+THRESHOLD = 150
+# Ask for a folder and write a left,right,value CSV per instance
+EXPORT_TABLES = False
+# Number of flagged pairs listed per category
+MAX_LISTED = 30
+
+FLAG_TITLES = [
+    ("crosses_zero", "pairs change sign between instances"),
+    ("exceeds", "pairs exceed %s units at some instance" % THRESHOLD),
+    ("master_sign", "pairs have opposite signs in different masters"),
+    ("partial", "pairs are missing in some masters"),
+]
+
+
+def main():
+    font = Glyphs.font
+    if not numpy_available():
+        Message(title="Check Interpolated Kerning", message="This script needs NumPy.")
+        return
+    instances = [instance for instance in font.instances if instance.active]
+    if not instances:
+        Message(title="Check Interpolated Kerning", message="The font has no active instances.")
+        return
+
+    kerningIndex = kerning_index_for_font(font)
+    matrix = kerning_matrix_from_font(font)
+    weights = instance_weights(font, instances, matrix.master_ids)
+    # pairs missing in a master interpolate from what class kerning gives there
+    masterValues = effective_master_values(matrix, kerning_resolvers_for_font(font))
+    values = interpolated_values(matrix, weights, masterValues)
+    flags = interpolation_flags(matrix, values, THRESHOLD, masterValues)
+
+    Glyphs.clearLog()
+    Glyphs.showMacroWindow()
+    print("CHECK INTERPOLATED KERNING: %i pairs, %i instances\n" % (len(matrix), len(instances)))
+
+    tabPairs = []
+    for flag, title in FLAG_TITLES:
+        if flag not in flags:
+            continue
+        positions = flags[flag].nonzero()[0].tolist()
+        print("%i %s" % (len(positions), title))
+        for position in positions[:MAX_LISTED]:
+            leftKey, rightKey = matrix.pair(position)
+            instanceValues = ", ".join("%i" % round(value) for value in values[position])
+            print("  %s %s: %s" % (kerningIndex.display_name(leftKey), kerningIndex.display_name(rightKey), instanceValues))
+            leftName = kerningIndex.key_glyph(leftKey)
+            rightName = kerningIndex.key_glyph(rightKey)
+            if leftName and rightName and flag != "partial":
+                tabPairs.append("/%s/%s/space" % (leftName, rightName))
+        if len(positions) > MAX_LISTED:
+            print("  ... %i more" % (len(positions) - MAX_LISTED))
+        print()
+
+    if EXPORT_TABLES:
+        folder = GetFolder(message="Save instance kerning tables", allowsMultipleSelection=False)
+        if folder:
+            names = [instance.name for instance in instances]
+            paths = write_instance_tables(matrix, values, names, folder, key_name=kerningIndex.display_name)
+            print("Wrote %i kerning tables to %s" % (len(paths), folder))
+
+    if tabPairs:
+        font.newTab("".join(tabPairs))
+
+
+main()
@@ -0,0 +1,59 @@
+# MenuTitle: Check Kerning Group Coherence
+# -*- coding: utf-8 -*-
+__doc__ = """
+Compares the side profiles of all glyphs in the current master and reports glyphs whose shape no longer matches the other members of their left or right kerning group, with a better group where one fits. Ungrouped glyphs that closely match a group are listed too."""
+
+from GlyphsApp import *
+from oprCore import group_coherence, numpy_available, profile_cache_for_font, save_profile_cache
+
+# Average RMS profile distance (units) to the other group members above which a glyph is reported
+OUTLIER_DISTANCE = 20
+# Check every master instead of only the current one
+ALL_MASTERS = False
+# Keep outline profiles in a .profiles.npz file next to the .glyphs file
+USE_PROFILE_STORE = False
+
+SIDE_TITLES = [("left", "LEFT GROUPS"), ("right", "RIGHT GROUPS")]
+
+
+def describe(suggestion):
+    if suggestion.group:
+        line = "  %s in %s: %.0f" % (suggestion.name, suggestion.group, suggestion.distance)
+    else:
+        line = "  %s (no group)" % suggestion.name
+    if suggestion.suggested_group:
+        line += " -> %s: %.0f" % (suggestion.suggested_group, suggestion.suggested_distance)
+    return line
+
+
+def main():
+    font = Glyphs.font
+    if not numpy_available():
+        Message(title="Check Kerning Group Coherence", message="This script needs NumPy.")
+        return
+
+    profile_cache_for_font(font, persistent=USE_PROFILE_STORE)
+    masters = font.masters if ALL_MASTERS else [font.selectedFontMaster]
+
+    Glyphs.clearLog()
+    Glyphs.showMacroWindow()
+    print("CHECK KERNING GROUP COHERENCE (outlier distance %s)\n" % OUTLIER_DISTANCE)
+
+    tabNames = []
+    for master in masters:
+        for side, title in SIDE_TITLES:
+            suggestions = group_coherence(font, master.id, side, OUTLIER_DISTANCE)
+            print("%s, %s: %i glyphs" % (master.name, title, len(suggestions)))
+            for suggestion in suggestions:
+                print(describe(suggestion))
+                if suggestion.name not in tabNames:
+                    tabNames.append(suggestion.name)
+            print()
+
+    if USE_PROFILE_STORE:
+        save_profile_cache(font)
+    if tabNames:
+        font.newTab("".join("/%s" % name for name in tabNames))
+
+
+main()
@@ -1,73 +1,184 @@
 # -*- coding: utf-8 -*-
 #MenuTitle: Compare Kerning Pairs
+__doc__ = """
+Compares kerning across all masters of the current font, or across the masters
+of two open fonts. Reports pairs missing in some masters and pairs whose values
+differ by more than the tolerance, as a CSV/JSON-lines report and proof tabs.
+"""
 
-from GlyphsApp import Glyphs, GSControlLayer
-
-font = Glyphs.font
-if not font or len(font.masters) < 2:
-    raise Exception("Open a font with at least two masters.")
-
-masterA = font.masters[0]
-masterB = font.masters[1]
-
-kernA = font.kerning.get(masterA.id, {})
-kernB = font.kerning.get(masterB.id, {})
-
-def allPairs(kernDict):
-    pairs = set()
-    for L, rights in kernDict.items():
-        for R in rights.keys():
-            pairs.add((L, R))
-    return pairs
-
-pairsA = allPairs(kernA)
-pairsB = allPairs(kernB)
-
-onlyInA = pairsA - pairsB
-onlyInB = pairsB - pairsA
-
-tab = font.newTab()
-tab.text = ""
-tab.graphicView().setDoKerning_(1)
-tab.graphicView().setDoSpacing_(0)
-
-def glyphName(name, isLeft):
-    if name.startswith("@"):
-        group = name[7:]
-        for g in font.glyphs:
-            if isLeft and g.rightKerningGroup == group:
-                return g.name
-            if not isLeft and g.leftKerningGroup == group:
-                return g.name
-        return None
-    else:
-        g = font.glyphForId_(name)
-        return g.name if g else None
-
-def addHeader(text):
-    for c in text:
-        g = font.glyphForCharacter_(ord(c))
-        if g:
-            tab.layers.append(g.layers[masterA.id])
-    tab.layers.append(GSControlLayer.newline())
-
-def addPairs(pairs, masterID):
-    for L, R in sorted(pairs):
-        leftName = glyphName(L, isLeft=True)
-        rightName = glyphName(R, isLeft=False)
-        if not leftName or not rightName:
-            continue
-        tab.layers.append(font.glyphs[leftName].layers[masterID])
-        tab.layers.append(font.glyphs[rightName].layers[masterID])
-        tab.layers.append(font.glyphs["space"].layers[masterID])
-    tab.layers.append(GSControlLayer.newline())
-
-if onlyInA:
-    addHeader(f"Only in {masterA.name}:")
-    addPairs(onlyInA, masterA.id)
-
-if onlyInB:
-    addHeader(f"Only in {masterB.name}:")
-    addPairs(onlyInB, masterB.id)
-
-print(f"Done. {len(onlyInA)} pairs only in {masterA.name}, {len(onlyInB)} only in {masterB.name}.")
+from GlyphsApp import Glyphs, GSControlLayer, GetSaveFile, Message
+from vanilla import Button, CheckBox, EditText, FloatingWindow, PopUpButton, TextBox
+from oprCore import (
+    KerningSource,
+    diff_kerning,
+    kerning_index_for_font,
+    unique_labels,
+    write_diff_csv,
+    write_diff_jsonl,
+)
+
+PAIRS_PER_TAB = 300
+MAX_TABS = 10
+MAX_LISTED = 50
+REPORT_FORMATS = ["No report", "CSV", "JSON lines"]
+
+
+def fontLabel(font):
+    return font.familyName or "Untitled"
+
+
+class RowSummary(object):
+    """Counts diff rows, keeping only the ones the log and the proof tabs show."""
+
+    def __init__(self, proofLimit):
+        self.proofLimit = proofLimit
+        self.total = 0
+        self.missingCount = 0
+        self.deltaCount = 0
+        self.listed = []
+        self.missing = []
+        self.deltas = []
+
+    def collect(self, rows):
+        # pass rows through to the report writer while summarizing them
+        for row in rows:
+            self.add(row)
+            yield row
+
+    def add(self, row):
+        self.total += 1
+        if len(self.listed) < MAX_LISTED:
+            self.listed.append(row)
+        if row[2] == "missing":
+            self.missingCount += 1
+            if len(self.missing) < self.proofLimit:
+                self.missing.append(row)
+        elif row[2] == "delta":
+            self.deltaCount += 1
+            if len(self.deltas) < self.proofLimit:
+                self.deltas.append(row)
+
+    def proofRows(self):
+        return (self.missing + self.deltas)[:self.proofLimit]
+
+
+class CompareKerningDialog(object):
+    def __init__(self):
+        self.font = Glyphs.font
+        if not self.font:
+            Message(title="Compare Kerning Pairs", message="Open a font first.")
+            return
+
+        self.otherFonts = [f for f in Glyphs.fonts if f != self.font]
+        modes = ["All masters of %s" % fontLabel(self.font)]
+        modes += ["%s + %s" % (fontLabel(self.font), fontLabel(f)) for f in self.otherFonts]
+
+        self.w = FloatingWindow((380, 170), "Compare Kerning Pairs")
+        self.w.modeLabel = TextBox((15, 14, 80, 20), "Compare:")
+        self.w.mode = PopUpButton((100, 12, -15, 22), modes)
+        self.w.toleranceLabel = TextBox((15, 46, 80, 20), "Tolerance:")
+        self.w.tolerance = EditText((100, 44, 60, 22), "0")
+        self.w.reportLabel = TextBox((15, 78, 80, 20), "Report:")
+        self.w.report = PopUpButton((100, 76, -15, 22), REPORT_FORMATS)
+        self.w.proof = CheckBox((100, 106, -15, 20), "Open proof tabs", value=True)
+        self.w.runButton = Button((-145, 136, -15, 22), "Compare", callback=self.compare)
+        self.w.setDefaultButton(self.w.runButton)
+        self.w.open()
+        self.w.makeKey()
+
+    def sources(self):
+        mode = self.w.mode.get()
+        fonts = [self.font] if mode == 0 else [self.font, self.otherFonts[mode - 1]]
+        sources = []
+        for font in fonts:
+            for master in font.masters:
+                label = master.name if len(fonts) == 1 else "%s %s" % (fontLabel(font), master.name)
+                sources.append(KerningSource(font, master, label))
+        return sources
+
+    def compare(self, sender):
+        try:
+            tolerance = int(self.w.tolerance.get())
+        except ValueError:
+            Message(title="Compare Kerning Pairs", message="Please enter a valid integer tolerance.")
+            return
+
+        sources = self.sources()
+        if len(sources) < 2:
+            Message(title="Compare Kerning Pairs", message="Need at least two masters to compare.")
+            return
+        labels = unique_labels(sources)
+
+        reportFormat = self.w.report.get()
+        reportPath = None
+        if reportFormat:
+            extension = "csv" if reportFormat == 1 else "jsonl"
+            reportPath = GetSaveFile(
+                message="Save kerning comparison",
+                ProposedFileName="%s kerning comparison.%s" % (fontLabel(self.font), extension),
+                filetypes=[extension],
+            )
+            if not reportPath:
+                return
+
+        Glyphs.clearLog()
+        Glyphs.showMacroWindow()
+        print("COMPARE KERNING PAIRS: %s\n" % ", ".join(labels))
+
+        rows = diff_kerning(sources, tolerance=tolerance)
+        summary = RowSummary(PAIRS_PER_TAB * MAX_TABS)
+        if reportPath:
+            writeReport = write_diff_csv if reportFormat == 1 else write_diff_jsonl
+            writeReport(summary.collect(rows), reportPath, labels)
+        else:
+            for row in rows:
+                summary.add(row)
+
+        print("%i pairs missing in some masters." % summary.missingCount)
+        print("%i pairs differ by more than %i units." % (summary.deltaCount, tolerance))
+        for left, right, status, delta, values in summary.listed:
+            print("  %s %s: %s" % (left, right, ", ".join("-" if v is None else str(v) for v in values)))
+        if summary.total > MAX_LISTED:
+            print("  ... %i more" % (summary.total - MAX_LISTED))
+        if reportPath:
+            print("\nReport written to %s" % reportPath)
+
+        if self.w.proof.get():
+            self.openProofTabs(summary.proofRows(), sources)
+            if summary.missingCount + summary.deltaCount > PAIRS_PER_TAB * MAX_TABS:
+                print("\nOnly the first %i pairs are shown in tabs." % (PAIRS_PER_TAB * MAX_TABS))
+
+        self.w.close()
+
+    def proofLayers(self, row, sources, indexes):
+        # the pair once per master, each in its own master's layers
+        left, right = row[0], row[1]
+        layers = []
+        for source, kerningIndex in zip(sources, indexes):
+            leftName = kerningIndex.key_glyph(left)
+            rightName = kerningIndex.key_glyph(right)
+            if not leftName or not rightName:
+                continue
+            glyphs = source.font.glyphs
+            masterID = source.master.id
+            layers.append(glyphs[leftName].layers[masterID])
+            layers.append(glyphs[rightName].layers[masterID])
+            if glyphs["space"]:
+                layers.append(glyphs["space"].layers[masterID])
+        if layers:
+            layers.append(GSControlLayer.newline())
+        return layers
+
+    def openProofTabs(self, rows, sources):
+        # class keys and glyph names must be looked up in each source's own font
+        indexes = [kerning_index_for_font(source.font) for source in sources]
+        for i in range(0, len(rows), PAIRS_PER_TAB):
+            tabLayers = []
+            for row in rows[i:i + PAIRS_PER_TAB]:
+                tabLayers.extend(self.proofLayers(row, sources, indexes))
+            if tabLayers:
+                tab = self.font.newTab()
+                tab.layers = tabLayers
+
+
+CompareKerningDialog()
@@ -3,18 +3,27 @@
 __doc__ = """
 Reduces the number of different kerning values in the current Glyphs file, similar to a GIF/PNG-8 palette. This is lossy but nearly imperceptible, and helps reduce webfont size. Original script by Just Another Foundry for fontTools."""
 
-from GlyphsApp import *
-
-def isValidKerningKey(font, key):
-    """Check if kerning key is valid (glyph name or group)."""
-    if key is None:
-        return False
-    if key.startswith("@"):  # kerning group
-        return True
-    if font.glyphs[key]:  # glyph name exists
-        return True
-    return False
+from bisect import bisect_left
 
+from GlyphsApp import *
+from oprCore import (
+    GPOSSizeMeter,
+    KerningChangeSet,
+    KerningJournal,
+    fonttools_available,
+    numpy_available,
+    optimal_palette,
+)
+
+# "optimal": minimum palette under max_tweak via dynamic programming (needs NumPy)
+# "greedy": original span merging
+QUANTIZE_MODE = "optimal"
+# Optional target number of distinct values; None means as few as max_tweak allows
+PALETTE_SIZE = None
+# Compile GPOS with fontTools to report real sizes instead of an estimate
+MEASURE_GPOS = True
+# Only snap pairs added or edited since the last run to the existing palette
+ONLY_CHANGED = False
 
 def collectKerningValues(font):
     """Collect all kerning values from the font."""
@@ -34,42 +43,11 @@ def collectKerningValues(font):
     return values, pairs
 
 
-def palettize_kerning(font, max_tweak_relative=0.003):
-    upm = font.upm
-    max_tweak = max_tweak_relative * upm
-    if max_tweak < 1:
-        return
-
-    # Collect values before
-    beforeValues, beforePairs = collectKerningValues(font)
-    beforeUnique = len(set(beforeValues))
-
-    # Collect all kerning values for processing
-    allValueRecords = []  # store (masterID, left, right, value)
-    for master in font.masters:
-        kerningDict = font.kerning[master.id]
-        if not kerningDict:
-            continue
-        for left, rightDict in kerningDict.items():
-            if not rightDict:
-                continue
-            for right, value in rightDict.items():
-                if value is not None:
-                    if abs(value) > max_tweak:
-                        allValueRecords.append((master.id, left, right, value))
-                    else:
-                        # too small, set to zero if valid
-                        if isValidKerningKey(font, left) and isValidKerningKey(
-                            font, right
-                        ):
-                            font.setKerningForPair(master.id, left, right, 0)
-
-    if not allValueRecords:
-        print("⚠️ No kerning values found to process.")
-        return
-
+def greedy_palette(allValueRecords, max_tweak):
+    """Original greedy span merging; returns {value: quantized value}."""
     # Create sorted unique list of all kerning values
     allValues = sorted({v for (_, _, _, v) in allValueRecords})
+    valueSet = set(allValues)
 
     # Set up spans
     spans = []
@@ -89,12 +67,12 @@ def palettize_kerning(font, max_tweak_relative=0.003):
         middle = (spans[i][0] + spans[i + 1][1]) // 2
         if spans[i][1] > middle:
             spans[i][1] = middle
-            while spans[i][1] > spans[i][0] and spans[i][1] not in allValues:
+            while spans[i][1] > spans[i][0] and spans[i][1] not in valueSet:
                 spans[i][1] -= 1
             spans[i + 1][0] = middle + 1
             while (
                 spans[i + 1][0] < spans[i + 1][1]
-                and spans[i + 1][0] not in allValues
+                and spans[i + 1][0] not in valueSet
             ):
                 spans[i + 1][0] += 1
         else:
@@ -107,23 +85,131 @@ def palettize_kerning(font, max_tweak_relative=0.003):
         for i in range(span[0], span[1] + 1):
             mapping[i] = middle
 
+    return mapping
+
+
+def snap_to_palette(palette, value, max_tweak):
+    """Nearest value of the sorted palette within max_tweak, else the value itself."""
+    i = bisect_left(palette, value)
+    nearest = [p for p in palette[max(i - 1, 0):i + 1] if abs(p - value) <= max_tweak]
+    if not nearest:
+        return value
+    return min(nearest, key=lambda p: abs(p - value))
+
+
+def palettize_changed_kerning(font, journal, max_tweak):
+    """Incremental mode: snap only the delta since the last run to the palette that run left."""
+    palette = sorted(set(v for master in font.masters for v in journal.unchanged_values(master.id)))
+    changes = KerningChangeSet(font)
+    visited = 0
+    for master in font.masters:
+        for left, right, value in journal.changed_pairs(master.id):
+            visited += 1
+            if abs(value) <= max_tweak:
+                newValue = 0
+            else:
+                newValue = snap_to_palette(palette, value, max_tweak)
+            if newValue != value:
+                changes.set(master.id, left, right, newValue)
+    changed = len(changes)
+    changes.apply()
+    journal.record()
+    print("✅ Compress Kerning Report (changed pairs only)")
+    print(f"  Pairs changed since last run: {visited}")
+    print(f"  Palette values: {len(palette)}")
+    print(f"  Snapped pairs: {changed}")
+
+
+def palettize_kerning(font, max_tweak_relative=0.003):
+    upm = font.upm
+    max_tweak = max_tweak_relative * upm
+    if max_tweak < 1:
+        return
+
+    settings = {"max_tweak": max_tweak, "mode": QUANTIZE_MODE, "palette_size": PALETTE_SIZE}
+    journal = KerningJournal(font, "compress-kerning", settings)
+    onlyChanged = ONLY_CHANGED and journal.is_available()
+    if ONLY_CHANGED and not onlyChanged:
+        print("⚠️ Save the font to keep track of changed pairs, processing all pairs.")
+    elif onlyChanged:
+        if journal.is_current():
+            palettize_changed_kerning(font, journal, max_tweak)
+            return
+        print("⚠️ No matching last run (or groups changed), processing all pairs.")
+
+    # Collect values before
+    beforeValues, beforePairs = collectKerningValues(font)
+    beforeUnique = len(set(beforeValues))
+
+    meter = None
+    if MEASURE_GPOS and fonttools_available():
+        meter = GPOSSizeMeter(font)
+        beforeSizes = meter.font_sizes()
+    elif MEASURE_GPOS:
+        print("⚠️ fontTools not available, estimating GPOS size.")
+
+    # All edits are collected and written per master in one batch
+    changes = KerningChangeSet(font)
+
+    # Collect all kerning values for processing
+    allValueRecords = []  # store (masterID, left, right, value)
+    for master in font.masters:
+        kerningDict = font.kerning[master.id]
+        if not kerningDict:
+            continue
+        for left, rightDict in kerningDict.items():
+            if not rightDict:
+                continue
+            for right, value in rightDict.items():
+                if value is not None:
+                    if abs(value) > max_tweak:
+                        allValueRecords.append((master.id, left, right, value))
+                    else:
+                        # too small, set to zero if valid
+                        if value != 0:
+                            changes.set(master.id, left, right, 0)
+
+    if not allValueRecords:
+        changes.apply()
+        print("⚠️ No kerning values found to process.")
+        return
+
+    if QUANTIZE_MODE == "optimal" and numpy_available():
+        mapping = optimal_palette(
+            [v for (_, _, _, v) in allValueRecords],
+            max_tweak=max_tweak,
+            palette_size=PALETTE_SIZE,
+        )
+    else:
+        if QUANTIZE_MODE == "optimal":
+            print("⚠️ NumPy not available, using greedy span merging.")
+        mapping = greedy_palette(allValueRecords, max_tweak)
+
     # Apply mapping
     changed = 0
     for (masterID, left, right, value) in allValueRecords:
         if value in mapping:
-            if isValidKerningKey(font, left) and isValidKerningKey(font, right):
-                newValue = mapping[value]
-                if newValue != value:
-                    changed += 1
-                font.setKerningForPair(masterID, left, right, newValue)
+            newValue = mapping[value]
+            if newValue != value and changes.set(masterID, left, right, newValue):
+                changed += 1
+    changes.apply()
+    if onlyChanged:
+        journal.record()
 
     # Collect values after
     afterValues, afterPairs = collectKerningValues(font)
     afterUnique = len(set(afterValues))
 
-    # Estimate size savings (rough: assume ~6 bytes per pair + 2 per unique value)
-    beforeSize = len(beforePairs) * 6 + beforeUnique * 2
-    afterSize = len(afterPairs) * 6 + afterUnique * 2
+    if meter:
+        afterSizes = meter.font_sizes()
+        beforeSize = sum(beforeSizes.values())
+        afterSize = sum(afterSizes.values())
+        sizeLabel = "Measured"
+    else:
+        # Estimate size savings (rough: assume ~6 bytes per pair + 2 per unique value)
+        beforeSize = len(beforePairs) * 6 + beforeUnique * 2
+        afterSize = len(afterPairs) * 6 + afterUnique * 2
+        sizeLabel = "Estimated"
     savings = beforeSize - afterSize
     percent = (savings / beforeSize * 100) if beforeSize > 0 else 0
 
@@ -133,10 +219,12 @@ def palettize_kerning(font, max_tweak_relative=0.003):
     print(f"  Unique values before: {beforeUnique}")
     print(f"  Unique values after:  {afterUnique}")
     print(f"  Changed pairs: {changed}")
-    print(f"  Estimated GPOS size before: {beforeSize} bytes")
-    print(f"  Estimated GPOS size after:  {afterSize} bytes")
-    print(f"  Estimated savings: {savings} bytes ({percent:.1f}%)")
-
+    if meter:
+        for master in font.masters:
+            print(f"  GPOS {master.name}: {beforeSizes[master.id]} → {afterSizes[master.id]} bytes")
+    print(f"  {sizeLabel} GPOS size before: {beforeSize} bytes")
+    print(f"  {sizeLabel} GPOS size after:  {afterSize} bytes")
+    print(f"  {sizeLabel} savings: {savings} bytes ({percent:.1f}%)")
 
 # Run on current font
 font = Glyphs.font
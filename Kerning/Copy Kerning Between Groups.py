@@ -1,8 +1,9 @@
 # MenuTitle: Copy Kerning Between Groups
 # -*- coding: utf-8 -*-
 
-from GlyphsApp import Glyphs
+from GlyphsApp import Glyphs, GetOpenFile
 import vanilla
+from oprCore import SIDE_MODES, load_group_mappings, remap_group_kerning
 
 class KerningCopyUI(object):
     def __init__(self):
@@ -62,6 +63,7 @@ class KerningCopyUI(object):
 
         y += 50
         self.w.run = vanilla.Button((150, y, 120, 30), "Copy", callback=self.copyKerning)
+        self.w.batch = vanilla.Button((280, y, 120, 30), "Batch CSV…", callback=self.batchCopyKerning)
 
         self.w.open()
         self.w.makeKey()
@@ -79,29 +81,31 @@ class KerningCopyUI(object):
             print("❌ No valid groups to copy.")
             return
 
-        srcL = self.leftMap.get(src)
-        srcR = self.rightMap.get(src)
-        tgtL = self.leftMap.get(tgt)
-        tgtR = self.rightMap.get(tgt)
+        mapping = (src, tgt, SIDE_MODES[self.w.side.get()])
+        changes, conflicts = remap_group_kerning(self.font, [mapping], masters=[self.master])
 
-        f = self.font
-        mID = self.master.id
-        count = 0
-        mode = self.w.side.get()
-
-        for leftKey, rightPairs in self.kernDict.items():
-            for rightKey, value in rightPairs.items():
-
-                if mode == 0 and rightKey == srcR:  # R → R
-                    f.setKerningForPair(mID, leftKey, tgtR, value); count += 1
+        count = len(changes)
+        changes.apply()
+        print(f"✅ Copied {count} pairs from {src} → {tgt}")
 
-                elif mode == 1 and leftKey == srcL:  # L → L
-                    f.setKerningForPair(mID, tgtL, rightKey, value); count += 1
+    def batchCopyKerning(self, sender):
+        # CSV rows: source group, target group, side mode (RR, LL, RL or LR)
+        path = GetOpenFile(message="Choose a group mapping CSV", filetypes=["csv", "txt"])
+        if not path:
+            return
 
-                elif mode == 2 and rightKey == srcR:  # R → L
-                    f.setKerningForPair(mID, tgtL, rightKey, value); count += 1
+        try:
+            mappings = load_group_mappings(path)
+        except ValueError as e:
+            print(f"❌ {e}")
+            return
 
-                elif mode == 3 and leftKey == srcL:  # L → R
-                    f.setKerningForPair(mID, leftKey, tgtR, value); count += 1
+        changes, conflicts = remap_group_kerning(self.font, mappings)
+        count = len(changes)
+        changes.apply()
 
-        print(f"✅ Copied {count} pairs from {src} → {tgt}")
+        for message in conflicts[:100]:
+            print(f"⚠️ {message}")
+        if len(conflicts) > 100:
+            print(f"⚠️ ... {len(conflicts) - 100} more conflicts")
+        print(f"✅ Applied {len(mappings)} mappings in all masters: {count} pairs written, {len(conflicts)} conflicts")
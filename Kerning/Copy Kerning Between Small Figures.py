@@ -1,13 +1,16 @@
 # MenuTitle: Copy Kerning Between Small Figures
 # encoding: utf-8
 __doc__ = """
-Copy kerning between small figures.
+Copy kerning between small figures, or between any other suffix groups such
+as .sc, .case or the .lf/.osf/.tf figure sets.
 """
 
 from GlyphsApp import *
 from vanilla import *
+from oprCore import KerningChangeSet, kerning_index_for_font
 
 font = Glyphs.font
+kerningIndex = kerning_index_for_font(font)
 
 # Define possible suffixes for each group (with descriptive names for UI)
 groupSuffixes = {
@@ -15,6 +18,11 @@ groupSuffixes = {
     "Inferior (.subs/inferior)": [".subs", "inferior"],
     "Numerator (.numr)": [".numr"],
     "Denominator (.dnom)": [".dnom"],
+    "Lining figures (.lf)": [".lf"],
+    "Oldstyle figures (.osf)": [".osf"],
+    "Tabular figures (.tf)": [".tf"],
+    "Small caps (.sc)": [".sc"],
+    "Case (.case)": [".case"],
 }
 
 # Define expected categories/subCategories
@@ -25,19 +33,64 @@ groupCategories = {
     "Denominator (.dnom)": ("Number", "Fraction"),
 }
 
+# Groups of the same family copy to each other with "All other groups in family"
+groupFamilies = {
+    "Superior (.sups/superior)": "small figures",
+    "Inferior (.subs/inferior)": "small figures",
+    "Numerator (.numr)": "small figures",
+    "Denominator (.dnom)": "small figures",
+    "Lining figures (.lf)": "figures",
+    "Oldstyle figures (.osf)": "figures",
+    "Tabular figures (.tf)": "figures",
+    "Small caps (.sc)": "small caps",
+    "Case (.case)": "case",
+}
+
+ALL_IN_FAMILY = "All other groups in family"
+REPORT_EXAMPLES = 20
+
 # Collect available groups
 groups = {key: [] for key in groupSuffixes.keys()}
 
 for g in font.glyphs:
     for groupName, suffixList in groupSuffixes.items():
-        cat, subcat = groupCategories[groupName]
+        cat, subcat = groupCategories.get(groupName, (None, None))
         if (
-            (g.category == cat and g.subCategory == subcat)
+            (cat and g.category == cat and g.subCategory == subcat)
             or any(g.name.endswith(suffix) for suffix in suffixList)
         ):
             groups[groupName].append(g.name)
 
 
+def replaceSuffix(name, sourceSuffixes, targetSuffix):
+    """Replace any of the source suffixes with the target suffix, or return None."""
+    for s in sourceSuffixes:
+        if name.endswith(s):
+            return name[: -len(s)] + targetSuffix
+    return None
+
+
+def buildSuffixKeyMap(sourceSuffixes, targetSuffixes):
+    """
+    Map every kerning key (glyph ID or class) whose name carries a source
+    suffix to {target suffix: existing target key}, computed once.
+    """
+    keyMap = {}
+    for glyphName in kerningIndex.glyph_names:
+        for targetSuffix in targetSuffixes:
+            targetName = replaceSuffix(glyphName, sourceSuffixes, targetSuffix)
+            targetID = kerningIndex.id_for_name.get(targetName)
+            if targetID:
+                keyMap.setdefault(kerningIndex.id_for_name[glyphName], {})[targetSuffix] = targetID
+    for groupKey in kerningIndex.members_for_key:
+        prefix, groupName = groupKey[:7], groupKey[7:]
+        for targetSuffix in targetSuffixes:
+            targetName = replaceSuffix(groupName, sourceSuffixes, targetSuffix)
+            if targetName and prefix + targetName in kerningIndex.members_for_key:
+                keyMap.setdefault(groupKey, {})[targetSuffix] = prefix + targetName
+    return keyMap
+
+
 class CopyKerningDialog(object):
     def __init__(self):
         availableGroups = [
@@ -45,37 +98,69 @@ class CopyKerningDialog(object):
         ]
 
         if not availableGroups:
-            Message("No small figure groups found in this font.")
+            Message("No small figure or suffix groups found in this font.")
             return
 
         self.availableGroups = availableGroups
 
-        self.w = Window((350, 160), "Copy Kerning Between Small Figures")
+        self.w = Window((350, 190), "Copy Kerning Between Small Figures")
 
         self.w.text = TextBox((15, 12, -15, 20), "Choose source group:")
         self.w.source = PopUpButton(
             (15, 40, -15, 20), availableGroups, sizeStyle="regular"
         )
 
+        self.w.targetText = TextBox((15, 70, 30, 20), "To:")
+        self.w.target = PopUpButton(
+            (45, 70, -15, 20), [ALL_IN_FAMILY] + availableGroups, sizeStyle="regular"
+        )
+
         # ✅ Checkbox for all masters (default unchecked)
         self.w.allMasters = CheckBox(
-            (15, 70, -15, 20),
+            (15, 100, -15, 20),
             "Apply to all masters",
             value=False,
         )
 
         self.w.runButton = Button(
-            (15, 110, -15, 20), "Copy Kerning", callback=self.copyKerning
+            (15, 140, -15, 20), "Copy Kerning", callback=self.copyKerning
         )
 
         self.w.open()
         self.w.makeKey()
 
+    def targetGroups(self, sourceGroup):
+        targetIndex = self.w.target.get()
+        if targetIndex > 0:
+            targetGroup = self.availableGroups[targetIndex - 1]
+            return [] if targetGroup == sourceGroup else [targetGroup]
+        return [
+            g for g in self.availableGroups
+            if g != sourceGroup and groupFamilies[g] == groupFamilies[sourceGroup]
+        ]
+
     def copyKerning(self, sender):
         sourceGroup = self.availableGroups[self.w.source.get()]
         sourceSuffixes = groupSuffixes[sourceGroup]
+        targetGroups = self.targetGroups(sourceGroup)
+        if not targetGroups:
+            if self.w.target.get() == 0:
+                Message("This font has no other %s groups to copy %s to." % (groupFamilies[sourceGroup], sourceGroup))
+            else:
+                Message("Choose a target group different from the source group.")
+            return
+
+        # target suffix -> target group, for the report
+        suffixGroups = {}
+        for targetGroup in targetGroups:
+            for targetSuffix in groupSuffixes[targetGroup]:
+                suffixGroups[targetSuffix] = targetGroup
+        keyMap = buildSuffixKeyMap(sourceSuffixes, list(suffixGroups))
 
         kerning = font.kerning
+        changes = KerningChangeSet(font, index=kerningIndex)
+        copiedPerGroup = {}
+        examples = []
 
         # ✅ Decide which masters to process
         if self.w.allMasters.get():
@@ -85,63 +170,50 @@ class CopyKerningDialog(object):
 
         for master in mastersToProcess:
             masterID = master.id
-            masterKerning = kerning[masterID]
-
-            # Loop through kerning pairs
-            for leftKey in list(masterKerning.keys()):
-                for rightKey in list(masterKerning[leftKey].keys()):
-                    value = masterKerning[leftKey][rightKey]
-
-                    # Only process if both sides are from the source group
-                    if any(
-                        leftKey.endswith(suffix) for suffix in sourceSuffixes
-                    ) and any(
-                        rightKey.endswith(suffix) for suffix in sourceSuffixes
-                    ):
-                        # Copy to other groups
-                        for targetGroup, targetSuffixes in groupSuffixes.items():
-                            if targetGroup == sourceGroup:
-                                continue
-                            if not groups[targetGroup]:
-                                continue  # skip if group not present
-
-                            for targetSuffix in targetSuffixes:
-                                newLeft = self.replaceSuffix(
-                                    leftKey, sourceSuffixes, targetSuffix
-                                )
-                                newRight = self.replaceSuffix(
-                                    rightKey, sourceSuffixes, targetSuffix
-                                )
-
-                                # Only copy if glyphs exist
-                                leftName = newLeft.replace("@MMK_L_", "")
-                                rightName = newRight.replace("@MMK_R_", "")
-
-                                if leftName in font.glyphs and rightName in font.glyphs:
-                                    font.setKerningForPair(
-                                        masterID, newLeft, newRight, value
-                                    )
-                                    print(
-                                        f"[{master.name}] Copied {value} "
-                                        f"from {leftKey}/{rightKey} "
-                                        f"to {newLeft}/{newRight}"
-                                    )
+            masterKerning = kerning[masterID] or {}
+
+            # Only pairs with both sides in the source group have entries in keyMap
+            for leftKey, rightPairs in masterKerning.items():
+                leftTargets = keyMap.get(leftKey)
+                if not leftTargets:
+                    continue
+                for rightKey, value in rightPairs.items():
+                    rightTargets = keyMap.get(rightKey)
+                    if not rightTargets:
+                        continue
+                    for targetSuffix, newLeft in leftTargets.items():
+                        newRight = rightTargets.get(targetSuffix)
+                        if not newRight:
+                            continue
+                        changes.set(masterID, newLeft, newRight, value)
+                        targetGroup = suffixGroups[targetSuffix]
+                        copiedPerGroup[(master.name, targetGroup)] = copiedPerGroup.get((master.name, targetGroup), 0) + 1
+                        if len(examples) < REPORT_EXAMPLES:
+                            examples.append(
+                                f"[{master.name}] {value}: "
+                                f"{kerningIndex.display_name(leftKey)}/{kerningIndex.display_name(rightKey)} → "
+                                f"{kerningIndex.display_name(newLeft)}/{kerningIndex.display_name(newRight)}"
+                            )
+
+        changedCount, _ = changes.apply()
+
+        # Summarized report
+        print(f"Copy Kerning from {sourceGroup}:")
+        for (masterName, targetGroup), count in sorted(copiedPerGroup.items()):
+            print(f"  [{masterName}] {count} pairs → {targetGroup}")
+        for example in examples:
+            print(f"    {example}")
+        print(f"  {changedCount} pairs added or changed.")
 
         Glyphs.showNotification(
             "Kerning Copy Finished",
             f"Copied kerning from {sourceGroup} "
-            f"({'all masters' if self.w.allMasters.get() else 'current master'}).",
+            f"({'all masters' if self.w.allMasters.get() else 'current master'}). "
+            f"{changedCount} pairs changed.",
         )
 
         # ✅ Close the dialog after finishing
         self.w.close()
 
-    def replaceSuffix(self, name, sourceSuffixes, targetSuffix):
-        """Replace any of the source suffixes with the target suffix."""
-        for s in sourceSuffixes:
-            if name.endswith(s):
-                return name[: -len(s)] + targetSuffix
-        return name
-
 
 CopyKerningDialog()
\ No newline at end of file
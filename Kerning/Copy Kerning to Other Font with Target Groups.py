@@ -13,6 +13,7 @@ same numeric value.
 from collections import Counter
 
 from GlyphsApp import Glyphs, Message
+from oprCore import kerning_index_for_font
 from vanilla import Button, PopUpButton, TextBox, Window
 
 
@@ -136,10 +137,15 @@ class KerningGroupConverter(object):
 		Message(title="Copy Kerning Groups", message=message)
 
 	def convert_target_to_source_groups(self, source_font, target_font):
+		# refresh both indexes once; the helpers below read them unchecked
+		kerning_index_for_font(source_font)
+		kerning_index_for_font(target_font)
+		# (key, side) -> translated keys; the same keys recur under every left key and master
+		self.translation_cache = {}
+
 		warnings = []
 		conflicts = []
 		translated_by_master = {}
-		pairs_written = 0
 		pairs_skipped = 0
 
 		for target_master in target_font.masters:
@@ -174,13 +180,7 @@ class KerningGroupConverter(object):
 			translated_by_master[target_master.id] = translated_pairs
 
 		groups_updated = self.copy_group_assignments(source_font, target_font, warnings)
-		self.clear_target_kerning(target_font)
-
-		for target_master in target_font.masters:
-			for pair_key, value in translated_by_master.get(target_master.id, {}).items():
-				left_key, right_key = pair_key
-				target_font.setKerningForPair(target_master.id, left_key, right_key, value)
-				pairs_written += 1
+		pairs_written = self.write_target_kerning(target_font, translated_by_master)
 
 		return {
 			"groups_updated": groups_updated,
@@ -191,9 +191,22 @@ class KerningGroupConverter(object):
 			"conflicts": conflicts,
 		}
 
-	def clear_target_kerning(self, font):
+	def write_target_kerning(self, font, translated_by_master):
+		# Replace each master's kerning with one assignment. font.kerning stores
+		# glyph sides as IDs; the index is rebuilt here because groups changed.
+		index = kerning_index_for_font(font)
+		pairs_written = 0
 		for master in font.masters:
-			font.kerning[master.id] = {}
+			new_kerning = {}
+			for (left_key, right_key), value in translated_by_master.get(master.id, {}).items():
+				if not left_key.startswith("@"):
+					left_key = index.id_for_name[left_key]
+				if not right_key.startswith("@"):
+					right_key = index.id_for_name[right_key]
+				new_kerning.setdefault(left_key, {})[right_key] = value
+				pairs_written += 1
+			font.kerning[master.id] = new_kerning
+		return pairs_written
 
 	def copy_group_assignments(self, source_font, target_font, warnings):
 		changed = 0
@@ -214,20 +227,28 @@ class KerningGroupConverter(object):
 		return changed
 
 	def translate_pair_key(self, value_font, group_font, key, side, warnings):
+		cache_key = (key, side)
+		if cache_key not in self.translation_cache:
+			self.translation_cache[cache_key] = self.translate_pair_key_uncached(
+				value_font, group_font, key, side, warnings
+			)
+		return self.translation_cache[cache_key]
+
+	def translate_pair_key_uncached(self, value_font, group_font, key, side, warnings):
 		if key.startswith("@"):
 			return self.translate_group_key(value_font, group_font, key, side, warnings)
 
-		value_glyph = self.glyph_for_id(value_font, key)
-		if not value_glyph:
+		value_name = self.index_for(value_font).glyph_name(key)
+		if not value_name:
 			warnings.append("No target glyph found for kerning ID: %s" % key)
 			return None
 
-		if not group_font.glyphs[value_glyph.name]:
-			warnings.append("No source glyph for target glyph /%s" % value_glyph.name)
+		if value_name not in self.index_for(group_font).id_for_name:
+			warnings.append("No source glyph for target glyph /%s" % value_name)
 			return None
 
-		# setKerningForPair expects glyph names, not the IDs used internally by font.kerning.
-		return [value_glyph.name]
+		# Pairs are keyed by glyph name until write_target_kerning() maps them to target IDs.
+		return [value_name]
 
 	def translate_group_key(self, value_font, group_font, key, side, warnings):
 		prefix = self.prefix_for_key(key)
@@ -235,27 +256,21 @@ class KerningGroupConverter(object):
 			warnings.append("Unsupported kerning group key: %s" % key)
 			return None
 
-		group_name = key[7:]
-		value_group_attr = self.group_attribute_for_side(side)
-		glyph_names = [
-			glyph.name
-			for glyph in value_font.glyphs
-			if getattr(glyph, value_group_attr) == group_name
-		]
-
+		glyph_names = self.index_for(value_font).members(key)
 		if not glyph_names:
 			warnings.append("No target glyphs found in group %s" % key)
 			return None
 
+		group_index = self.index_for(group_font)
 		new_keys = []
 		for glyph_name in glyph_names:
-			source_glyph = group_font.glyphs[glyph_name]
-			if source_glyph:
-				source_group = getattr(source_glyph, value_group_attr)
-				if source_group:
-					new_keys.append("%s%s" % (prefix, source_group))
-				else:
-					new_keys.append(glyph_name)
+			if glyph_name not in group_index.id_for_name:
+				continue
+			if side == "left":
+				source_key = group_index.left_key(glyph_name)
+			else:
+				source_key = group_index.right_key(glyph_name)
+			new_keys.append(source_key or glyph_name)
 
 		if not new_keys:
 			warnings.append("No source glyphs found for target group %s" % key)
@@ -263,6 +278,9 @@ class KerningGroupConverter(object):
 
 		return self.unique_in_order(new_keys)
 
+	def index_for(self, font):
+		return kerning_index_for_font(font, check=False)
+
 	def unique_in_order(self, items):
 		seen = set()
 		result = []
@@ -279,16 +297,5 @@ class KerningGroupConverter(object):
 			return "@MMK_R_"
 		return None
 
-	def group_attribute_for_side(self, side):
-		if side == "left":
-			return "rightKerningGroup"
-		return "leftKerningGroup"
-
-	def glyph_for_id(self, font, glyph_id):
-		try:
-			return font.glyphForId_(glyph_id)
-		except Exception:
-			return None
-
 
 KerningGroupConverter()
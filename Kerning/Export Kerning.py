@@ -0,0 +1,69 @@
+# MenuTitle: Export Kerning
+# -*- coding: utf-8 -*-
+__doc__ = """
+Exports the kerning of all masters as CSV or JSON lines (one row per pair, with a master column), or as UFO kerning.plist per master plus groups.plist. Glyphs are written by name. Import Kerning reads the files back."""
+
+import os
+
+from GlyphsApp import *
+from vanilla import Button, FloatingWindow, PopUpButton, TextBox
+from oprCore import (
+    iter_font_kerning,
+    iter_kerning,
+    kerning_index_for_font,
+    write_kerning_csv,
+    write_kerning_jsonl,
+    write_ufo_groups,
+    write_ufo_kerning,
+)
+
+EXPORT_FORMATS = ["CSV", "JSON lines", "UFO kerning.plist + groups.plist"]
+
+
+class ExportKerningDialog(object):
+    def __init__(self):
+        self.font = Glyphs.font
+        self.w = FloatingWindow((340, 80), "Export Kerning")
+        self.w.formatLabel = TextBox((15, 14, 60, 20), "Format:")
+        self.w.format = PopUpButton((75, 12, -15, 22), EXPORT_FORMATS)
+        self.w.exportButton = Button((-125, 46, -15, 22), "Export…", callback=self.export)
+        self.w.setDefaultButton(self.w.exportButton)
+        self.w.open()
+        self.w.makeKey()
+
+    def export(self, sender):
+        font = self.font
+        familyName = font.familyName or "Untitled"
+        kerningIndex = kerning_index_for_font(font)
+        exportFormat = self.w.format.get()
+
+        if exportFormat == 2:
+            folder = GetFolder(message="Choose a folder for the kerning plists", allowsMultipleSelection=False)
+            if not folder:
+                return
+            count = 0
+            for master in font.masters:
+                path = os.path.join(folder, "%s-%s kerning.plist" % (familyName, master.name))
+                count += write_ufo_kerning(iter_kerning(font, master.id, kerningIndex), path)
+            groupCount = write_ufo_groups(font, os.path.join(folder, "%s groups.plist" % familyName), kerningIndex)
+            message = "%i pairs and %i groups written to %s" % (count, groupCount, folder)
+        else:
+            extension = "csv" if exportFormat == 0 else "jsonl"
+            path = GetSaveFile(
+                message="Export kerning",
+                ProposedFileName="%s kerning.%s" % (familyName, extension),
+                filetypes=[extension],
+            )
+            if not path:
+                return
+            write = write_kerning_csv if exportFormat == 0 else write_kerning_jsonl
+            count = write(iter_font_kerning(font, index=kerningIndex), path)
+            message = "%i pairs written to %s" % (count, path)
+
+        print(message)
+        Glyphs.showNotification("Export Kerning", message)
+        self.w.close()
+
+
+if Glyphs.font:
+    ExportKerningDialog()
@@ -0,0 +1,85 @@
+# MenuTitle: Find Kerning Collisions
+# -*- coding: utf-8 -*-
+__doc__ = """
+Finds kerned pairs whose outlines touch or come closer than a minimum distance, e.g. /f/quoteright in the Black. Checks every master, or every active instance, and opens the colliding pairs in a new tab."""
+
+from GlyphsApp import *
+from oprCore import (
+    instance_kerning_collisions,
+    kerning_collisions,
+    numpy_available,
+    profile_cache_for_font,
+    save_profile_cache,
+)
+
+# Pairs this many units apart or closer are reported; 0 means only touching or overlapping outlines
+MIN_DISTANCE = 0
+# Check the interpolated active instances instead of the masters
+CHECK_INSTANCES = False
+# Number of collisions listed per master or instance
+MAX_LISTED = 50
+# Keep outline profiles in a .profiles.npz file next to the .glyphs file, so later runs only resample edited glyphs
+USE_PROFILE_STORE = False
+
+
+def reportCollisions(title, collisions):
+    print("%s: %i collisions" % (title, len(collisions)))
+    for collision in collisions[:MAX_LISTED]:
+        print("  %s %s (kerning %s): gap %.0f" % (collision.left_name, collision.right_name, collision.value, collision.gap))
+    if len(collisions) > MAX_LISTED:
+        print("  ... %i more" % (len(collisions) - MAX_LISTED))
+    print()
+
+
+def finish(font, profileCache):
+    print("Outline profiles: %i reused, %i sampled" % (profileCache.hits, profileCache.misses))
+    if USE_PROFILE_STORE:
+        save_profile_cache(font)
+
+
+def main():
+    font = Glyphs.font
+    if not numpy_available():
+        Message(title="Find Kerning Collisions", message="This script needs NumPy.")
+        return
+
+    Glyphs.clearLog()
+    Glyphs.showMacroWindow()
+    print("FIND KERNING COLLISIONS (minimum distance %s)\n" % MIN_DISTANCE)
+    profileCache = profile_cache_for_font(font, persistent=USE_PROFILE_STORE)
+    profileCache.hits = profileCache.misses = 0
+
+    if CHECK_INSTANCES:
+        # interpolated layers cannot be shown in a tab, so the pairs are proofed in the current master
+        pairs = []
+        seenPairs = set()
+        for instance in font.instances:
+            if not instance.active:
+                continue
+            collisions = instance_kerning_collisions(instance, MIN_DISTANCE)
+            reportCollisions(instance.name, collisions)
+            for collision in collisions:
+                pair = "/%s/%s/space" % (collision.left_name, collision.right_name)
+                if pair not in seenPairs:
+                    seenPairs.add(pair)
+                    pairs.append(pair)
+        finish(font, profileCache)
+        if pairs:
+            font.newTab("".join(pairs))
+        return
+
+    tabLayers = []
+    for master in font.masters:
+        collisions = kerning_collisions(font, master.id, MIN_DISTANCE)
+        reportCollisions(master.name, collisions)
+        for collision in collisions:
+            tabLayers.append(font.glyphs[collision.left_name].layers[master.id])
+            tabLayers.append(font.glyphs[collision.right_name].layers[master.id])
+            tabLayers.append(GSControlLayer.newline())
+    finish(font, profileCache)
+    if tabLayers:
+        tab = font.newTab()
+        tab.layers = tabLayers
+
+
+main()
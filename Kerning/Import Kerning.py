@@ -0,0 +1,39 @@
+# MenuTitle: Import Kerning
+# -*- coding: utf-8 -*-
+__doc__ = """
+Imports kerning from a CSV or JSON-lines file written by Export Kerning (masters matched by name or ID), or from a UFO kerning.plist into the current master. Pairs are applied in batches; pairs with unknown masters or glyphs are skipped."""
+
+from GlyphsApp import *
+from oprCore import import_kerning, read_kerning_csv, read_kerning_jsonl, read_ufo_kerning
+
+# Remove the existing kerning of every master that receives pairs
+REPLACE_KERNING = False
+
+
+def main():
+    font = Glyphs.font
+    path = GetOpenFile(message="Import kerning", filetypes=["csv", "jsonl", "plist"])
+    if not path:
+        return
+
+    font.disableUpdateInterface()
+    try:
+        if path.endswith(".plist"):
+            rows = read_ufo_kerning(path)
+            written, skipped = import_kerning(font, rows, master_id=font.selectedFontMaster.id, clear=REPLACE_KERNING)
+        else:
+            rows = read_kerning_csv(path) if path.endswith(".csv") else read_kerning_jsonl(path)
+            written, skipped = import_kerning(font, rows, clear=REPLACE_KERNING)
+    except ValueError as e:
+        Message(title="Import Kerning", message=str(e))
+        return
+    finally:
+        font.enableUpdateInterface()
+
+    message = "%i pairs imported, %i skipped." % (written, skipped)
+    print(message)
+    Glyphs.showNotification("Import Kerning", message)
+
+
+if Glyphs.font:
+    main()
@@ -0,0 +1,30 @@
+# MenuTitle: Predict GPOS Kerning Overflow
+# -*- coding: utf-8 -*-
+__doc__ = """
+Estimates the size of the kern lookup and its PairPos subtables for every master, without exporting. Warns about 16-bit offset overflows and suggests group merges or exceptions to review. Optionally checks again every time a font is saved."""
+
+from GlyphsApp import Glyphs, DOCUMENTWASSAVED
+from oprCore import check_kerning_overflow_on_save, overflow_report
+
+# Largest kerning difference allowed for suggested group merges (needs NumPy)
+MERGE_TOLERANCE = 5
+# Also run the check (silently unless something overflows) after every save
+CHECK_ON_SAVE = False
+
+font = Glyphs.font
+if not font:
+    raise Exception("No font open.")
+
+Glyphs.clearLog()
+Glyphs.showMacroWindow()
+print("✅ GPOS Kerning Overflow Prediction")
+print("\n".join(overflow_report(font, tolerance=MERGE_TOLERANCE)))
+
+if CHECK_ON_SAVE:
+    # remove first so running the script twice does not register it twice
+    try:
+        Glyphs.removeCallback(check_kerning_overflow_on_save)
+    except Exception:
+        pass
+    Glyphs.addCallback(check_kerning_overflow_on_save, DOCUMENTWASSAVED)
+    print("\nThe overflow check now also runs after every save.")
@@ -0,0 +1,82 @@
+# MenuTitle: Prune Redundant Kerning
+# -*- coding: utf-8 -*-
+__doc__ = """
+Finds kerning pairs that change nothing: exceptions with the same value their class pair would give anyway, pairs that are always overridden, and pairs on empty groups or missing glyphs. Only pairs that are redundant in every master are reported, so interpolation stays the same. Set REMOVE_PAIRS to delete them. The GPOS bytes saved are measured with fontTools, if available."""
+
+from GlyphsApp import Glyphs
+from oprCore import (
+    GPOSSizeMeter,
+    fonttools_available,
+    kerning_index_for_font,
+    prune_changes,
+    removable_pairs,
+)
+
+# False only lists the redundant pairs, True removes them from all masters
+REMOVE_PAIRS = False
+REPORT_LIMIT = 200
+
+
+def prune_redundant_kerning(font):
+    kerningIndex = kerning_index_for_font(font)
+    removable = removable_pairs(font)
+
+    Glyphs.clearLog()
+    Glyphs.showMacroWindow()
+    print("✅ Prune Redundant Kerning Report")
+
+    if not removable:
+        print("  No redundant pairs found.")
+        return
+
+    reasons = {}
+    for (left, right), reason in sorted(removable.items()):
+        reasons[reason] = reasons.get(reason, 0) + 1
+        if sum(reasons.values()) <= REPORT_LIMIT:
+            print(f"  {kerningIndex.display_name(left)} {kerningIndex.display_name(right)}: {reason}")
+    if len(removable) > REPORT_LIMIT:
+        print(f"  ... {len(removable) - REPORT_LIMIT} more")
+    for reason, count in sorted(reasons.items()):
+        print(f"  {count} pairs: {reason}")
+
+    if fonttools_available():
+        meter = GPOSSizeMeter(font)
+        # the meter keys glyph sides by name, classes stay as they are;
+        # pairs on missing glyphs never reach GPOS, so they are left out here
+        # just like master_pairs() leaves them out of the measured kerning
+        nameForId = kerningIndex.name_for_id
+
+        def measuredKey(key):
+            return key if kerningIndex.is_group_key(key) else nameForId.get(key)
+
+        removedNames = set()
+        for left, right in removable:
+            pair = (measuredKey(left), measuredKey(right))
+            if None not in pair:
+                removedNames.add(pair)
+        beforeSize = 0
+        afterSize = 0
+        for master in font.masters:
+            pairs = meter.master_pairs(master.id)
+            before = meter.size_for_pairs(pairs)
+            after = meter.size_for_pairs(dict((pair, value) for pair, value in pairs.items() if pair not in removedNames))
+            print(f"  GPOS {master.name}: {before} → {after} bytes")
+            beforeSize += before
+            afterSize += after
+        print(f"  Measured savings: {beforeSize - afterSize} bytes of {beforeSize}")
+
+    if REMOVE_PAIRS:
+        changes = prune_changes(font, removable)
+        _, removedCount = changes.apply()
+        print(f"  Removed {removedCount} pairs from all masters.")
+    else:
+        print("  Nothing removed. Set REMOVE_PAIRS = True to delete these pairs.")
+
+
+font = Glyphs.font
+if font:
+    font.disableUpdateInterface()
+    try:
+        prune_redundant_kerning(font)
+    finally:
+        font.enableUpdateInterface()
@@ -4,15 +4,29 @@ from __future__ import division, print_function, unicode_literals
 
 __doc__ = """
 Finds unnecessary kernings and groupings, and opens all questionable pairs in
-new tabs for active master. Expands group sides to key glyphs.
+new tabs for active master. Expands group sides to key glyphs. Extra rules are
+read from a kerning-rules.json file next to the .glyphs file, if present.
 """
 
+import os
+
 from GlyphsApp import Glyphs
+from oprCore import (
+    KerningResolver,
+    classify_snapshot,
+    compile_rules,
+    kerning_index_for_font,
+    kerning_snapshot,
+    load_rules_file,
+    merge_rules,
+)
 
 thisFont = Glyphs.font  # frontmost font
 if not thisFont:
     raise Exception("No frontmost font. Open a font and try again.")
 
+kerningIndex = kerning_index_for_font(thisFont)
+
 # --- config from your original ------------------------------------------------
 
 extensionsWithoutKerning = (".tf", ".tosf")
@@ -26,13 +40,6 @@ noKerningToTheRight = (
 )
 
 extensionsUnlikelyToBeKerned = ("comb",)
-glyphNamesWithExtensionsNotToBeKerned = []
-for extension in extensionsWithoutKerning:
-    extensionNames = [
-        g.name for g in thisFont.glyphs
-        if extension in g.name and not g.name.startswith(extension)
-    ]
-    glyphNamesWithExtensionsNotToBeKerned += extensionNames
 
 unlikelyToBeKerned = (
     "notequal","brokenbar","divide","yen","radical","dollar","currency","asciitilde",
@@ -44,61 +51,52 @@ unlikelyToBeKerned = (
     "literSign","equal","logicalnot","micro","paragraph","plus",".notdef","published",
     "at","minus","rightArrow",
 )
-dontKernThese = unlikelyToBeKerned + tuple(glyphNamesWithExtensionsNotToBeKerned)
 
-leftGroupsToBeChecked = [
-    g.leftKerningGroup for g in thisFont.glyphs
-    if g.leftKerningGroup and g.name in dontKernThese
-]
-rightGroupsToBeChecked = [
-    g.rightKerningGroup for g in thisFont.glyphs
-    if g.rightKerningGroup and g.name in dontKernThese
-]
+# Optional JSON rule file next to the font, same keys as the rules below
+RULES_FILE_NAME = "kerning-rules.json"
+# Worker processes for classifying masters; only usable outside Glyphs
+PARALLEL_WORKERS = 0
+
+rules = {
+    "noKerningToTheLeft": noKerningToTheLeft,
+    "noKerningToTheRight": noKerningToTheRight,
+    "unlikelyToBeKerned": unlikelyToBeKerned,
+    "extensionsWithoutKerning": extensionsWithoutKerning,
+}
+extraRulesPath = None
+if thisFont.filepath:
+    rulesPath = os.path.join(os.path.dirname(thisFont.filepath), RULES_FILE_NAME)
+    if os.path.exists(rulesPath):
+        rules = merge_rules(rules, load_rules_file(rulesPath))
+        extraRulesPath = rulesPath
+
+compiledRules = compile_rules(rules, kerningIndex)
 
 # --- helpers ------------------------------------------------------------------
 
-def safeGlyphByName(name):
-    try:
-        return thisFont.glyphs[name]
-    except Exception:
-        return None
-
 def glyphNameFromId(gid):
-    g = thisFont.glyphForId_(gid)
-    return g.name if g else None
+    return kerningIndex.glyph_name(gid)
 
 def groupKeyGlyphName(groupName):
     # groupName like "@MMK_L_A" or "@MMK_R_n"
-    # Find the glyph whose kerning group equals the groupName’s suffix
     if not groupName or groupName[0] != "@":
         return None
-    try:
-        isLeft = groupName.startswith("@MMK_L_")
-        key = groupName.split("_", 2)[-1]  # suffix after @MMK_L_ / @MMK_R_
-        for g in thisFont.glyphs:
-            if isLeft and g.leftKerningGroup == key:
-                return g.name
-            if (not isLeft) and g.rightKerningGroup == key:
-                return g.name
-    except Exception:
-        pass
-    return None
+    return kerningIndex.key_glyph(groupName)
 
 def humanReadableName(side):
-    if not side:
-        return "???"
-    if side[0] == "@":
-        return "@%s" % side[7:]
-    name = glyphNameFromId(side)
-    return name or side
-
-def reportBadKernPair(leftSide, rightSide, kernValue):
-    print("  Questionable pair: %s -- %s (%i)" % (
-        humanReadableName(leftSide), humanReadableName(rightSide), kernValue
+    return kerningIndex.display_name(side)
+
+def reportBadKernPair(leftSide, rightSide, kernValue, reason):
+    print("  Questionable pair: %s -- %s (%i): %s" % (
+        humanReadableName(leftSide), humanReadableName(rightSide), kernValue, reason
     ))
 
-def makeConcretePairString(leftSide, rightSide):
-    # Accept glyph id or group. Convert to glyph names using key glyphs for groups.
+def makeConcretePairString(leftSide, rightSide, resolver=None):
+    # Accept glyph id or group. Prefer a glyph pair that really gets this
+    # pair's value in the master; fall back to key glyphs for groups.
+    if resolver:
+        pair = resolver.example_glyph_pair(leftSide, rightSide)
+        return "/%s/%s" % pair if pair else None
     if leftSide and leftSide[0] == "@":
         leftName = groupKeyGlyphName(leftSide)
     else:
@@ -143,51 +141,22 @@ Glyphs.clearLog()
 Glyphs.showMacroWindow()
 
 print("PROBLEMS WITH KERN PAIRS:")
+if extraRulesPath:
+    print("  (with extra rules from %s)" % extraRulesPath)
+
+# one pass per master over a plain copy of the kerning
+findingsByMaster = classify_snapshot(compiledRules, kerning_snapshot(thisFont), workers=PARALLEL_WORKERS)
 
 for masterIndex, master in enumerate(thisFont.masters):
     print("\n  MASTER: %s" % master.name)
-    kerning = thisFont.kerning.get(master.id, {})
+    resolver = KerningResolver(thisFont, master.id, index=kerningIndex)
     pairsForTab = []
 
-    # Left: specific glyphs that shouldn't be on left
-    leftBlock = noKerningToTheRight + unlikelyToBeKerned + tuple(glyphNamesWithExtensionsNotToBeKerned)
-    for leftGlyphName in leftBlock:
-        gLeft = safeGlyphByName(leftGlyphName)
-        if not gLeft:
-            continue
-        leftID = gLeft.id
-        rightDict = kerning.get(leftID, {})
-        for rightSide, value in rightDict.items():
-            reportBadKernPair(leftID, rightSide, value)
-            pairStr = makeConcretePairString(leftID, rightSide)
-            if pairStr:
-                pairsForTab.append(pairStr)
-
-    # Right: specific glyphs that shouldn't be on right, and flagged groups
-    shouldntRight = noKerningToTheLeft + unlikelyToBeKerned + tuple(glyphNamesWithExtensionsNotToBeKerned)
-    for leftSide, rightDict in kerning.items():
-        for rightSide, value in rightDict.items():
-            if rightSide and rightSide[0] != "@":
-                rg = thisFont.glyphForId_(rightSide)
-                if rg and rg.name in shouldntRight:
-                    reportBadKernPair(leftSide, rightSide, value)
-                    pairStr = makeConcretePairString(leftSide, rightSide)
-                    if pairStr:
-                        pairsForTab.append(pairStr)
-            elif rightSide and rightSide.replace("@MMK_R_", "@") in leftGroupsToBeChecked:
-                reportBadKernPair(leftSide, rightSide, value)
-                pairStr = makeConcretePairString(leftSide, rightSide)
-                if pairStr:
-                    pairsForTab.append(pairStr)
-
-    # Left groups corresponding to questionable right groups
-    for leftGroup in ["@MMK_L_%s" % group for group in rightGroupsToBeChecked]:
-        rightDict = kerning.get(leftGroup, {})
-        for rightSide, value in rightDict.items():
-            reportBadKernPair(leftGroup, rightSide, value)
-            pairStr = makeConcretePairString(leftGroup, rightSide)
-            if pairStr:
-                pairsForTab.append(pairStr)
+    for leftSide, rightSide, value, reason in findingsByMaster.get(master.id, []):
+        reportBadKernPair(leftSide, rightSide, value, reason)
+        pairStr = makeConcretePairString(leftSide, rightSide, resolver)
+        if pairStr:
+            pairsForTab.append(pairStr)
 
     openPairsInTabs(pairsForTab, masterIndex)
 
@@ -5,11 +5,13 @@ __doc__ = """
 Rounds all kerning values to units of 5.
 Kerning pairs smaller than the chosen minimum absolute value are deleted.
 Cleans broken pairs. Updated and fixed for Glyphs 3.
+Optionally only visits pairs added or edited since the last run.
 """
 
 from GlyphsApp import Glyphs
-from vanilla import Window, TextBox, EditText, Button
+from vanilla import Window, TextBox, EditText, Button, CheckBox
 from AppKit import NSAlert
+from oprCore import KerningChangeSet, KerningJournal
 
 ROUND_BASE = 5  # Round kerning to nearest 5 units
 
@@ -26,15 +28,23 @@ def myround(x, base=5):
     return int(base * round(float(x) / base))
 
 
+def allPairs(kerningDict):
+    for leftKey, rightDict in kerningDict.items():
+        for rightKey, value in rightDict.items():
+            yield leftKey, rightKey, value
+
+
 class RoundKerningDialog:
     def __init__(self):
-        self.w = Window((300, 100), "Round Kerning to 5")
+        self.w = Window((300, 150), "Round Kerning to 5")
 
         self.w.text = TextBox((15, 12, -15, 20), "Remove pairs smaller than:")
         self.w.minValue = EditText((200, 10, -15, 22), "2")
+        self.w.dryRun = CheckBox((15, 45, -15, 20), "Dry run (only list changes)", value=False)
+        self.w.onlyChanged = CheckBox((15, 70, -15, 20), "Only pairs changed since last run", value=False)
 
         self.w.runButton = Button(
-            (15, 60, -15, 30), "Round Kerning", callback=self.roundKerning
+            (15, 110, -15, 30), "Round Kerning", callback=self.roundKerning
         )
 
         self.w.open()
@@ -53,80 +63,56 @@ class RoundKerningDialog:
             alert("No font open.")
             return
 
-        printString = ""
-        totalChanges = 0
-        totalRemoved = 0
+        dryRun = self.w.dryRun.get()
+        changes = KerningChangeSet(font)
+        journal = KerningJournal(font, "round-kerning", {"base": ROUND_BASE, "minimum": minValue})
+        onlyChanged = self.w.onlyChanged.get() and journal.is_available()
+        incremental = onlyChanged and journal.is_current()
+        if self.w.onlyChanged.get() and not onlyChanged:
+            print("Save the font to keep track of changed pairs, processing all pairs.")
+        elif onlyChanged and not incremental:
+            print("No matching last run (or groups changed), processing all pairs.")
 
         for master in font.masters:
             mid = master.id
-            toRemove = []
-
-            kerningDict = font.kerning.get(mid, {})
-
-            for leftKey, rightDict in dict(kerningDict).items():
-
-                # ----- Resolve left side -----
-                if isinstance(leftKey, str):  # class or glyph name
-                    if leftKey.startswith("@"):
-                        leftOK = True
-                        leftName = leftKey
-                    else:
-                        leftOK = font.glyphs[leftKey] is not None
-                        leftName = leftKey
-                else:  # glyph ID
-                    g = font.glyphForId_(leftKey)
-                    leftOK = g is not None
-                    leftName = g.name if g else f"[missing:{leftKey}]"
-
-                for rightKey, value in dict(rightDict).items():
-
-                    # ----- Resolve right side -----
-                    if isinstance(rightKey, str):
-                        if rightKey.startswith("@"):
-                            rightOK = True
-                            rightName = rightKey
-                        else:
-                            rightOK = font.glyphs[rightKey] is not None
-                            rightName = rightKey
-                    else:
-                        g = font.glyphForId_(rightKey)
-                        rightOK = g is not None
-                        rightName = g.name if g else f"[missing:{rightKey}]"
-
-                    # ----- Remove broken pairs -----
-                    if not (leftOK and rightOK):
-                        toRemove.append((leftKey, rightKey, value))
-                        continue
-
-                    # ----- Remove small values -----
-                    if abs(value) < minValue:
-                        toRemove.append((leftKey, rightKey, value))
-                        continue
-
-                    # ----- Round + apply -----
-                    newValue = myround(value, ROUND_BASE)
-                    if newValue != value:
-                        try:
-                            font.setKerningForPair(mid, leftKey, rightKey, newValue)
-                            printString += f"{newValue}\t{master.name}: {leftName}, {rightName}  (was {value})\n"
-                            totalChanges += 1
-                        except KeyError:
-                            # Catch leftover UUID kerning
-                            toRemove.append((leftKey, rightKey, value))
-                            continue
-
-            # ----- Remove all scheduled pairs -----
-            for leftKey, rightKey, oldValue in toRemove:
-                try:
-                    font.removeKerningForPair(mid, leftKey, rightKey)
-                    totalRemoved += 1
-                    printString += f"0\t{master.name}: {leftKey}, {rightKey}  (removed {oldValue})\n"
-                except Exception:
-                    pass
+            if incremental:
+                pairs = journal.changed_pairs(mid)
+            else:
+                pairs = allPairs(font.kerning.get(mid, {}))
+
+            for leftKey, rightKey, value in pairs:
+                # ----- Remove broken pairs -----
+                if not (changes.is_valid_key(leftKey, "left") and changes.is_valid_key(rightKey, "right")):
+                    changes.remove_raw(mid, leftKey, rightKey)
+                    continue
+
+                # ----- Remove small values -----
+                if abs(value) < minValue:
+                    changes.remove(mid, leftKey, rightKey)
+                    continue
+
+                # ----- Round -----
+                newValue = myround(value, ROUND_BASE)
+                if newValue != value:
+                    changes.set(mid, leftKey, rightKey, newValue)
 
         # Print summary
-        if printString:
-            print(printString)
+        preview = list(changes.preview())
+        if preview:
+            print("\n".join(preview))
+
+        if dryRun:
+            Glyphs.showMacroWindow()
+            Glyphs.showNotification(
+                "Kerning Round Preview",
+                f"{len(preview)} pairs would change. See Macro Window.",
+            )
+            return
+
+        # ----- Apply all masters in one batch -----
+        totalChanges, totalRemoved = changes.apply()
+        if onlyChanged:
+            journal.record()
 
         Glyphs.showNotification(
             "Kerning Rounded",
@@ -3,98 +3,64 @@
 __doc__="""
 Show Kerning Pairs for this glyph in a new tab.
 """
-import GlyphsApp
-import traceback
+from GlyphsApp import Glyphs, GSControlLayer
+from oprCore import kerning_adjacency_for_font, kerning_index_for_font
+
+# Show the pairs of every master in one tab, each pair drawn in its own master
+ALL_MASTERS = False
 
 thisFont = Glyphs.font
-Doc = Glyphs.currentDocument
 selectedLayers = thisFont.selectedLayers
 selectedMaster = thisFont.selectedFontMaster
-masterID = selectedMaster.id
-
-leftGroups = {}
-rightGroups = {}
-for g in thisFont.glyphs:
-	if g.rightKerningGroup:
-		group_name = g.rightKerningGroupId()
-		try:
-			leftGroups[group_name].append(g.name)
-		except:
-			leftGroups[group_name] = [g.name]
-
-	if g.leftKerningGroup:
-		group_name = g.leftKerningGroupId()
-		try:
-			rightGroups[group_name].append(g.name)
-		except:
-			rightGroups[group_name] = [g.name]
-
-def nameMaker(kernGlyphOrGroup, side):
-	# if this is a kerning group
-	if kernGlyphOrGroup[0] == "@":
-		# right glyph, left kerning group
-		if side == "right":
-			try:
-				# return rightGroups[kernGlyphOrGroup][0]
-				return sorted(rightGroups[kernGlyphOrGroup], key=len)[0]
-			except:
-				pass
-		elif side == "left":
-			# left glyph, right kerning group
-			try:
-				# return leftGroups[kernGlyphOrGroup][0]
-				return sorted(leftGroups[kernGlyphOrGroup], key=len)[0]
-			except:
-				pass
-	else:
-		return thisFont.glyphForId_(kernGlyphOrGroup).name
-
-editStringsL = []
-editStringsR = []
+kerningIndex = kerning_index_for_font(thisFont)
+fontOrder = dict((name, i) for i, name in enumerate(kerningIndex.glyph_names))
 
+selectedNames = []
 for thisLayer in selectedLayers:
-	thisGlyph = thisLayer.parent
-	thisGlyphName = thisGlyph.name
-	rGroupName = str(thisGlyph.rightKerningGroup)
-	lGroupName = str(thisGlyph.leftKerningGroup)
-
-	# print "\t", rGroupName, lGroupName
-
-	kernPairListL = []
-	kernPairListSortedL = []
-	kernPairListR = []
-	kernPairListSortedR = []
-
-	for L in thisFont.kerning[ masterID ].keys():
-		try:
-			# if the this kerning-pair's left glyph matches rGroupName (right side kerning group of thisGlyph)
-			if rGroupName == L[7:] or rGroupName == thisFont.glyphForId_(L).name or thisFont.glyphForId_(L).name == thisGlyph.name:
-				# for every R counterpart to L in the kerning pairs of rGroupName
-				for R in thisFont.kerning[masterID][L].keys():
-					if thisFont.kerning[masterID][L][R] != 0:
-						kernPairListL += [nameMaker(R, "right")]
-		except:
-			# print traceback.format_exc()
-			pass
-
-		for R in thisFont.kerning[masterID][L].keys():
-			try:
-				# if the R counterpart (class glyph) of L glyph is the selectedGlyph
-				if lGroupName == R[7:] or lGroupName == thisFont.glyphForId_(R).name or thisFont.glyphForId_(R).name == thisGlyph.name:
-					if thisFont.kerning[masterID][L][R] != 0:
-						kernPairListR += [nameMaker(L, "left")]
-			except:
-				pass
-
-	kernPairListSortedL = [g.name for g in Font.glyphs if g.name in kernPairListL]
-	for everyGlyph in kernPairListSortedL:
-		editStringsL.append("/%s/%s" % (thisGlyphName, everyGlyph))
-
-	kernPairListSortedR = [g.name for g in Font.glyphs if g.name in kernPairListR]
-	for everyGlyph in kernPairListSortedR:
-		editStringsR.append("/%s/%s" % (everyGlyph, thisGlyphName))
+	thisGlyphName = thisLayer.parent.name
+	if thisGlyphName not in selectedNames:
+		selectedNames.append(thisGlyphName)
 
+def partnerNames(pairs, partnerSide, kerning):
+	# partner keys of non-zero pairs, groups expanded to their key glyph, in font order;
+	# values are read from the font, the kept adjacency only knows which pairs exist
+	names = set()
+	for leftKey, rightKey, value in pairs:
+		if not (kerning.get(leftKey) or {}).get(rightKey):
+			continue
+		name = kerningIndex.key_glyph(rightKey if partnerSide == "right" else leftKey)
+		if name:
+			names.add(name)
+	return sorted(names, key=fontOrder.get)
 
-editString = "\n".join(editStringsL) + "\n\n" + "\n".join(editStringsR)
+def kernPairsForMaster(masterID):
+	# kept across runs and updated by batched kerning edits
+	adjacency = kerning_adjacency_for_font(thisFont, masterID, index=kerningIndex)
+	kerning = thisFont.kerning.get(masterID) or {}
+	pairsL = []
+	pairsR = []
+	for thisGlyphName in selectedNames:
+		for otherName in partnerNames(adjacency.pairs_with_glyph_on_left(thisGlyphName), "right", kerning):
+			pairsL.append((thisGlyphName, otherName))
+		for otherName in partnerNames(adjacency.pairs_with_glyph_on_right(thisGlyphName), "left", kerning):
+			pairsR.append((otherName, thisGlyphName))
+	return pairsL, pairsR
 
-thisFont.newTab(editString)
\ No newline at end of file
+if not ALL_MASTERS:
+	pairsL, pairsR = kernPairsForMaster(selectedMaster.id)
+	editStringsL = ["/%s/%s" % pair for pair in pairsL]
+	editStringsR = ["/%s/%s" % pair for pair in pairsR]
+	editString = "\n".join(editStringsL) + "\n\n" + "\n".join(editStringsR)
+	thisFont.newTab(editString)
+else:
+	tabLayers = []
+	for master in thisFont.masters:
+		pairsL, pairsR = kernPairsForMaster(master.id)
+		for pairs in (pairsL, pairsR):
+			for leftName, rightName in pairs:
+				tabLayers.append(thisFont.glyphs[leftName].layers[master.id])
+				tabLayers.append(thisFont.glyphs[rightName].layers[master.id])
+				tabLayers.append(GSControlLayer.newline())
+			tabLayers.append(GSControlLayer.newline())
+	tab = thisFont.newTab()
+	tab.layers = tabLayers
@@ -4,15 +4,22 @@
 __doc__ = """
 Export unlicensed trial fonts for all active non-variable instances.
 Uses the OPR unlicensed naming scheme together with Hugo Jourdan's GUI/export flow.
+Can also derive the trials from already exported release files by subsetting them,
+which leaves the font untouched and takes seconds instead of a full export.
+WOFF and WOFF2 trials always have TrueType outlines, whether exported on their own
+or derived from the TTF in "All formats" mode.
 """
 
+import os
 import re
+import shutil
+import tempfile
+import time
 import unicodedata
 
 from vanilla import FloatingWindow, TextBox, TextEditor, PopUpButton, Button
 from GlyphsApp import (
 	Glyphs,
-	GSFeature,
 	GetFolder,
 	Message,
 	PLAIN,
@@ -22,6 +29,21 @@ from GlyphsApp import (
 	WOFF2,
 	INSTANCETYPEVARIABLE,
 )
+from oprCore import (
+	ExportCache,
+	FingerprintContext,
+	FontStateSnapshot,
+	cache_folder_for_font,
+	derive_trials,
+	derive_webfonts,
+	fonttools_available,
+	instance_fingerprint,
+	release_fonts_by_postscript_name,
+	restore_interrupted_export,
+	trial_job,
+	webfont_job,
+	woff2_available,
+)
 
 
 DEFAULT_GLYPHSET = (
@@ -31,6 +53,19 @@ DEFAULT_GLYPHSET = (
 	"parenleft, parenright, exclam, question, at, ampersand, .notdef"
 )
 
+TRIAL_SOURCES = ["Generate from font", "Subset release files"]
+FORMAT_EXTENSIONS = {TTF: ".ttf", OTF: ".otf", WOFF: ".woff", WOFF2: ".woff2"}
+# Worker processes for subsetting release files; only usable outside Glyphs
+SUBSET_WORKERS = 0
+# Reuse the previous binary of instances whose masters, kerning, features, names and format are unchanged
+USE_EXPORT_CACHE = True
+ALL_FORMATS = "All formats"
+# Formats compiled in "All formats" mode; WOFF and WOFF2 are derived from WEB_BASE_FORMAT
+MULTI_FORMAT_BASES = [TTF, OTF]
+WEB_BASE_FORMAT = TTF
+# Threads compressing WOFF/WOFF2 in "All formats" mode
+WEBFONT_WORKERS = 4
+
 
 def sanitize_name(value, for_folder=False, keep_spaces=False):
 	"""Normalize a string for filenames, PostScript names, or export folders."""
@@ -99,6 +134,64 @@ def parse_glyph_names(text_value):
 	return [item.strip() for item in text_value.split(",") if item.strip()]
 
 
+def unlicensed_names(sourceInstance, fallbackFamilyName):
+	"""Base family, trial family, style, full name, file name and export folder of a trial."""
+	baseFamily = clean_family_name(get_effective_family_name(sourceInstance, fallbackFamilyName))
+	trialFamily = "%s UNLICENSED TRIAL" % baseFamily
+	styleName = sourceInstance.name or ""
+	fullName = ("%s %s" % (trialFamily, styleName)).strip()
+	fileNameParts = [sanitize_folder_family_name(baseFamily)]
+	sanitizedStyleName = sanitize_style_name(styleName)
+	if sanitizedStyleName:
+		fileNameParts.append(sanitizedStyleName)
+	fileNameParts.append("UNLICENSED-TRIAL")
+	fileName = "-".join(fileNameParts)
+	exportFolder = "%s-UNLICENSED-TRIALS" % sanitize_folder_family_name(baseFamily)
+	return baseFamily, trialFamily, styleName, fullName, fileName, exportFolder
+
+
+def trial_source_instances(font):
+	"""Active, non-variable instances that are not unlicensed trials themselves."""
+	try:
+		return [
+			instance
+			for instance in font.instances
+			if instance.active
+			and instance.type != INSTANCETYPEVARIABLE
+			and not is_unlicensed_instance(instance, font.familyName)
+		]
+	except Exception:
+		return [
+			instance
+			for instance in font.instances
+			if instance.active and not is_unlicensed_instance(instance, font.familyName)
+		]
+
+
+def move_files(sourceFolder, destinationFolder):
+	"""Move all files below sourceFolder to the same relative paths below destinationFolder."""
+	paths = []
+	for root, folders, files in os.walk(sourceFolder):
+		for fileName in files:
+			target = os.path.join(destinationFolder, os.path.relpath(os.path.join(root, fileName), sourceFolder))
+			if not os.path.isdir(os.path.dirname(target)):
+				os.makedirs(os.path.dirname(target))
+			shutil.move(os.path.join(root, fileName), target)
+			paths.append(target)
+	return paths
+
+
+def restore_interrupted_trial_export(font):
+	"""Roll back the font state left by an export that crashed or was force-quit."""
+	counts = restore_interrupted_export(font)
+	if counts:
+		print(
+			"ℹ️ Restored the state of an interrupted trial export: "
+			"%(exports)i export flags, %(features)i features, %(classes)i classes, %(instances)i instances" % counts
+		)
+	return counts
+
+
 def remove_custom_parameters(instance, parameter_names):
 	"""Remove inherited custom parameters so the trial export can force new values."""
 	targets = {name.lower() for name in parameter_names}
@@ -144,7 +237,7 @@ class ExportUnlicensedTrials(object):
 		linePos += lineHeight
 
 		self.w.text = TextBox((inset, linePos, -inset, 40), "Export format:", sizeStyle="small")
-		items = [TTF, OTF, WOFF, WOFF2]
+		items = [TTF, OTF, WOFF, WOFF2, ALL_FORMATS]
 		self.w.popUpButton = PopUpButton(
 			(inset + 85, linePos - 2, -inset - 220, 17),
 			items,
@@ -156,6 +249,15 @@ class ExportUnlicensedTrials(object):
 		if selectedItem in items:
 			self.w.popUpButton.setItem(selectedItem)
 
+		self.w.sourceText = TextBox((inset + 190, linePos, 50, 17), "Source:", sizeStyle="small")
+		self.w.sourcePopUp = PopUpButton(
+			(inset + 240, linePos - 2, -inset, 17),
+			TRIAL_SOURCES,
+			sizeStyle="small",
+			callback=self.sourceCallback,
+		)
+		self.w.sourcePopUp.set(int(Glyphs.defaults[self.defaultsPrefix + "trialSource"] or 0))
+
 		linePos += lineHeight
 		self.w.buttonFolder = Button(
 			(inset, linePos, -inset - 188, 20),
@@ -182,6 +284,8 @@ class ExportUnlicensedTrials(object):
 			"glyphset": DEFAULT_GLYPHSET,
 			"selectedFormat": TTF,
 			"saveFolder": None,
+			"trialSource": 0,
+			"releaseFolder": None,
 		}
 		for key, value in defaults.items():
 			fullKey = self.defaultsPrefix + key
@@ -199,6 +303,9 @@ class ExportUnlicensedTrials(object):
 	def exportFormatCallback(self, sender):
 		Glyphs.defaults[self.defaultsPrefix + "selectedFormat"] = self.w.popUpButton.getItem()
 
+	def sourceCallback(self, sender):
+		Glyphs.defaults[self.defaultsPrefix + "trialSource"] = sender.get()
+
 	def buttonFolderCallback(self, sender):
 		saveFolder = GetFolder(message="Select save location", allowsMultipleSelection=False, path=None)
 		if saveFolder:
@@ -208,16 +315,9 @@ class ExportUnlicensedTrials(object):
 			self.w.buttonGenerate.enable(False)
 
 	def build_unlicensed_instance(self, sourceInstance, fallbackFamilyName):
-		baseFamily = clean_family_name(get_effective_family_name(sourceInstance, fallbackFamilyName))
-		trialFamily = "%s UNLICENSED TRIAL" % baseFamily
-		styleName = sourceInstance.name or ""
-		fullName = ("%s %s" % (trialFamily, styleName)).strip()
-		fileNameParts = [sanitize_folder_family_name(baseFamily)]
-		sanitizedStyleName = sanitize_style_name(styleName)
-		if sanitizedStyleName:
-			fileNameParts.append(sanitizedStyleName)
-		fileNameParts.append("UNLICENSED-TRIAL")
-		fileName = "-".join(fileNameParts)
+		baseFamily, trialFamily, styleName, fullName, fileName, exportFolder = unlicensed_names(
+			sourceInstance, fallbackFamilyName
+		)
 
 		newInstance = sourceInstance.copy()
 		remove_custom_parameters(
@@ -234,7 +334,7 @@ class ExportUnlicensedTrials(object):
 		newInstance.setProperty_value_languageTag_("postscriptFullNames", fullName, None)
 		newInstance.fontName = fileName
 		newInstance.customParameters["fileName"] = fileName
-		newInstance.customParameters["Export Folder"] = "%s-UNLICENSED-TRIALS" % sanitize_folder_family_name(baseFamily)
+		newInstance.customParameters["Export Folder"] = exportFolder
 		try:
 			newInstance.visible = False
 		except Exception:
@@ -257,51 +357,46 @@ class ExportUnlicensedTrials(object):
 			print("No font open.")
 			return
 
+		if self.w.sourcePopUp.get() == 1:
+			self.deriveFromReleaseFiles(font, saveFolder)
+			return
+
+		restore_interrupted_trial_export(font)
+		# persisted next to the .glyphs file until restored, see restore_interrupted_trial_export();
+		# captured before the UI is disabled, so a failed sidecar write leaves nothing to undo
+		snapshot = FontStateSnapshot(font).capture()
+		exportCache = None
 		font.disableUpdateInterface()
-		temporaryInstances = []
-		featureBackup = {}
-		classBackup = {}
-		exportedGlyphsBackup = []
 		try:
 			print("Save location : %s" % saveFolder)
-			selectedGlyphNames = parse_glyph_names(self.w.textEditor.get())
+			selectedGlyphNames = set(parse_glyph_names(self.w.textEditor.get()))
 			fontFormat = self.w.popUpButton.getItem()
 
-			for glyph in font.glyphs:
-				if glyph.export:
-					exportedGlyphsBackup.append(glyph.name)
-
 			for glyphClass in font.classes:
-				classBackup[glyphClass.name] = glyphClass.active
-				glyphClass.active = False
-
-			for feature in font.features:
-				featureBackup[feature.name] = (feature.code, feature.automatic)
+				if glyphClass.active:
+					glyphClass.active = False
 
 			for glyph in font.glyphs:
-				glyph.export = glyph.name in selectedGlyphNames
+				export = glyph.name in selectedGlyphNames
+				if glyph.export != export:
+					glyph.export = export
 
-			while len(font.features) > 0:
-				del font.features[0]
+			# manual features may reference glyphs the trial leaves out; switching
+			# them off keeps them in place, so restoring only flips the flags back
+			for feature in font.features:
+				if not feature.automatic and feature.active:
+					feature.active = False
 			font.updateFeatures()
 
-			if fontFormat in (TTF, OTF):
-				fontFormat = PLAIN
+			baseFormats = MULTI_FORMAT_BASES if fontFormat == ALL_FORMATS else [fontFormat]
+			webFlavors = self.webFlavors() if fontFormat == ALL_FORMATS else []
+			webJobs = []
+			report = []
 
-			try:
-				originals = [
-					instance
-					for instance in font.instances
-					if instance.active
-					and instance.type != INSTANCETYPEVARIABLE
-					and not is_unlicensed_instance(instance, font.familyName)
-				]
-			except Exception:
-				originals = [
-					instance
-					for instance in font.instances
-					if instance.active and not is_unlicensed_instance(instance, font.familyName)
-				]
+			originals = trial_source_instances(font)
+			# fingerprints see the trial glyphset and features set up above
+			exportCache = ExportCache(cache_folder_for_font(font)) if USE_EXPORT_CACHE else None
+			fingerprints = FingerprintContext(font)
 
 			print(
 				"════════════════════════════════════════════════════════\n"
@@ -333,52 +428,165 @@ class ExportUnlicensedTrials(object):
 					)
 				else:
 					font.instances.append(tempInstance)
-					temporaryInstances.append(tempInstance)
+					snapshot.add_temporary_instance(tempInstance)
 					exportInstance = tempInstance
 
-				exportStatement = exportInstance.generate(FontPath=saveFolder, Containers=[fontFormat])
-				if exportStatement is not True:
-					print(exportStatement)
-					print(
-						"⚠️ %s %s not generated correctly\n"
-						"⚠️ (Export it with Cmd+E to access export report)\n"
-						"--------------------------------------------------------"
-						% (trialFamily, styleName)
-					)
-				else:
-					print(
-						"✅ %s %s generated\n"
-						"--------------------------------------------------------"
-						% (trialFamily, styleName)
+				for baseFormat in baseFormats:
+					start = time.time()
+					exportStatement, paths = self.generateInstance(
+						exportInstance, saveFolder, baseFormat, exportCache, fingerprints
 					)
-
-			print("Restoring initial instances... (it can last a minute)")
+					seconds = time.time() - start
+					report.extend((styleName, baseFormat, exportStatement, seconds, path) for path in paths)
+					if not paths:
+						# failed compiles write nothing, but still belong in the report
+						error = exportStatement if exportStatement is not True else "no files written"
+						report.append((styleName, baseFormat, error, seconds, ""))
+					if exportStatement == "reused":
+						print(
+							"⏩ %s %s (%s) unchanged, reused previous export\n"
+							"--------------------------------------------------------"
+							% (trialFamily, styleName, baseFormat)
+						)
+					elif exportStatement is not True:
+						print(exportStatement)
+						print(
+							"⚠️ %s %s (%s) not generated correctly\n"
+							"⚠️ (Export it with Cmd+E to access export report)\n"
+							"--------------------------------------------------------"
+							% (trialFamily, styleName, baseFormat)
+						)
+						continue
+					else:
+						print(
+							"✅ %s %s (%s) generated\n"
+							"--------------------------------------------------------"
+							% (trialFamily, styleName, baseFormat)
+						)
+					if baseFormat == WEB_BASE_FORMAT:
+						for path in paths:
+							for flavor in webFlavors:
+								webJobs.append(webfont_job(path, flavor, label=styleName))
+
+			if webJobs:
+				print("Compressing %i web fonts..." % len(webJobs))
+				for job, error, seconds, size in derive_webfonts(webJobs, workers=WEBFONT_WORKERS):
+					report.append((job["label"], job["flavor"].upper(), error or "derived", seconds, job["output"]))
+					if error:
+						print("⚠️ %s not derived: %s" % (os.path.basename(job["output"]), error))
+			self.printReport(report)
+			print("Restoring initial instances...")
 
 		finally:
-			for tempInstance in reversed(temporaryInstances):
-				try:
-					font.instances.remove(tempInstance)
-				except Exception:
-					pass
-
-			for glyph in font.glyphs:
-				glyph.export = False
-			for glyphName in exportedGlyphsBackup:
-				if font.glyphs[glyphName]:
-					font.glyphs[glyphName].export = True
-
-			while len(font.features) > 0:
-				del font.features[0]
-			for featureName, featureData in featureBackup.items():
-				font.features.append(GSFeature(featureName, featureData[0]))
-				font.features[featureName].automatic = featureData[1]
+			# saved even when the run stops, so the manifest matches the cached files
+			if exportCache:
+				print("Export cache manifest: %s" % exportCache.save())
+			snapshot.restore()
+			font.enableUpdateInterface()
 
-			for glyphClass in font.classes:
-				glyphClass.active = classBackup.get(glyphClass.name, True)
+		Message("All exports are done", title="Unlicensed Trial Exports", OKButton=None)
 
-			font.enableUpdateInterface()
+	def generateInstance(self, exportInstance, saveFolder, fontFormat, exportCache, fingerprints):
+		"""
+		Generate one format into saveFolder, through the export cache if given.
+		Returns ("reused", True or the export error, and the written file paths).
+		"""
+		if exportCache:
+			parts = instance_fingerprint(fingerprints, exportInstance, fontFormat, extra=Glyphs.buildNumber)
+			key = "%s %s" % (exportInstance.fontName, fontFormat)
+			isCurrent, reason = exportCache.check(key, parts)
+			if isCurrent:
+				return "reused", exportCache.reuse(key, saveFolder, reason)
+
+		# TTF/OTF decide the outline format, WOFF/WOFF2 the container (with the
+		# same TrueType outlines as the webfonts derived in "All formats" mode)
+		outlineFormat = OTF if fontFormat == OTF else WEB_BASE_FORMAT
+		container = PLAIN if fontFormat in (TTF, OTF) else fontFormat
+		# generated into a staging folder first, to know which files were written
+		stagingFolder = tempfile.mkdtemp(prefix="trial-export-")
+		paths = []
+		try:
+			exportStatement = exportInstance.generate(Format=outlineFormat, FontPath=stagingFolder, Containers=[container])
+			if exportCache and exportStatement is True:
+				paths = exportCache.store(key, parts, stagingFolder, saveFolder, reason)
+			elif exportCache:
+				exportCache.forget(key, str(exportStatement))
+			elif exportStatement is True:
+				paths = move_files(stagingFolder, saveFolder)
+		finally:
+			shutil.rmtree(stagingFolder, ignore_errors=True)
+		return exportStatement, paths
+
+	def webFlavors(self):
+		if woff2_available():
+			return ["woff", "woff2"]
+		print("⚠️ The brotli module is missing, WOFF2 files are not derived.")
+		return ["woff"]
+
+	def printReport(self, report):
+		print("\nStyle | Format | Result | Seconds | KB | File")
+		for styleName, fontFormat, result, seconds, path in report:
+			result = "generated" if result is True else str(result).strip().replace("\n", " ")
+			size = os.path.getsize(path) / 1024.0 if path and os.path.exists(path) else 0
+			print("%s | %s | %s | %.2f | %.1f | %s" % (styleName, fontFormat, result, seconds, size, os.path.basename(path)))
+		print()
+
+	def deriveFromReleaseFiles(self, font, saveFolder):
+		"""Subset the exported release files to the trial glyphset instead of regenerating."""
+		if not fonttools_available():
+			print("⚠️ fontTools is needed to subset release files.")
+			return
+		releaseFolder = GetFolder(
+			message="Select the folder with the release files",
+			allowsMultipleSelection=False,
+			path=Glyphs.defaults[self.defaultsPrefix + "releaseFolder"],
+		)
+		if not releaseFolder:
+			return
+		Glyphs.defaults[self.defaultsPrefix + "releaseFolder"] = releaseFolder
+
+		fontFormat = self.w.popUpButton.getItem()
+		formats = [TTF, OTF, WOFF, WOFF2] if fontFormat == ALL_FORMATS else [fontFormat]
+		glyphNames = []
+		for glyphName in parse_glyph_names(self.w.textEditor.get()):
+			glyph = font.glyphs[glyphName]
+			# release files use production names
+			glyphNames.append((glyph.productionName or glyphName) if glyph else glyphName)
+
+		# like generated trials, subset trials lose the manual features only
+		manualFeatures = [feature.name for feature in font.features if not feature.automatic]
+		jobs = []
+		for extension in [FORMAT_EXTENSIONS[f] for f in formats]:
+			releaseFonts = release_fonts_by_postscript_name(releaseFolder, extension)
+			for sourceInstance in trial_source_instances(font):
+				baseFamily, trialFamily, styleName, fullName, fileName, exportFolder = unlicensed_names(
+					sourceInstance, font.familyName
+				)
+				sourcePath = releaseFonts.get(sourceInstance.fontName)
+				if not sourcePath:
+					print("⚠️ No %s release file for %s %s" % (extension, baseFamily, styleName))
+					continue
+				outputPath = os.path.join(saveFolder, exportFolder, fileName + extension)
+				jobs.append(trial_job(
+					sourcePath, outputPath, glyphNames, baseFamily, trialFamily, fullName, fileName, manualFeatures
+				))
+
+		print(
+			"════════════════════════════════════════════════════════\n"
+			"Font : %s\n"
+			"Release files : %s (%i matched)\n"
+			"════════════════════════════════════════════════════════"
+			% (font.familyName, releaseFolder, len(jobs))
+		)
+		for job, error, seconds in derive_trials(jobs, workers=SUBSET_WORKERS):
+			if error:
+				print("⚠️ %s not derived: %s" % (os.path.basename(job["output"]), error))
+			else:
+				print("✅ %s derived in %.2f s" % (os.path.basename(job["output"]), seconds))
 
 		Message("All exports are done", title="Unlicensed Trial Exports", OKButton=None)
 
 
+for openFont in Glyphs.fonts:
+	restore_interrupted_trial_export(openFont)
 ExportUnlicensedTrials()
@@ -5,9 +5,15 @@ Adds a custom parameter to all instances to remove empty glyphs during
 export. Excludes glyphs that are intentionally empty (space, separators,
 CR, NULL) and glyphs already set to not export. Checks each master
 individually and only removes glyphs from instances where they are empty
-in ANY contributing master.
+in ANY contributing master. Composites whose components are all empty
+count as empty too.
 """
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 # List of glyph names that should be empty
 INTENTIONALLY_EMPTY = {
     "space",
@@ -30,6 +36,80 @@ def is_layer_empty(layer):
     )
 
 
+def component_order(font):
+    """Glyph names with every glyph after the glyphs it uses as components (Kahn's algorithm)."""
+    names = [glyph.name for glyph in font.glyphs]
+    known = set(names)
+    users = {name: [] for name in names}
+    pending = {}
+    for glyph in font.glyphs:
+        bases = set()
+        for master in font.masters:
+            layer = glyph.layers[master.id]
+            if layer is not None:
+                bases.update(c.componentName for c in layer.components if c.componentName in known)
+        bases.discard(glyph.name)
+        pending[glyph.name] = len(bases)
+        for base in bases:
+            users[base].append(glyph.name)
+
+    order = [name for name in names if not pending[name]]
+    for name in order:
+        for user in users[name]:
+            pending[user] -= 1
+            if not pending[user]:
+                order.append(user)
+    # glyphs in component cycles are left out and keep their own emptiness
+    return order
+
+
+def emptiness_bitmap(font):
+    """
+    Glyph names and a glyph x master table of emptiness, computed once for
+    all instances. A composite is empty in a master if it has no paths and
+    all its components are empty there; glyphs are visited in component
+    order so nested composites see their bases' final state.
+    """
+    names = [glyph.name for glyph in font.glyphs]
+    row_for_name = {name: row for row, name in enumerate(names)}
+    master_ids = [master.id for master in font.masters]
+    empty = [[False] * len(master_ids) for name in names]
+
+    for glyph in font.glyphs:
+        row = row_for_name[glyph.name]
+        for column, master_id in enumerate(master_ids):
+            empty[row][column] = is_layer_empty(glyph.layers[master_id])
+
+    for name in component_order(font):
+        glyph = font.glyphs[name]
+        row = row_for_name[name]
+        for column, master_id in enumerate(master_ids):
+            layer = glyph.layers[master_id]
+            if empty[row][column] or layer is None or layer.paths or not layer.components:
+                continue
+            empty[row][column] = all(
+                empty[row_for_name[c.componentName]][column] if c.componentName in row_for_name else True
+                for c in layer.components
+            )
+    return names, master_ids, empty
+
+
+def pack_bitmap(empty, master_count):
+    """The emptiness table as a NumPy bool array, or as one integer bitset per glyph without NumPy."""
+    if numpy is not None:
+        # reshaped, so a font without glyphs still gives a 2-D (0, masters) array
+        return numpy.asarray(empty, dtype=bool).reshape(len(empty), master_count)
+    return [sum(1 << column for column, is_empty in enumerate(row) if is_empty) for row in empty]
+
+
+def empty_in_any(bitmap, columns):
+    """Per glyph: empty in any of the master columns."""
+    if numpy is not None:
+        return bitmap[:, columns].any(axis=1).tolist()
+    mask = sum(1 << column for column in columns)
+    return [bool(bits & mask) for bits in bitmap]
+
+
 def should_skip_glyph(glyph):
     """Check if glyph should be excluded from removal"""
     if glyph.name in INTENTIONALLY_EMPTY:
@@ -68,6 +148,12 @@ def main():
         Glyphs.showMacroWindow()
         return
 
+    # Every master layer is checked once, not once per instance
+    names, all_master_ids, empty = emptiness_bitmap(font)
+    bitmap = pack_bitmap(empty, len(all_master_ids))
+    skipped = [should_skip_glyph(glyph) for glyph in font.glyphs]
+    column_for_master = {master_id: column for column, master_id in enumerate(all_master_ids)}
+
     # Process each instance individually
     for instance in font.instances:
         print(f"\nProcessing instance: {instance.name}")
@@ -76,26 +162,15 @@ def main():
         master_ids = get_instance_master_ids(instance, font)
         print(f"  Checking {len(master_ids)} master(s)")
         
-        # Find glyphs to remove
-        glyphs_to_remove = []
-        
-        for glyph in font.glyphs:
-            # Skip glyphs that should remain
-            if should_skip_glyph(glyph):
-                continue
-            
-            # For interpolated instances: remove if empty in ANY master
-            # For single master: remove if empty in that master
-            is_empty_somewhere = False
-            
-            for master_id in master_ids:
-                layer = glyph.layers[master_id]
-                if is_layer_empty(layer):
-                    is_empty_somewhere = True
-                    break
-            
-            if is_empty_somewhere:
-                glyphs_to_remove.append(glyph.name)
+        # For interpolated instances: remove if empty in ANY master
+        # For single master: remove if empty in that master
+        columns = [column_for_master[m] for m in master_ids if m in column_for_master]
+        empty_somewhere = empty_in_any(bitmap, columns)
+        glyphs_to_remove = [
+            name
+            for name, is_empty, skip in zip(names, empty_somewhere, skipped)
+            if is_empty and not skip
+        ]
         
         # Update instance parameter
         if glyphs_to_remove:
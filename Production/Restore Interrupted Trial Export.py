@@ -0,0 +1,27 @@
+# MenuTitle: Restore Interrupted Trial Export
+# -*- coding: utf-8 -*-
+
+__doc__ = """
+Rolls back export flags, classes, features and temporary instances left behind
+by an Export Unlicensed Trials run that crashed or was force-quit, for all open
+fonts. The state is read from the .export-state.json file next to each font.
+"""
+
+from GlyphsApp import Glyphs, Message
+from oprCore import restore_interrupted_export
+
+
+restoredFonts = []
+for font in Glyphs.fonts:
+	counts = restore_interrupted_export(font)
+	if counts:
+		restoredFonts.append(font.familyName)
+		print(
+			"%s: restored %i export flags, %i features, %i classes, %i instances"
+			% (font.familyName, counts["exports"], counts["features"], counts["classes"], counts["instances"])
+		)
+
+if restoredFonts:
+	Message("Restored %s." % ", ".join(restoredFonts), title="Restore Interrupted Trial Export", OKButton=None)
+else:
+	Message("No interrupted trial export found.", title="Restore Interrupted Trial Export", OKButton=None)
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""
+Shared helpers for the OPR Glyphs scripts. Glyphs puts this folder on the
+Python path, so scripts can import from here instead of duplicating code.
+Nothing in this package imports GlyphsApp at module level.
+"""
+
+from oprCore.kerning_index import (
+	KerningGroupIndex,
+	LEFT_GROUP_PREFIX,
+	RIGHT_GROUP_PREFIX,
+	invalidate_kerning_index,
+	kerning_index_for_font,
+	kerning_index_from_dicts,
+)
+from oprCore.kerning_resolver import (
+	KerningResolver,
+	kerning_resolvers_for_font,
+)
+from oprCore.kerning_diff import (
+	KerningSource,
+	diff_kerning,
+	normalized_kerning,
+	numbered_labels,
+	unique_labels,
+	write_diff_csv,
+	write_diff_jsonl,
+)
+from oprCore.kerning_quantizer import (
+	minimum_palette_size,
+	numpy_available,
+	optimal_palette,
+)
+from oprCore.gpos_size import (
+	GPOSSizeMeter,
+	clear_gpos_size_cache,
+	compiled_gpos_size,
+	fonttools_available,
+	kerning_feature_code,
+)
+from oprCore.kerning_changes import KerningChangeSet
+from oprCore.kerning_rules import (
+	RULE_KEYS,
+	classify_kerning,
+	classify_snapshot,
+	compile_rules,
+	kerning_snapshot,
+	load_rules_file,
+	merge_rules,
+)
+from oprCore.kerning_adjacency import (
+	KerningAdjacency,
+	invalidate_kerning_adjacency,
+	kerning_adjacency_for_font,
+)
+from oprCore.kerning_remap import (
+	SIDE_MODES,
+	load_group_mappings,
+	remap_group_kerning,
+)
+from oprCore.kerning_pruner import (
+	prune_changes,
+	redundant_pairs_by_master,
+	removable_pairs,
+)
+from oprCore.gpos_overflow import (
+	OFFSET_LIMIT,
+	check_kerning_overflow_on_save,
+	identical_class_merges,
+	largest_pair_sets,
+	overflow_report,
+	predict_master,
+	similar_class_merges,
+)
+from oprCore.kerning_matrix import (
+	KerningMatrix,
+	apply_kerning_matrix,
+	kerning_matrix_from_dicts,
+	kerning_matrix_from_font,
+)
+from oprCore.kerning_interpolation import (
+	effective_master_values,
+	instance_weights,
+	interpolated_values,
+	interpolation_flags,
+	model_weights,
+	write_instance_tables,
+)
+from oprCore.side_profiles import (
+	BAND_HEIGHT,
+	ProfileSet,
+	SideProfile,
+	layer_profile,
+	master_profiles,
+)
+from oprCore.kerning_collisions import (
+	Collision,
+	instance_kerning_collisions,
+	kerning_collisions,
+	minimum_gaps,
+)
+from oprCore.profile_cache import (
+	ProfileCache,
+	cache_path_for_font,
+	invalidate_profile_cache,
+	profile_cache_for_font,
+	save_profile_cache,
+)
+from oprCore.group_coherence import (
+	GroupSuggestion,
+	group_coherence,
+	group_suggestions,
+	mean_group_distances,
+)
+from oprCore.kerning_journal import (
+	KerningJournal,
+	groups_digest,
+)
+from oprCore.kerning_io import (
+	import_kerning,
+	iter_font_kerning,
+	iter_kerning,
+	read_kerning_csv,
+	read_kerning_jsonl,
+	read_ufo_kerning,
+	write_kerning_csv,
+	write_kerning_jsonl,
+	write_ufo_groups,
+	write_ufo_kerning,
+)
+from oprCore.trial_subset import (
+	derive_trial,
+	derive_trials,
+	release_fonts_by_postscript_name,
+	trial_job,
+)
+from oprCore.font_state import (
+	FontStateSnapshot,
+	restore_interrupted_export,
+	snapshot_path_for_font,
+)
+from oprCore.export_cache import (
+	ExportCache,
+	FingerprintContext,
+	cache_folder_for_font,
+	instance_fingerprint,
+)
+from oprCore.webfonts import (
+	WEB_FLAVORS,
+	derive_webfont,
+	derive_webfonts,
+	webfont_job,
+	woff2_available,
+)
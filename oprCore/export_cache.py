@@ -0,0 +1,293 @@
+# -*- coding: utf-8 -*-
+"""
+Incremental instance export.
+
+An instance's output depends on its contributing master layers, their
+kerning, the features, classes and prefixes, the custom parameters and
+names of font, masters and instance, the exported glyph set and the export
+format. instance_fingerprint() hashes each of these separately. ExportCache
+keeps the files of the last build per instance in a local cache folder,
+with a manifest of the part digests: an instance whose parts are all
+unchanged is copied from the cache instead of generated, and the manifest
+records for every instance why it was rebuilt or skipped.
+"""
+
+import hashlib
+import io
+import json
+import os
+import shutil
+import time
+
+MANIFEST_NAME = "manifest.json"
+CACHE_ROOT = os.path.join("~", "Library", "Caches", "com.opr.GlyphsScripts", "exports")
+
+
+def digest(items):
+	hasher = hashlib.sha1()
+	for item in items:
+		hasher.update(item.encode("utf-8"))
+		hasher.update(b"\n")
+	return hasher.hexdigest()
+
+
+def parameters_text(owner):
+	try:
+		return ["%s=%r" % (parameter.name, parameter.value) for parameter in owner.customParameters]
+	except Exception:
+		return []
+
+
+def properties_text(owner):
+	try:
+		return ["%s=%r" % (prop.key, prop.value) for prop in owner.properties]
+	except Exception:
+		return []
+
+
+def layer_text(layer):
+	lines = ["layer %s %s %r" % (layer.name, layer.associatedMasterId, layer.width)]
+	for path in layer.paths:
+		lines.append("path %s %s" % (path.closed, " ".join("%s:%r,%r" % (node.type, node.x, node.y) for node in path.nodes)))
+	for component in layer.components:
+		lines.append("component %s %r" % (component.componentName, tuple(component.transform)))
+	for anchor in layer.anchors:
+		lines.append("anchor %s %r,%r" % (anchor.name, anchor.position.x, anchor.position.y))
+	for hint in getattr(layer, "hints", None) or []:
+		lines.append(hint_text(hint))
+	return "\n".join(lines)
+
+
+def point_text(point):
+	return None if point is None else (point.x, point.y)
+
+
+def hint_text(hint):
+	"""A hint by its type, options and the positions of the nodes it refers to."""
+	nodes = [getattr(hint, name, None) for name in ("originNode", "targetNode", "otherNode1", "otherNode2")]
+	return "hint %s %s %s %r %r %r %r" % (
+		getattr(hint, "type", None), getattr(hint, "name", None), getattr(hint, "horizontal", None),
+		point_text(getattr(hint, "position", None)), getattr(hint, "width", None),
+		getattr(hint, "options", None), [point_text(getattr(node, "position", None)) for node in nodes],
+	)
+
+
+def zones_text(master):
+	zones = getattr(master, "alignmentZones", None) or []
+	return "zones %r" % ([(zone.position, zone.size) for zone in zones],)
+
+
+def master_digest(font, master_id):
+	"""Digest of all layers belonging to a master, brace and bracket layers included."""
+	items = []
+	for glyph in font.glyphs:
+		items.append("glyph %s" % glyph.name)
+		for layer in glyph.layers:
+			if layer.associatedMasterId == master_id:
+				items.append(layer_text(layer))
+	for master in font.masters:
+		if master.id == master_id:
+			items.extend(parameters_text(master))
+			items.extend(properties_text(master))
+			items.append("metrics %r %r %r %r" % (master.ascender, master.capHeight, master.xHeight, master.descender))
+			items.append(zones_text(master))
+			items.append("stems %r" % (list(getattr(master, "stems", None) or []),))
+	return digest(items)
+
+
+def kerning_digest(font, master_id):
+	items = []
+	for left_key, right_dict in sorted((font.kerning.get(master_id) or {}).items()):
+		items.append("%s %s" % (left_key, sorted((right_dict or {}).items())))
+	return digest(items)
+
+
+def features_digest(font):
+	items = ["prefix %s %s %s" % (prefix.name, prefix.active, prefix.code) for prefix in font.featurePrefixes]
+	items += ["class %s %s %s" % (glyph_class.name, glyph_class.active, glyph_class.code) for glyph_class in font.classes]
+	items += [
+		"feature %s %s %s %s" % (feature.name, getattr(feature, "active", True), feature.automatic, feature.code)
+		for feature in font.features
+	]
+	return digest(items)
+
+
+def font_digest(font):
+	"""Glyph set and font-wide names and parameters."""
+	items = parameters_text(font) + properties_text(font)
+	items.append("font %s %r %r %r" % (font.familyName, font.upm, font.versionMajor, font.versionMinor))
+	for glyph in font.glyphs:
+		items.append("%s %s %s %s %s %s %s %s" % (
+			glyph.name, glyph.export, glyph.unicodes, getattr(glyph, "productionName", None),
+			glyph.category, glyph.subCategory, glyph.leftKerningGroup, glyph.rightKerningGroup,
+		))
+	return digest(items)
+
+
+def instance_digest(instance):
+	interpolations = getattr(instance, "instanceInterpolations", None) or {}
+	items = parameters_text(instance) + properties_text(instance)
+	items.append("instance %s %s %s %r %r %r %r" % (
+		instance.name, instance.fontName, getattr(instance, "familyName", None),
+		getattr(instance, "weightClass", None), getattr(instance, "widthClass", None),
+		getattr(instance, "isItalic", None), getattr(instance, "isBold", None),
+	))
+	items.append("axes %r" % (list(getattr(instance, "axes", None) or []),))
+	items.append("interpolation %r" % sorted(interpolations.items()))
+	return digest(items)
+
+
+class FingerprintContext(object):
+	"""Per-run memo of the font-wide digests, so masters are hashed once for all instances."""
+
+	def __init__(self, font):
+		self.font = font
+		self.masters = {}
+		self.kerning = {}
+		self._features = None
+		self._font = None
+
+	def master(self, master_id):
+		if master_id not in self.masters:
+			self.masters[master_id] = master_digest(self.font, master_id)
+		return self.masters[master_id]
+
+	def master_kerning(self, master_id):
+		if master_id not in self.kerning:
+			self.kerning[master_id] = kerning_digest(self.font, master_id)
+		return self.kerning[master_id]
+
+	def features(self):
+		if self._features is None:
+			self._features = features_digest(self.font)
+		return self._features
+
+	def glyph_set(self):
+		if self._font is None:
+			self._font = font_digest(self.font)
+		return self._font
+
+
+def instance_fingerprint(context, instance, export_format, extra=None):
+	"""{part name: digest} for everything that goes into the instance's binary."""
+	font = context.font
+	interpolations = getattr(instance, "instanceInterpolations", None) or {}
+	master_ids = [master_id for master_id, weight in interpolations.items() if weight] or [m.id for m in font.masters]
+	master_names = dict((master.id, master.name) for master in font.masters)
+	parts = {
+		"font": context.glyph_set(),
+		"features": context.features(),
+		"instance": instance_digest(instance),
+		"format": digest([repr(export_format), repr(extra)]),
+	}
+	for master_id in sorted(master_ids):
+		label = master_names.get(master_id, master_id)
+		parts["master %s" % label] = context.master(master_id)
+		parts["kerning %s" % label] = context.master_kerning(master_id)
+	return parts
+
+
+def cache_folder_for_font(font):
+	"""Default cache folder: one per .glyphs file under the user's Caches folder."""
+	key = getattr(font, "filepath", None) or font.familyName or "Untitled"
+	name = "%s-%s" % ((font.familyName or "Untitled").replace(os.sep, "-"), hashlib.sha1(key.encode("utf-8")).hexdigest()[:8])
+	return os.path.join(os.path.expanduser(CACHE_ROOT), name)
+
+
+def changed_parts(old, new):
+	return sorted(set(name for name in set(old) | set(new) if old.get(name) != new.get(name)))
+
+
+class ExportCache(object):
+
+	def __init__(self, folder):
+		self.folder = folder
+		self.entries = {}
+		self.decisions = []
+		path = os.path.join(folder, MANIFEST_NAME)
+		if os.path.exists(path):
+			try:
+				with io.open(path, encoding="utf-8") as manifest:
+					self.entries = json.load(manifest).get("entries") or {}
+			except (IOError, OSError, ValueError):
+				self.entries = {}
+
+	def entry_folder(self, key):
+		return os.path.join(self.folder, hashlib.sha1(key.encode("utf-8")).hexdigest())
+
+	def check(self, key, parts):
+		"""(is current, reason) for building key with these part digests."""
+		entry = self.entries.get(key)
+		if entry is None:
+			return False, "not built before"
+		changed = changed_parts(entry["parts"], parts)
+		if changed:
+			return False, "changed: %s" % ", ".join(changed)
+		folder = self.entry_folder(key)
+		if not all(os.path.exists(os.path.join(folder, name)) for name in entry["files"]):
+			return False, "cached files missing"
+		return True, "unchanged since %s" % entry["built"]
+
+	def copy_files(self, key, destination):
+		"""Copy the cached files of key into destination; returns their paths."""
+		folder = self.entry_folder(key)
+		paths = []
+		for name in self.entries[key]["files"]:
+			target = os.path.join(destination, name)
+			target_folder = os.path.dirname(target)
+			if not os.path.isdir(target_folder):
+				os.makedirs(target_folder)
+			shutil.copy2(os.path.join(folder, name), target)
+			paths.append(target)
+		return paths
+
+	def reuse(self, key, destination, reason):
+		"""Skip the build: copy the cached files into destination."""
+		self.decisions.append({"key": key, "action": "skipped", "reason": reason})
+		return self.copy_files(key, destination)
+
+	def store(self, key, parts, staging_folder, destination, reason):
+		"""
+		Move freshly generated files from staging into the cache and copy them
+		to destination. The manifest is written before the old files go and
+		after the new ones are in place, so it never vouches for files of a
+		different build, even if the run stops halfway.
+		"""
+		folder = self.entry_folder(key)
+		if self.entries.pop(key, None) is not None:
+			self.save()
+		if os.path.isdir(folder):
+			shutil.rmtree(folder)
+		names = []
+		for root, folders, files in os.walk(staging_folder):
+			for file_name in files:
+				names.append(os.path.relpath(os.path.join(root, file_name), staging_folder))
+		for name in names:
+			cached = os.path.join(folder, name)
+			if not os.path.isdir(os.path.dirname(cached)):
+				os.makedirs(os.path.dirname(cached))
+			shutil.move(os.path.join(staging_folder, name), cached)
+		self.entries[key] = {"parts": parts, "files": sorted(names), "built": time.strftime("%Y-%m-%d %H:%M:%S")}
+		self.decisions.append({"key": key, "action": "rebuilt", "reason": reason})
+		self.save()
+		return self.copy_files(key, destination)
+
+	def forget(self, key, reason):
+		"""Record a failed build; the old entry is dropped so the next run retries."""
+		self.entries.pop(key, None)
+		self.decisions.append({"key": key, "action": "failed", "reason": reason})
+		self.save()
+
+	def save(self):
+		"""Write the manifest with the cache entries and this run's decisions."""
+		if not os.path.isdir(self.folder):
+			os.makedirs(self.folder)
+		path = os.path.join(self.folder, MANIFEST_NAME)
+		temporary_path = path + ".tmp"
+		with io.open(temporary_path, "w", encoding="utf-8") as manifest:
+			manifest.write(json.dumps(
+				{"entries": self.entries, "last_run": self.decisions},
+				indent=1, sort_keys=True, ensure_ascii=False,
+			))
+		os.replace(temporary_path, path)
+		return path
@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+"""
+Snapshot and restore of the font state that trial exports change.
+
+A snapshot records glyph export flags (as the names of the glyphs that do
+not export, usually a short list), class active flags, the feature list
+and the temporary instances an export adds. restore() compares the live
+font with it and writes back only what differs. The snapshot is also
+written next to the .glyphs file while an export runs, so an export that
+crashed can be rolled back when the font is opened again.
+"""
+
+import io
+import json
+import os
+
+SNAPSHOT_SUFFIX = ".export-state.json"
+
+
+def snapshot_path_for_font(font):
+	file_path = getattr(font, "filepath", None)
+	if not file_path:
+		return None
+	return os.path.splitext(file_path)[0] + SNAPSHOT_SUFFIX
+
+
+def feature_state(feature):
+	return [feature.name, feature.code, bool(feature.automatic), bool(getattr(feature, "active", True))]
+
+
+class FontStateSnapshot(object):
+
+	def __init__(self, font, path=None):
+		self.font = font
+		self.path = path or snapshot_path_for_font(font)
+		self.non_exporting = set()
+		self.classes = {}
+		self.features = []
+		self.temporary_instances = []
+		self.temporary_instance_names = []
+
+	def capture(self):
+		"""Record the current state and persist it."""
+		font = self.font
+		self.non_exporting = set(glyph.name for glyph in font.glyphs if not glyph.export)
+		self.classes = dict((glyph_class.name, bool(glyph_class.active)) for glyph_class in font.classes)
+		self.features = [feature_state(feature) for feature in font.features]
+		self.temporary_instances = []
+		self.temporary_instance_names = []
+		self.save()
+		return self
+
+	def add_temporary_instance(self, instance):
+		"""Remember an instance the export appended, so restore() removes it."""
+		self.temporary_instances.append(instance)
+		self.temporary_instance_names.append(instance.fontName)
+		self.save()
+
+	def to_dict(self):
+		return {
+			"non_exporting": sorted(self.non_exporting),
+			"classes": self.classes,
+			"features": self.features,
+			"temporary_instances": self.temporary_instance_names,
+		}
+
+	def save(self):
+		if not self.path:
+			return
+		temporary_path = self.path + ".tmp"
+		with io.open(temporary_path, "w", encoding="utf-8") as snapshot:
+			snapshot.write(json.dumps(self.to_dict(), ensure_ascii=False))
+		os.replace(temporary_path, self.path)
+
+	@classmethod
+	def load(cls, font, path=None):
+		"""The snapshot persisted for font, or None."""
+		snapshot = cls(font, path)
+		if not snapshot.path or not os.path.exists(snapshot.path):
+			return None
+		with io.open(snapshot.path, encoding="utf-8") as stored:
+			data = json.load(stored)
+		snapshot.non_exporting = set(data.get("non_exporting") or [])
+		snapshot.classes = data.get("classes") or {}
+		snapshot.features = data.get("features") or []
+		snapshot.temporary_instance_names = data.get("temporary_instances") or []
+		return snapshot
+
+	def discard(self):
+		if self.path and os.path.exists(self.path):
+			os.remove(self.path)
+
+	def restore_instances(self):
+		font = self.font
+		removed = 0
+		for instance in reversed(self.temporary_instances):
+			try:
+				font.instances.remove(instance)
+				removed += 1
+			except Exception:
+				pass
+		if not self.temporary_instances and self.temporary_instance_names:
+			# loaded from disk: match the instances by name, last ones first
+			names = list(self.temporary_instance_names)
+			for index in range(len(font.instances) - 1, -1, -1):
+				instance = font.instances[index]
+				if instance.fontName in names and not getattr(instance, "visible", True):
+					names.remove(instance.fontName)
+					del font.instances[index]
+					removed += 1
+		return removed
+
+	def restore_exports(self):
+		non_exporting = self.non_exporting
+		changed = 0
+		for glyph in self.font.glyphs:
+			export = glyph.name not in non_exporting
+			if bool(glyph.export) != export:
+				glyph.export = export
+				changed += 1
+		return changed
+
+	def restore_classes(self):
+		changed = 0
+		for glyph_class in self.font.classes:
+			active = self.classes.get(glyph_class.name)
+			if active is not None and bool(glyph_class.active) != active:
+				glyph_class.active = active
+				changed += 1
+		return changed
+
+	def restore_features(self):
+		"""
+		Match live features to the snapshot by name and edit them in place;
+		only features that are gone are re-created, at their old position.
+		"""
+		from GlyphsApp import GSFeature
+
+		font = self.font
+		live = {}
+		for feature in font.features:
+			live.setdefault(feature.name, []).append(feature)
+		matches = []
+		for name, code, automatic, active in self.features:
+			candidates = live.get(name)
+			matches.append(candidates.pop(0) if candidates else None)
+
+		changed = 0
+		# features the snapshot does not know, or surplus duplicates
+		for index in range(len(font.features) - 1, -1, -1):
+			feature = font.features[index]
+			if any(leftover is feature for leftover in live.get(feature.name, ())):
+				del font.features[index]
+				changed += 1
+
+		for position, ((name, code, automatic, active), feature) in enumerate(zip(self.features, matches)):
+			if feature is None:
+				feature = GSFeature(name, code)
+				font.features.insert(position, feature)
+				feature.automatic = automatic
+				if not active and hasattr(feature, "active"):
+					feature.active = False
+				changed += 1
+				continue
+			edited = False
+			if font.features[position] is not feature:
+				# moved by an edit during the export; move the same object back
+				for index in range(position + 1, len(font.features)):
+					if font.features[index] is feature:
+						del font.features[index]
+						break
+				font.features.insert(position, feature)
+				edited = True
+			if feature.code != code:
+				feature.code = code
+				edited = True
+			if bool(feature.automatic) != automatic:
+				feature.automatic = automatic
+				edited = True
+			if hasattr(feature, "active") and bool(feature.active) != active:
+				feature.active = active
+				edited = True
+			changed += edited
+		return changed
+
+	def restore(self):
+		"""Write back what changed and delete the persisted snapshot; returns change counts."""
+		counts = {
+			"instances": self.restore_instances(),
+			"exports": self.restore_exports(),
+			"features": self.restore_features(),
+			"classes": self.restore_classes(),
+		}
+		self.discard()
+		return counts
+
+
+def restore_interrupted_export(font):
+	"""Roll back a trial export that did not finish; returns the change counts or None."""
+	snapshot = FontStateSnapshot.load(font)
+	if snapshot is None:
+		return None
+	return snapshot.restore()
@@ -0,0 +1,335 @@
+# -*- coding: utf-8 -*-
+"""
+Predict the PairPos layout of the kern feature before export.
+
+The model follows what feaLib does with the feature code from gpos_size:
+glyph pairs (including glyph vs. class exceptions, enumerated) go into a
+format 1 subtable, class pairs into a format 2 subtable. Kerning groups
+never overlap, so all class pairs fit one format 2 subtable until its
+16-bit offsets overflow and the compiler has to split it. Splits are
+simulated as fontTools does them, halving whole class rows (or pair sets)
+with Coverage and ClassDefs per piece, and checking the offsets from each
+piece to its children and from the lookup to each piece. Sizes are
+estimated from glyph order, coverage and ClassDef ranges without compiling
+anything, so this is cheap enough to run on every save.
+"""
+
+from oprCore.kerning_index import kerning_index_for_font
+
+try:
+	import numpy
+except ImportError:
+	numpy = None
+
+
+OFFSET_LIMIT = 0xFFFF
+VALUE_RECORD_SIZE = 2  # XAdvance only
+
+
+def range_count(sorted_ids):
+	count = 0
+	previous = None
+	for glyph_id in sorted_ids:
+		if previous is None or glyph_id != previous + 1:
+			count += 1
+		previous = glyph_id
+	return count
+
+
+def coverage_size(glyph_ids):
+	glyph_ids = sorted(set(glyph_ids))
+	if not glyph_ids:
+		return 4
+	return min(4 + 2 * len(glyph_ids), 4 + 6 * range_count(glyph_ids))
+
+
+def class_def_size(class_for_glyph):
+	"""Smaller of ClassDef format 1 and 2 for {glyph ID: class}; class 0 is implicit."""
+	glyph_ids = sorted(glyph_id for glyph_id, glyph_class in class_for_glyph.items() if glyph_class)
+	if not glyph_ids:
+		return 6
+	format1 = 6 + 2 * (glyph_ids[-1] - glyph_ids[0] + 1)
+	ranges = 0
+	previous = None
+	for glyph_id in glyph_ids:
+		if previous is None or glyph_id != previous + 1 or class_for_glyph[glyph_id] != class_for_glyph[previous]:
+			ranges += 1
+		previous = glyph_id
+	return min(format1, 4 + 6 * ranges)
+
+
+def split_pieces(items, fits):
+	"""
+	Halve items the way fontTools' splitPairPos does when a subtable
+	overflows (first half stays, second half moves to a new subtable),
+	until every piece fits; returns the pieces in lookup order.
+	"""
+	if len(items) <= 1 or fits(items):
+		return [items]
+	half = len(items) // 2
+	return split_pieces(items[:half], fits) + split_pieces(items[half:], fits)
+
+
+def offsets_fit(header_size, child_sizes):
+	"""16-bit offsets from a subtable to its children; the farthest child starts after all others."""
+	if not child_sizes:
+		return True
+	return header_size + sum(child_sizes) - min(child_sizes) <= OFFSET_LIMIT
+
+
+def pair_set_piece(pair_sets, glyph_id_for_name):
+	"""(header size, child sizes) of a format 1 subtable holding these (first glyph, pair set) items."""
+	header = 10 + 2 * len(pair_sets)
+	children = [coverage_size(glyph_id_for_name[name] for name, seconds in pair_sets)]
+	# the compiler stores identical pair sets once
+	unique_sets = set(tuple(seconds) for name, seconds in pair_sets)
+	children += [2 + len(seconds) * (2 + VALUE_RECORD_SIZE) for seconds in unique_sets]
+	return header, children
+
+
+def class_piece(rows, columns, class2_size):
+	"""(header size, child sizes) of a format 2 subtable holding these class rows; the first row is class 0."""
+	glyph_ids = [glyph_id for row in rows for glyph_id in row]
+	class1 = dict((glyph_id, number) for number, row in enumerate(rows) for glyph_id in row if number)
+	header = 16 + len(rows) * columns * VALUE_RECORD_SIZE
+	return header, [coverage_size(glyph_ids), class_def_size(class1), class2_size]
+
+
+class SubtablePrediction(object):
+	"""One subtable as written, with the sizes of the pieces the compiler splits it into."""
+
+	def __init__(self, pair_format, size, detail, piece_sizes=None):
+		self.format = pair_format
+		self.size = size
+		self.detail = detail
+		self.piece_sizes = piece_sizes or [size]
+
+	@property
+	def overflows(self):
+		return len(self.piece_sizes) > 1
+
+	@property
+	def split_count(self):
+		"""Subtables the compiler will need after splitting."""
+		return len(self.piece_sizes)
+
+
+class OverflowPrediction(object):
+
+	def __init__(self, master_name, subtables, matrix, left_classes, right_classes, pair_sets):
+		self.master_name = master_name
+		self.subtables = subtables
+		self.matrix = matrix
+		self.left_classes = left_classes
+		self.right_classes = right_classes
+		self.pair_sets = pair_sets
+
+	@property
+	def piece_sizes(self):
+		return [size for subtable in self.subtables for size in subtable.piece_sizes]
+
+	@property
+	def lookup_size(self):
+		pieces = self.piece_sizes
+		return 6 + 2 * len(pieces) + sum(pieces)
+
+	@property
+	def lookup_overflows(self):
+		# 16-bit offsets from the lookup to its subtables; the last one starts after all others
+		pieces = self.piece_sizes
+		if not pieces:
+			return False
+		return self.lookup_size - pieces[-1] > OFFSET_LIMIT
+
+	@property
+	def overflows(self):
+		return self.lookup_overflows or any(subtable.overflows for subtable in self.subtables)
+
+
+def predict_master(font, master, index=None):
+	index = index or kerning_index_for_font(font)
+	glyph_id_for_name = dict((name, i + 1) for i, name in enumerate(index.glyph_names))
+	kerning = font.kerning.get(master.id) or {}
+
+	class_pairs = {}
+	glyph_pairs = {}
+	enum_pairs = {}
+	for left_key, right_dict in kerning.items():
+		left_is_class = left_key[0] == "@"
+		left_members = index.members(left_key)
+		if not left_members:
+			continue
+		for right_key, value in (right_dict or {}).items():
+			right_is_class = right_key[0] == "@"
+			right_members = index.members(right_key)
+			if not right_members:
+				continue
+			if left_is_class and right_is_class:
+				class_pairs[(left_key, right_key)] = value
+			elif not left_is_class and not right_is_class:
+				glyph_pairs[(left_members[0], right_members[0])] = value
+			else:
+				for left_name in left_members:
+					for right_name in right_members:
+						enum_pairs.setdefault((left_name, right_name), value)
+
+	for pair, value in enum_pairs.items():
+		glyph_pairs.setdefault(pair, value)
+
+	subtables = []
+	pair_sets = {}
+	if glyph_pairs:
+		for (left_name, right_name), value in sorted(glyph_pairs.items()):
+			pair_sets.setdefault(left_name, []).append((right_name, value))
+		# coverage order is glyph order, and splits follow it
+		items = sorted(pair_sets.items(), key=lambda item: glyph_id_for_name[item[0]])
+		pieces = split_pieces(items, lambda piece: offsets_fit(*pair_set_piece(piece, glyph_id_for_name)))
+		piece_sizes = [sum(children) + header for header, children in (pair_set_piece(piece, glyph_id_for_name) for piece in pieces)]
+		header, children = pair_set_piece(items, glyph_id_for_name)
+		subtables.append(SubtablePrediction(
+			1, header + sum(children),
+			"%i glyph pairs in %i pair sets" % (len(glyph_pairs), len(pair_sets)),
+			piece_sizes,
+		))
+
+	left_classes = sorted(set(left for left, _ in class_pairs))
+	right_classes = sorted(set(right for _, right in class_pairs))
+	matrix = {}
+	if class_pairs:
+		right_number = dict((key, i + 1) for i, key in enumerate(right_classes))
+		class2 = {}
+		for key in right_classes:
+			for name in index.members(key):
+				class2[glyph_id_for_name[name]] = right_number[key]
+		class2_size = class_def_size(class2)
+		# feaLib orders first classes by size, then by glyph names; the largest becomes class 0
+		rows = sorted(
+			(tuple(sorted(index.members(key))) for key in left_classes),
+			key=lambda names: (-len(names), names),
+		)
+		rows = [[glyph_id_for_name[name] for name in names] for names in rows]
+		# the second side keeps an extra class 0
+		columns = len(right_classes) + 1
+		pieces = split_pieces(rows, lambda piece: offsets_fit(*class_piece(piece, columns, class2_size)))
+		piece_sizes = [sum(children) + header for header, children in (class_piece(piece, columns, class2_size) for piece in pieces)]
+		header, children = class_piece(rows, columns, class2_size)
+		subtables.append(SubtablePrediction(
+			2, header + sum(children),
+			"%i x %i class matrix" % (len(rows), columns),
+			piece_sizes,
+		))
+		matrix = class_pairs
+
+	return OverflowPrediction(master.name, subtables, matrix, left_classes, right_classes, pair_sets)
+
+
+def identical_class_merges(prediction, side):
+	"""
+	Groups of classes with identical kerning against every class on the
+	other side; merging each group loses nothing.
+	"""
+	own = prediction.left_classes if side == "left" else prediction.right_classes
+	vectors = dict((key, []) for key in own)
+	for (left_key, right_key), value in sorted(prediction.matrix.items()):
+		if side == "left":
+			vectors[left_key].append((right_key, value))
+		else:
+			vectors[right_key].append((left_key, value))
+	by_vector = {}
+	for key, vector in vectors.items():
+		by_vector.setdefault(tuple(vector), []).append(key)
+	return [sorted(keys) for keys in by_vector.values() if len(keys) > 1]
+
+
+def similar_class_merges(prediction, side, tolerance, limit=20):
+	"""
+	Class pairs whose kerning differs by at most tolerance everywhere,
+	closest first. Needs NumPy for tolerance > 0; returns [] without it.
+	"""
+	if tolerance <= 0:
+		candidates = []
+		for keys in identical_class_merges(prediction, side):
+			candidates.extend((0.0, first, second) for first, second in zip(keys, keys[1:]))
+		candidates.sort()
+		return candidates[:limit]
+	if numpy is None or not prediction.matrix:
+		return []
+	rows = prediction.left_classes
+	columns = prediction.right_classes
+	row_number = dict((key, i) for i, key in enumerate(rows))
+	column_number = dict((key, i) for i, key in enumerate(columns))
+	grid = numpy.zeros((len(rows), len(columns)), dtype=numpy.float32)
+	for (left_key, right_key), value in prediction.matrix.items():
+		grid[row_number[left_key], column_number[right_key]] = value
+	keys = rows
+	if side == "right":
+		grid = numpy.ascontiguousarray(grid.T)
+		keys = columns
+
+	candidates = []
+	for i in range(len(keys) - 1):
+		# max absolute difference against every later row; the temporary is
+		# never larger than the grid itself
+		distance = numpy.abs(grid[i + 1:] - grid[i]).max(axis=1)
+		for j in numpy.flatnonzero(distance <= tolerance):
+			candidates.append((float(distance[j]), keys[i], keys[i + 1 + int(j)]))
+	candidates.sort()
+	return candidates[:limit]
+
+
+def largest_pair_sets(prediction, limit=10):
+	return sorted(
+		((len(seconds), name) for name, seconds in prediction.pair_sets.items()),
+		reverse=True,
+	)[:limit]
+
+
+def overflow_report(font, tolerance=0, only_problems=False):
+	"""Readable report lines for all masters; with only_problems, nothing unless something overflows."""
+	index = kerning_index_for_font(font)
+	lines = []
+	for master in font.masters:
+		prediction = predict_master(font, master, index)
+		if only_problems and not prediction.overflows:
+			continue
+		lines.append("%s: kern lookup ~%i bytes%s" % (
+			master.name,
+			prediction.lookup_size,
+			", needs extension lookups" if prediction.lookup_overflows else "",
+		))
+		for subtable in prediction.subtables:
+			lines.append("  PairPos format %i: ~%i bytes, %s%s" % (
+				subtable.format,
+				subtable.size,
+				subtable.detail,
+				", OVERFLOWS, split into %i subtables" % subtable.split_count if subtable.overflows else "",
+			))
+		if not prediction.overflows:
+			continue
+
+		for side in ("left", "right"):
+			for keys in identical_class_merges(prediction, side)[:10]:
+				lines.append("  Merge %s groups, identical kerning: %s" % (side, ", ".join(index.display_name(key) for key in keys)))
+			if tolerance <= 0:
+				# identical groups are listed above already
+				continue
+			for distance, first, second in similar_class_merges(prediction, side, tolerance)[:10]:
+				lines.append("  Merge %s groups %s and %s, max. difference %i" % (
+					side, index.display_name(first), index.display_name(second), distance,
+				))
+		if any(subtable.format == 1 and subtable.overflows for subtable in prediction.subtables):
+			for count, name in largest_pair_sets(prediction):
+				lines.append("  Review exceptions of /%s: %i glyph pairs" % (name, count))
+	return lines
+
+
+def check_kerning_overflow_on_save(notification):
+	"""Glyphs callback for DOCUMENTWASSAVED; prints a warning when the kern lookup would overflow."""
+	try:
+		font = notification.object().font
+	except Exception:
+		return
+	lines = overflow_report(font, only_problems=True)
+	if lines:
+		print("⚠️ Kerning of %s will overflow GPOS offsets:" % font.familyName)
+		print("\n".join(lines))
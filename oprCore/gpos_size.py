@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+Measure the real size of the kerning in a compiled GPOS table.
+
+One master's kerning is written as feature code (glyph pairs first, glyph
+vs. class exceptions as enum pairs, class pairs last) and compiled with
+fontTools against a bare glyph order. Compiled sizes are cached by content,
+so tuning runs only recompile kerning that actually changed. Requires
+fontTools.
+"""
+
+import hashlib
+
+try:
+	from fontTools.feaLib.builder import addOpenTypeFeaturesFromString
+	from fontTools.ttLib import TTFont
+except ImportError:
+	TTFont = None
+
+from oprCore.kerning_diff import normalized_kerning
+from oprCore.kerning_index import kerning_index_for_font
+
+
+_size_cache = {}
+
+
+def fonttools_available():
+	return TTFont is not None
+
+
+def glyph_token(name):
+	return "\\" + name
+
+
+def kerning_feature_code(pairs, members_for_key, glyph_names=None):
+	"""
+	Feature code for {(left, right): value} with name keys. Class pairs whose
+	class has no members are dropped, like they are at export, and so are
+	glyph keys missing from glyph_names when it is given.
+	"""
+	class_names = {}
+	definitions = []
+
+	def class_ref(key):
+		if key not in class_names:
+			class_names[key] = "@K%i" % len(class_names)
+			definitions.append("%s = [%s];" % (
+				class_names[key],
+				" ".join(glyph_token(name) for name in members_for_key[key]),
+			))
+		return class_names[key]
+
+	glyph_rules = []
+	enum_rules = []
+	class_rules = []
+	for (left, right), value in sorted(pairs.items()):
+		left_is_class = left[0] == "@"
+		right_is_class = right[0] == "@"
+		if (left_is_class and not members_for_key.get(left)) or (right_is_class and not members_for_key.get(right)):
+			continue
+		if glyph_names is not None and (
+			(not left_is_class and left not in glyph_names) or (not right_is_class and right not in glyph_names)
+		):
+			continue
+		left_token = class_ref(left) if left_is_class else glyph_token(left)
+		right_token = class_ref(right) if right_is_class else glyph_token(right)
+		rule = "pos %s %s %i;" % (left_token, right_token, round(value))
+		if left_is_class and right_is_class:
+			class_rules.append(rule)
+		elif left_is_class or right_is_class:
+			enum_rules.append("enum " + rule)
+		else:
+			glyph_rules.append(rule)
+
+	lines = definitions + ["feature kern {"]
+	lines += ["\t" + rule for rule in glyph_rules + enum_rules + class_rules]
+	lines.append("} kern;")
+	return "\n".join(lines)
+
+
+def compiled_gpos_size(glyph_order, feature_code):
+	"""Byte size of the GPOS table compiled from feature_code."""
+	tt_font = TTFont()
+	tt_font.setGlyphOrder(list(glyph_order))
+	addOpenTypeFeaturesFromString(tt_font, feature_code, tables=["GPOS"])
+	if "GPOS" not in tt_font:
+		return 0
+	return len(tt_font["GPOS"].compile(tt_font))
+
+
+class GPOSSizeMeter(object):
+
+	def __init__(self, font):
+		self.font = font
+		self.index = kerning_index_for_font(font)
+		glyph_order = [".notdef"] + [name for name in self.index.glyph_names if name != ".notdef"]
+		self.glyph_order = glyph_order
+		self.glyph_names = frozenset(glyph_order)
+		self.members_for_key = self.index.members_for_key
+		self.group_digest = hashlib.sha1(repr((glyph_order, sorted(self.members_for_key.items()))).encode("utf-8")).hexdigest()
+
+	def master_pairs(self, master_id):
+		return normalized_kerning(self.font, master_id, self.index)
+
+	def size_for_pairs(self, pairs):
+		digest = hashlib.sha1(repr(sorted(pairs.items())).encode("utf-8")).hexdigest()
+		key = (self.group_digest, digest)
+		if key not in _size_cache:
+			_size_cache[key] = compiled_gpos_size(
+				self.glyph_order,
+				kerning_feature_code(pairs, self.members_for_key, self.glyph_names),
+			)
+		return _size_cache[key]
+
+	def master_size(self, master_id):
+		return self.size_for_pairs(self.master_pairs(master_id))
+
+	def font_sizes(self):
+		"""{master ID: GPOS bytes} for all masters."""
+		return dict((master.id, self.master_size(master.id)) for master in self.font.masters)
+
+
+def clear_gpos_size_cache():
+	_size_cache.clear()
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""
+Kerning group coherence from side profile distances.
+
+Each glyph's side profile is compared with every other glyph's on the same
+side: the distance is the root mean square difference over all bands, with
+empty bands and anything further than CAP from the edge counted as CAP, as
+kerning cannot see that deep. Distances are computed in row blocks and
+immediately averaged per kerning group, so memory stays at blocks x glyphs
+float32 instead of a full N x N matrix. A glyph is an outlier when it is on
+average further than the limit from the other members of its group, and a
+better group is suggested when another group's members are clearly closer.
+Requires NumPy.
+"""
+
+try:
+	import numpy
+except ImportError:
+	numpy = None
+
+from oprCore.profile_cache import profile_cache_for_font
+from oprCore.side_profiles import master_profiles
+
+CAP = 200.0
+BLOCK_SIZE = 512
+OUTLIER_DISTANCE = 20.0
+
+
+class GroupSuggestion(object):
+
+	__slots__ = ("name", "side", "group", "distance", "suggested_group", "suggested_distance")
+
+	def __init__(self, name, side, group, distance, suggested_group, suggested_distance):
+		self.name = name
+		self.side = side
+		self.group = group
+		self.distance = distance
+		self.suggested_group = suggested_group
+		self.suggested_distance = suggested_distance
+
+	def __repr__(self):
+		return "<GroupSuggestion %s %s: %s %.1f -> %s %.1f>" % (
+			self.name, self.side, self.group, self.distance, self.suggested_group, self.suggested_distance)
+
+
+def comparable_profiles(profiles, side, cap=CAP):
+	"""(glyphs, bands) float32 distances from the edge, capped and without NaN."""
+	values = profiles.left if side == "left" else profiles.right
+	values = numpy.where(numpy.isnan(values), cap, numpy.minimum(values, cap))
+	return values.astype(numpy.float32)
+
+
+def mean_group_distances(values, labels, group_count, block_size=BLOCK_SIZE):
+	"""
+	(glyphs, groups) mean RMS profile distance of every glyph to the members
+	of every group, leaving out the glyph itself. labels holds a group number
+	per glyph, -1 for glyphs without a group.
+	"""
+	count, band_count = values.shape
+	membership = numpy.zeros((count, group_count), dtype=numpy.float32)
+	grouped = labels >= 0
+	membership[numpy.nonzero(grouped)[0], labels[grouped]] = 1
+	sizes = membership.sum(axis=0)
+	squares = (values * values).sum(axis=1)
+
+	distances = numpy.empty((count, group_count), dtype=numpy.float32)
+	for start in range(0, count, block_size):
+		stop = min(start + block_size, count)
+		block = values[start:stop]
+		squared = squares[start:stop, None] + squares[None, :] - 2 * block @ values.T
+		block_distances = numpy.sqrt(numpy.maximum(squared, 0) / band_count)
+		sums = block_distances @ membership
+		own = labels[start:stop]
+		counts = numpy.broadcast_to(sizes, sums.shape).copy()
+		has_group = own >= 0
+		# the glyph's distance to itself is 0, so only the count needs correcting
+		counts[has_group.nonzero()[0], own[has_group]] -= 1
+		with numpy.errstate(divide="ignore", invalid="ignore"):
+			distances[start:stop] = numpy.where(counts > 0, sums / counts, numpy.nan)
+	return distances
+
+
+def group_suggestions(names, groups, values, outlier_distance=OUTLIER_DISTANCE, side="left", block_size=BLOCK_SIZE):
+	"""
+	GroupSuggestion for every grouped glyph further than outlier_distance from
+	its group, and every ungrouped glyph within it of some group, worst first.
+	suggested_group is None when no group is closer than the current one.
+	"""
+	group_names = sorted(set(group for group in groups if group))
+	group_number = dict((group, i) for i, group in enumerate(group_names))
+	labels = numpy.array([group_number.get(group, -1) if group else -1 for group in groups], dtype=numpy.int64)
+	if not group_names:
+		return []
+	distances = mean_group_distances(values, labels, len(group_names), block_size)
+
+	own = numpy.full(len(names), numpy.nan, dtype=numpy.float32)
+	grouped = labels >= 0
+	own[grouped] = distances[grouped.nonzero()[0], labels[grouped]]
+	others = distances.copy()
+	others[grouped.nonzero()[0], labels[grouped]] = numpy.nan
+	others = numpy.where(numpy.isnan(others), numpy.inf, others)
+	best = others.argmin(axis=1)
+	best_distance = others[numpy.arange(len(names)), best]
+
+	outliers = grouped & (own > outlier_distance)
+	homeless = ~grouped & (best_distance <= outlier_distance)
+	suggestions = []
+	for row in numpy.nonzero(outliers | homeless)[0].tolist():
+		distance = float(own[row])
+		suggested = None
+		suggested_distance = float(best_distance[row])
+		if suggested_distance < outlier_distance and (numpy.isnan(distance) or suggested_distance < distance):
+			suggested = group_names[best[row]]
+		suggestions.append(GroupSuggestion(names[row], side, groups[row], distance, suggested, suggested_distance))
+	suggestions.sort(key=lambda s: -(s.distance if s.group else s.suggested_distance))
+	return suggestions
+
+
+def group_coherence(font, master_id, side, outlier_distance=OUTLIER_DISTANCE, profiles=None, block_size=BLOCK_SIZE):
+	"""
+	Group suggestions for one side in one master: side "left" checks
+	leftKerningGroup against left profiles, "right" rightKerningGroup against
+	right profiles. Glyphs without ink are skipped.
+	"""
+	if profiles is None:
+		profiles = master_profiles(font, master_id, profile_for_layer=profile_cache_for_font(font).profile)
+	sides = profiles.left if side == "left" else profiles.right
+	inked = numpy.nonzero(~numpy.isnan(sides).all(axis=1))[0]
+	names = [profiles.names[row] for row in inked.tolist()]
+	attribute = "leftKerningGroup" if side == "left" else "rightKerningGroup"
+	groups = [getattr(font.glyphs[name], attribute) for name in names]
+	values = comparable_profiles(profiles, side)[inked]
+	return group_suggestions(names, groups, values, outlier_distance, side, block_size)
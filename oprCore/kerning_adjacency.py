@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+Per-master adjacency of kerning keys in both directions.
+
+font.kerning is keyed left -> right only, so finding the pairs a glyph has on
+its left side means scanning everything. KerningAdjacency keeps both
+directions, so a glyph's partners come back in O(degree).
+
+kerning_adjacency_for_font() keeps one adjacency per font and master across
+script runs. KerningChangeSet.apply() updates it pair by pair; edits made
+elsewhere are noticed through a cheap shape check (the number of right keys
+under every left key) and lead to a rebuild.
+"""
+
+import weakref
+
+from oprCore.kerning_index import kerning_index_for_font
+
+
+_adjacency_cache = weakref.WeakKeyDictionary()
+
+
+def kerning_shape(kerning):
+	"""Cheap fingerprint of one master's kerning: its left keys and their row lengths."""
+	return hash(frozenset((left_key, len(right_dict or {})) for left_key, right_dict in (kerning or {}).items()))
+
+
+class KerningAdjacency(object):
+
+	def __init__(self, font, master_id, index=None):
+		self.master_id = master_id
+		self.index = index or kerning_index_for_font(font)
+		self.rights_for_left = {}
+		self.lefts_for_right = {}
+		kerning = font.kerning.get(master_id) or {}
+		for left_key, right_dict in kerning.items():
+			for right_key, value in (right_dict or {}).items():
+				self.add_pair(left_key, right_key, value)
+		self.shape = kerning_shape(kerning)
+
+	def is_current(self, font):
+		"""False if the master's kerning was edited in a way the adjacency did not see."""
+		return self.shape == kerning_shape(font.kerning.get(self.master_id))
+
+	def add_pair(self, left_key, right_key, value):
+		self.rights_for_left.setdefault(left_key, {})[right_key] = value
+		self.lefts_for_right.setdefault(right_key, {})[left_key] = value
+
+	def remove_pair(self, left_key, right_key):
+		rights = self.rights_for_left.get(left_key)
+		if rights is not None:
+			rights.pop(right_key, None)
+			if not rights:
+				del self.rights_for_left[left_key]
+		lefts = self.lefts_for_right.get(right_key)
+		if lefts is not None:
+			lefts.pop(left_key, None)
+			if not lefts:
+				del self.lefts_for_right[right_key]
+
+	def keys_for_glyph(self, glyph_name, side):
+		"""The glyph's own ID and its class key on the given side."""
+		glyph_id = self.index.id_for_name.get(glyph_name)
+		class_key = self.index.left_key(glyph_name) if side == "left" else self.index.right_key(glyph_name)
+		return [key for key in (glyph_id, class_key) if key]
+
+	def pairs_with_glyph_on_left(self, glyph_name):
+		"""[(left key, right key, value)] for pairs where the glyph stands on the left."""
+		pairs = []
+		for left_key in self.keys_for_glyph(glyph_name, "left"):
+			for right_key, value in self.rights_for_left.get(left_key, {}).items():
+				pairs.append((left_key, right_key, value))
+		return pairs
+
+	def pairs_with_glyph_on_right(self, glyph_name):
+		"""[(left key, right key, value)] for pairs where the glyph stands on the right."""
+		pairs = []
+		for right_key in self.keys_for_glyph(glyph_name, "right"):
+			for left_key, value in self.lefts_for_right.get(right_key, {}).items():
+				pairs.append((left_key, right_key, value))
+		return pairs
+
+
+def kerning_adjacency_for_font(font, master_id, index=None):
+	"""The kept adjacency of one master, rebuilt only if the kerning changed behind its back."""
+	try:
+		masters = _adjacency_cache.get(font)
+		if masters is None:
+			masters = {}
+			_adjacency_cache[font] = masters
+	except TypeError:
+		# fonts that cannot be weakly referenced are not kept
+		return KerningAdjacency(font, master_id, index=index)
+	adjacency = masters.get(master_id)
+	if adjacency is None or not adjacency.is_current(font):
+		adjacency = KerningAdjacency(font, master_id, index=index)
+		masters[master_id] = adjacency
+	elif index is not None:
+		adjacency.index = index
+	return adjacency
+
+
+def update_kerning_adjacency(font, master_id, old_kerning, new_kerning, changes):
+	"""
+	Apply {(left key, right key): value or None} to the kept adjacency after
+	font.kerning[master_id] went from old_kerning to new_kerning; an adjacency
+	that was already stale is dropped instead.
+	"""
+	try:
+		masters = _adjacency_cache.get(font)
+	except TypeError:
+		return
+	adjacency = masters.get(master_id) if masters else None
+	if adjacency is None:
+		return
+	if adjacency.shape != kerning_shape(old_kerning):
+		del masters[master_id]
+		return
+	for (left_key, right_key), value in changes.items():
+		if value is None:
+			adjacency.remove_pair(left_key, right_key)
+		else:
+			adjacency.add_pair(left_key, right_key, value)
+	adjacency.shape = kerning_shape(new_kerning)
+
+
+def invalidate_kerning_adjacency(font=None, master_id=None):
+	if font is None:
+		_adjacency_cache.clear()
+		return
+	try:
+		masters = _adjacency_cache.get(font)
+	except TypeError:
+		return
+	if masters is None:
+		return
+	if master_id is None:
+		masters.clear()
+	else:
+		masters.pop(master_id, None)
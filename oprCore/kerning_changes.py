@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+"""
+Batched kerning edits.
+
+A KerningChangeSet collects sets and removals, keeps only the last edit per
+pair, and validates keys once against the kerning index. apply() then writes
+each touched master with a single assignment to font.kerning[masterID]
+inside one undo group, instead of one setKerningForPair() round trip per
+pair. The assignment itself is not undoable, so every master registers an
+undo action that puts its previous kerning back. preview() lists what
+apply() would change without touching the font.
+"""
+
+from oprCore.kerning_adjacency import invalidate_kerning_adjacency, update_kerning_adjacency
+from oprCore.kerning_index import LEFT_GROUP_PREFIX, RIGHT_GROUP_PREFIX, kerning_index_for_font
+
+
+REMOVE = object()
+
+
+class KerningChangeSet(object):
+
+	def __init__(self, font, index=None):
+		self.font = font
+		self.index = index or kerning_index_for_font(font)
+		self.changes = {}
+		self.invalid = []
+
+	def __len__(self):
+		return sum(len(changes) for changes in self.changes.values())
+
+	def internal_key(self, key, side):
+		"""
+		The key font.kerning uses for a glyph name, glyph ID or class key on
+		the given side ("left" or "right"), or None if it is not valid there.
+		"""
+		if not key:
+			return None
+		if key[0] == "@":
+			prefix = LEFT_GROUP_PREFIX if side == "left" else RIGHT_GROUP_PREFIX
+			return key if key.startswith(prefix) else None
+		if key in self.index.name_for_id:
+			return key
+		return self.index.id_for_name.get(key)
+
+	def is_valid_key(self, key, side):
+		return self.internal_key(key, side) is not None
+
+	def _record(self, master_id, left, right, value):
+		left_key = self.internal_key(left, "left")
+		right_key = self.internal_key(right, "right")
+		if left_key is None or right_key is None:
+			self.invalid.append((master_id, left, right))
+			return False
+		self.changes.setdefault(master_id, {})[(left_key, right_key)] = value
+		return True
+
+	def set(self, master_id, left, right, value):
+		return self._record(master_id, left, right, value)
+
+	def remove(self, master_id, left, right):
+		return self._record(master_id, left, right, REMOVE)
+
+	def remove_raw(self, master_id, left_key, right_key):
+		"""Remove a pair by its stored keys, even if they no longer resolve (broken pairs)."""
+		self.changes.setdefault(master_id, {})[(left_key, right_key)] = REMOVE
+
+	def diff(self):
+		"""Yield (master ID, left key, right key, old value, new value) for real changes; None means absent."""
+		for master_id, changes in self.changes.items():
+			kerning = self.font.kerning.get(master_id) or {}
+			for (left_key, right_key), value in changes.items():
+				old = (kerning.get(left_key) or {}).get(right_key)
+				new = None if value is REMOVE else value
+				if old != new:
+					yield master_id, left_key, right_key, old, new
+
+	def preview(self):
+		"""Human-readable lines for diff()."""
+		master_names = dict((master.id, master.name) for master in self.font.masters)
+		display = self.index.display_name
+		for master_id, left_key, right_key, old, new in self.diff():
+			if new is None:
+				change = "removed (was %s)" % old
+			elif old is None:
+				change = "added %s" % new
+			else:
+				change = "%s → %s" % (old, new)
+			yield "%s: %s %s %s" % (master_names.get(master_id, master_id), display(left_key), display(right_key), change)
+
+	def apply(self):
+		"""Write all changes, one assignment per master; returns (changed count, removed count)."""
+		set_count = 0
+		removed_count = 0
+		undo_manager = self._undo_manager()
+		if undo_manager is not None:
+			undo_manager.beginUndoGrouping()
+		try:
+			for master_id, changes in self.changes.items():
+				old_kerning = copied_kerning(self.font.kerning.get(master_id))
+				new_kerning = copied_kerning(old_kerning)
+				# (left key, right key) -> new value, None for removed pairs
+				applied = {}
+				for (left_key, right_key), value in changes.items():
+					if value is REMOVE:
+						right_dict = new_kerning.get(left_key)
+						if right_dict and right_key in right_dict:
+							del right_dict[right_key]
+							removed_count += 1
+							applied[(left_key, right_key)] = None
+							if not right_dict:
+								del new_kerning[left_key]
+					else:
+						right_dict = new_kerning.setdefault(left_key, {})
+						if right_dict.get(right_key) != value:
+							right_dict[right_key] = value
+							set_count += 1
+							applied[(left_key, right_key)] = value
+				if not applied:
+					continue
+				self.font.kerning[master_id] = new_kerning
+				update_kerning_adjacency(self.font, master_id, old_kerning, new_kerning, applied)
+				if undo_manager is not None:
+					self._register_undo(undo_manager, master_id, old_kerning)
+		finally:
+			if undo_manager is not None:
+				undo_manager.endUndoGrouping()
+				undo_manager.setActionName_("Kerning Changes")
+		self.changes = {}
+		return set_count, removed_count
+
+	def _register_undo(self, undo_manager, master_id, kerning):
+		"""Undo restores the master's previous kerning and registers the redo the same way."""
+		font = self.font
+
+		def restore(target):
+			self._register_undo(undo_manager, master_id, copied_kerning(font.kerning.get(master_id)))
+			font.kerning[master_id] = copied_kerning(kerning)
+			invalidate_kerning_adjacency(font, master_id)
+
+		undo_manager.registerUndoWithTarget_handler_(font, restore)
+
+	def _undo_manager(self):
+		try:
+			return self.font.undoManager()
+		except Exception:
+			return None
+
+
+def copied_kerning(kerning):
+	"""Plain nested dict copy of one master's kerning."""
+	return dict((left_key, dict(right_dict)) for left_key, right_dict in (kerning or {}).items())
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""
+Outline collisions of kerned pairs.
+
+The gap of a pair in a band is the right profile of the left glyph plus the
+left profile of the right glyph plus the kerning value; a pair collides when
+its smallest gap over the shared bands is at or below the minimum distance. Every
+kerning pair is first tested once against the band-wise envelope of its
+group members, which can only underestimate the gap; only the pairs that
+fail are expanded to the glyph pairs that actually receive their value.
+Requires NumPy.
+"""
+
+try:
+	import numpy
+except ImportError:
+	numpy = None
+
+from oprCore.kerning_index import kerning_index_for_font
+from oprCore.kerning_resolver import KerningResolver
+from oprCore.profile_cache import profile_cache_for_font
+from oprCore.side_profiles import master_profiles
+
+CHUNK_SIZE = 20000
+
+
+class Collision(object):
+
+	__slots__ = ("left_name", "right_name", "value", "gap", "left_key", "right_key")
+
+	def __init__(self, left_name, right_name, value, gap, left_key, right_key):
+		self.left_name = left_name
+		self.right_name = right_name
+		self.value = value
+		self.gap = gap
+		self.left_key = left_key
+		self.right_key = right_key
+
+	def __repr__(self):
+		return "<Collision %s %s %s: %.0f>" % (self.left_name, self.right_name, self.value, self.gap)
+
+
+def minimum_gaps(right_sides, left_sides, left_rows, right_rows, values, chunk_size=CHUNK_SIZE):
+	"""
+	Smallest gap per pair for (bands)-shaped side profile rows; inf where the
+	two outlines share no band. Works in chunks to bound memory.
+	"""
+	values = numpy.asarray(values, dtype=numpy.float32)
+	gaps = numpy.empty(len(values), dtype=numpy.float32)
+	for start in range(0, len(values), chunk_size):
+		stop = start + chunk_size
+		band_gaps = right_sides[left_rows[start:stop]] + left_sides[right_rows[start:stop]]
+		band_gaps += values[start:stop, None]
+		chunk = numpy.fmin.reduce(band_gaps, axis=1) if band_gaps.shape[1] else numpy.full(len(band_gaps), numpy.nan)
+		gaps[start:stop] = numpy.where(numpy.isnan(chunk), numpy.inf, chunk)
+	return gaps
+
+
+def key_sides(profiles, keys, index, side):
+	"""One profile row per kerning key: the glyph's own, or the envelope of the group members."""
+	source = profiles.left if side == "left" else profiles.right
+	sides = numpy.full((len(keys), source.shape[1]), numpy.nan, dtype=numpy.float32)
+	for row, key in enumerate(keys):
+		members = index.members(key)
+		if len(members) == 1:
+			profile_row = profiles.row_for_name.get(members[0])
+			if profile_row is not None:
+				sides[row] = source[profile_row]
+		elif members:
+			sides[row] = profiles.envelope(members, side)
+	return sides
+
+
+def kerning_collisions(font, master_id, min_distance=0, profiles=None, index=None, chunk_size=CHUNK_SIZE):
+	"""Collisions of all kerned glyph pairs in one master, closest first."""
+	index = index or kerning_index_for_font(font)
+	if profiles is None:
+		profiles = master_profiles(font, master_id, profile_for_layer=profile_cache_for_font(font).profile)
+
+	left_keys, right_keys, values = [], [], []
+	for left_key, right_dict in (font.kerning.get(master_id) or {}).items():
+		for right_key, value in (right_dict or {}).items():
+			if value is not None:
+				left_keys.append(left_key)
+				right_keys.append(right_key)
+				values.append(value)
+	if not values:
+		return []
+
+	unique_left = sorted(set(left_keys))
+	unique_right = sorted(set(right_keys))
+	left_row = dict((key, i) for i, key in enumerate(unique_left))
+	right_row = dict((key, i) for i, key in enumerate(unique_right))
+	key_gaps = minimum_gaps(
+		key_sides(profiles, unique_left, index, "right"),
+		key_sides(profiles, unique_right, index, "left"),
+		numpy.array([left_row[key] for key in left_keys], dtype=numpy.int64),
+		numpy.array([right_row[key] for key in right_keys], dtype=numpy.int64),
+		values,
+		chunk_size,
+	)
+
+	# expand the suspicious kerning pairs to the glyph pairs they really kern
+	resolver = KerningResolver(font, master_id, index=index)
+	candidates = []
+	for position in numpy.nonzero(key_gaps <= min_distance)[0].tolist():
+		left_key, right_key, value = left_keys[position], right_keys[position], values[position]
+		for left_name, right_name in resolver.effective_glyph_pairs(left_key, right_key):
+			candidates.append((left_name, right_name, value, left_key, right_key))
+	if not candidates:
+		return []
+
+	left_rows = profiles.rows([c[0] for c in candidates])
+	right_rows = profiles.rows([c[1] for c in candidates])
+	known = (left_rows >= 0) & (right_rows >= 0)
+	gaps = numpy.full(len(candidates), numpy.inf, dtype=numpy.float32)
+	gaps[known] = minimum_gaps(
+		profiles.right, profiles.left,
+		left_rows[known], right_rows[known],
+		numpy.array([c[2] for c in candidates], dtype=numpy.float32)[known],
+		chunk_size,
+	)
+	collisions = [
+		Collision(left_name, right_name, value, float(gap), left_key, right_key)
+		for (left_name, right_name, value, left_key, right_key), gap in zip(candidates, gaps.tolist())
+		if gap <= min_distance
+	]
+	collisions.sort(key=lambda collision: collision.gap)
+	return collisions
+
+
+def instance_kerning_collisions(instance, min_distance=0, cache=None, chunk_size=CHUNK_SIZE):
+	"""
+	Collisions at an instance, checked on its interpolated font. Profiles go
+	into cache (default: the cache of the instance's font) under the instance's
+	font name and interpolation, as the interpolated font is new on every call;
+	the outline hash, not lastChange, decides whether they are still valid.
+	"""
+	cache = cache or profile_cache_for_font(instance.font)
+	font = instance.interpolatedFont
+	master_id = font.masters[0].id
+	instance_key = instance_cache_key(instance)
+
+	def profile_for_layer(layer):
+		return cache.profile(layer, key="%s\t%s" % (layer.parent.name, instance_key), use_token=False)
+
+	profiles = master_profiles(font, master_id, profile_for_layer=profile_for_layer)
+	return kerning_collisions(font, master_id, min_distance, profiles=profiles, chunk_size=chunk_size)
+
+
+def instance_cache_key(instance):
+	"""Instance names repeat across families (Roman and Italic "Regular"), so the key adds fontName and weights."""
+	interpolations = getattr(instance, "instanceInterpolations", None) or {}
+	weights = ",".join("%s=%r" % (master_id, float(weight)) for master_id, weight in sorted(interpolations.items()))
+	return "%s\t%s\t%s" % (instance.fontName, instance.name, weights)
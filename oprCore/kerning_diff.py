@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+Compare kerning across any number of masters, from one or several fonts.
+
+Glyph IDs differ between fonts, so every source is normalized to glyph names
+(class keys stay as they are) before the sweep over the sorted union of pairs.
+"""
+
+import csv
+import io
+import json
+
+from oprCore.kerning_index import kerning_index_for_font
+
+
+STATUS_MISSING = "missing"
+STATUS_DELTA = "delta"
+STATUS_EQUAL = "equal"
+
+
+class KerningSource(object):
+
+	def __init__(self, font, master, label=None):
+		self.font = font
+		self.master = master
+		self.label = label or master.name
+		self.pairs = normalized_kerning(font, master.id)
+
+
+def normalized_kerning(font, master_id, index=None):
+	"""
+	Flat {(left, right): value} for one master, with glyph IDs replaced by names.
+	Pairs with glyph IDs of deleted glyphs are dropped, like they are at export.
+	"""
+	index = index or kerning_index_for_font(font)
+	name_for_id = index.name_for_id
+	pairs = {}
+	for left_key, right_dict in (font.kerning.get(master_id) or {}).items():
+		if not right_dict:
+			continue
+		left = left_key if left_key[0] == "@" else name_for_id.get(left_key)
+		if left is None:
+			continue
+		for right_key, value in right_dict.items():
+			if value is None:
+				continue
+			right = right_key if right_key[0] == "@" else name_for_id.get(right_key)
+			if right is not None:
+				pairs[(left, right)] = value
+	return pairs
+
+
+def unique_labels(sources):
+	"""Source labels, numbered where two sources share a master name."""
+	return numbered_labels([source.label for source in sources])
+
+
+def numbered_labels(labels):
+	"""Labels with "[n]" appended wherever the same label occurs more than once."""
+	counts = {}
+	for label in labels:
+		counts[label] = counts.get(label, 0) + 1
+	seen = {}
+	result = []
+	for label in labels:
+		if counts[label] > 1:
+			seen[label] = seen.get(label, 0) + 1
+			result.append("%s [%i]" % (label, seen[label]))
+		else:
+			result.append(label)
+	return result
+
+
+def diff_kerning(sources, tolerance=0, include_equal=False):
+	"""
+	Yield (left, right, status, delta, values) for every pair in any source.
+	values is a tuple aligned with sources, None where the pair is missing;
+	delta is max - min over the sources that have the pair.
+	"""
+	tables = [source.pairs for source in sources]
+	all_pairs = set()
+	for table in tables:
+		all_pairs.update(table)
+
+	for pair in sorted(all_pairs):
+		values = tuple(table.get(pair) for table in tables)
+		present = [value for value in values if value is not None]
+		delta = max(present) - min(present)
+		if len(present) < len(values):
+			status = STATUS_MISSING
+		elif delta > tolerance:
+			status = STATUS_DELTA
+		elif include_equal:
+			status = STATUS_EQUAL
+		else:
+			continue
+		yield pair[0], pair[1], status, delta, values
+
+
+def write_diff_csv(rows, path, labels):
+	"""Stream diff rows to a CSV file; returns the number of rows written."""
+	count = 0
+	with io.open(path, "w", encoding="utf-8", newline="") as report:
+		writer = csv.writer(report)
+		writer.writerow(["left", "right", "status", "delta"] + list(labels))
+		for left, right, status, delta, values in rows:
+			writer.writerow([left, right, status, delta] + ["" if value is None else value for value in values])
+			count += 1
+	return count
+
+
+def write_diff_jsonl(rows, path, labels):
+	"""Stream diff rows to a JSON-lines file; returns the number of rows written."""
+	count = 0
+	with io.open(path, "w", encoding="utf-8") as report:
+		for left, right, status, delta, values in rows:
+			record = {
+				"left": left,
+				"right": right,
+				"status": status,
+				"delta": delta,
+				"values": dict(zip(labels, values)),
+			}
+			report.write(json.dumps(record, ensure_ascii=False))
+			report.write("\n")
+			count += 1
+	return count
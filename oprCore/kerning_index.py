@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+"""
+Reverse index between kerning keys and glyphs, built once per font.
+
+font.kerning uses "@MMK_L_<group>" / "@MMK_R_<group>" for classes and glyph
+IDs for single glyphs. A left key "@MMK_L_x" collects every glyph whose
+rightKerningGroup is x, and a right key "@MMK_R_x" every glyph whose
+leftKerningGroup is x.
+
+The cache holds fonts weakly, so closed fonts are freed with their index.
+kerning_index_from_dicts() builds an index from plain dicts, for checks
+outside Glyphs.
+"""
+
+import weakref
+
+LEFT_GROUP_PREFIX = "@MMK_L_"
+RIGHT_GROUP_PREFIX = "@MMK_R_"
+# fonts that cannot be weakly referenced are cached strongly, only the most recent few
+MAX_STRONG_FONTS = 4
+
+_index_cache = weakref.WeakKeyDictionary()
+_strong_index_cache = []
+
+
+def group_signature(font):
+	"""Hash of everything the index depends on: glyph IDs, names and groups."""
+	return hash(tuple(
+		(glyph.id, glyph.name, glyph.leftKerningGroup, glyph.rightKerningGroup)
+		for glyph in font.glyphs
+	))
+
+
+class KerningGroupIndex(object):
+
+	def __init__(self, font, weak=True):
+		self._font = lambda: font
+		if weak:
+			try:
+				# so the cached index does not keep its font alive
+				self._font = weakref.ref(font)
+			except TypeError:
+				pass
+		self.rebuild()
+
+	@property
+	def font(self):
+		return self._font()
+
+	def rebuild(self):
+		self.glyph_names = []
+		self.name_for_id = {}
+		self.id_for_name = {}
+		self.left_key_for_glyph = {}
+		self.right_key_for_glyph = {}
+		self.members_for_key = {}
+		self.key_glyph_for_key = {}
+
+		signature_items = []
+		for glyph in self.font.glyphs:
+			name = glyph.name
+			glyph_id = glyph.id
+			left_group = glyph.leftKerningGroup
+			right_group = glyph.rightKerningGroup
+			signature_items.append((glyph_id, name, left_group, right_group))
+
+			self.glyph_names.append(name)
+			self.name_for_id[glyph_id] = name
+			self.id_for_name[name] = glyph_id
+
+			# the glyph's right group is what it uses when it stands on the left
+			if right_group:
+				key = LEFT_GROUP_PREFIX + right_group
+				self.left_key_for_glyph[name] = key
+				self.members_for_key.setdefault(key, []).append(name)
+			if left_group:
+				key = RIGHT_GROUP_PREFIX + left_group
+				self.right_key_for_glyph[name] = key
+				self.members_for_key.setdefault(key, []).append(name)
+
+		for key, members in self.members_for_key.items():
+			group_name = key[7:]
+			self.key_glyph_for_key[key] = group_name if group_name in members else members[0]
+
+		self.signature = hash(tuple(signature_items))
+
+	def is_current(self):
+		return self.signature == group_signature(self.font)
+
+	def is_group_key(self, key):
+		return bool(key) and key[0] == "@"
+
+	def glyph_name(self, key):
+		"""Glyph name for a glyph ID or name, or None."""
+		if key in self.name_for_id:
+			return self.name_for_id[key]
+		if key in self.id_for_name:
+			return key
+		return None
+
+	def members(self, key):
+		"""Glyph names behind a kerning key, in font order."""
+		if self.is_group_key(key):
+			return self.members_for_key.get(key, [])
+		name = self.glyph_name(key)
+		return [name] if name else []
+
+	def key_glyph(self, key):
+		"""Representative glyph name for a kerning key, or None for empty groups and unknown IDs."""
+		if self.is_group_key(key):
+			return self.key_glyph_for_key.get(key)
+		return self.glyph_name(key)
+
+	def left_key(self, glyph_name):
+		"""Class key used when the glyph is on the left side of a pair, or None."""
+		return self.left_key_for_glyph.get(glyph_name)
+
+	def right_key(self, glyph_name):
+		"""Class key used when the glyph is on the right side of a pair, or None."""
+		return self.right_key_for_glyph.get(glyph_name)
+
+	def display_name(self, key):
+		if not key:
+			return "???"
+		if self.is_group_key(key):
+			return "@%s" % key[7:]
+		return self.glyph_name(key) or key
+
+
+def cached_kerning_index(font):
+	try:
+		return _index_cache.get(font)
+	except TypeError:
+		for index in _strong_index_cache:
+			if index.font is font:
+				return index
+		return None
+
+
+def cache_kerning_index(font, index):
+	try:
+		_index_cache[font] = index
+	except TypeError:
+		_strong_index_cache.insert(0, index)
+		del _strong_index_cache[MAX_STRONG_FONTS:]
+
+
+def kerning_index_for_font(font, check=True):
+	"""
+	Return the cached index for font, rebuilding it when glyph IDs, names or
+	kerning groups have changed since it was built. Pass check=False inside a
+	single script run once the index is known to be fresh.
+	"""
+	cached = cached_kerning_index(font)
+	if cached is not None:
+		if not check or cached.is_current():
+			return cached
+		cached.rebuild()
+		return cached
+
+	index = KerningGroupIndex(font)
+	cache_kerning_index(font, index)
+	return index
+
+
+def invalidate_kerning_index(font=None):
+	"""Drop the cached index for font, or for all fonts."""
+	if font is None:
+		_index_cache.clear()
+		del _strong_index_cache[:]
+		return
+	try:
+		_index_cache.pop(font, None)
+	except TypeError:
+		_strong_index_cache[:] = [index for index in _strong_index_cache if index.font is not font]
+
+
+class _FixtureGlyph(object):
+
+	def __init__(self, name, glyph_id=None, leftKerningGroup=None, rightKerningGroup=None):
+		self.name = name
+		self.id = glyph_id or name
+		self.leftKerningGroup = leftKerningGroup
+		self.rightKerningGroup = rightKerningGroup
+
+
+class _FixtureFont(object):
+
+	def __init__(self, glyphs, kerning=None):
+		self.glyphs = glyphs
+		self.kerning = kerning or {}
+
+
+def kerning_index_from_dicts(glyphs, kerning=None):
+	"""
+	Index for a font described by plain data: glyphs is a list of dicts with
+	"name" and optional "id", "leftKerningGroup" and "rightKerningGroup"
+	(glyph IDs default to the names); kerning is {master ID: {left: {right: value}}}.
+	The index holds its fixture font, available as index.font.
+
+		index = kerning_index_from_dicts([
+			{"name": "A", "rightKerningGroup": "A"},
+			{"name": "Aacute", "rightKerningGroup": "A"},
+		])
+		index.members("@MMK_L_A")  # ["A", "Aacute"]
+	"""
+	font = _FixtureFont([
+		_FixtureGlyph(
+			glyph["name"],
+			glyph.get("id"),
+			glyph.get("leftKerningGroup"),
+			glyph.get("rightKerningGroup"),
+		)
+		for glyph in glyphs
+	], kerning)
+	return KerningGroupIndex(font, weak=False)
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""
+Kerning at instance locations.
+
+Each instance gets one weight per master: Glyphs' own instanceInterpolations
+where available, otherwise a fontTools VariationModel over the master and
+instance axis coordinates. With the masters stacked in a KerningMatrix, the
+kerning of every pair at every instance is one matrix product. Pairs that
+are missing in a master take the value Glyphs resolves there through class
+kerning (0 if nothing applies), and are flagged. Requires NumPy.
+"""
+
+import csv
+import io
+import os
+
+try:
+	import numpy
+except ImportError:
+	numpy = None
+
+try:
+	from fontTools.varLib.models import VariationModel
+except ImportError:
+	VariationModel = None
+
+from oprCore.kerning_diff import numbered_labels
+
+
+def normalized_locations(master_coordinates, instance_coordinates, origin_index=0):
+	"""Axis coordinates normalized to -1..0..1 around the origin master, as dicts for VariationModel."""
+	origin = master_coordinates[origin_index]
+	axis_count = len(origin)
+	minimums = [min(coordinates[axis] for coordinates in master_coordinates) for axis in range(axis_count)]
+	maximums = [max(coordinates[axis] for coordinates in master_coordinates) for axis in range(axis_count)]
+
+	def normalize(coordinates):
+		location = {}
+		for axis in range(axis_count):
+			value = coordinates[axis]
+			if value < origin[axis] and origin[axis] > minimums[axis]:
+				location["axis%i" % axis] = (value - origin[axis]) / float(origin[axis] - minimums[axis])
+			elif value > origin[axis] and maximums[axis] > origin[axis]:
+				location["axis%i" % axis] = (value - origin[axis]) / float(maximums[axis] - origin[axis])
+		return location
+
+	return [normalize(c) for c in master_coordinates], [normalize(c) for c in instance_coordinates]
+
+
+def model_weights(master_coordinates, instance_coordinates, origin_index=0):
+	"""(instances, masters) weights from a fontTools VariationModel."""
+	master_locations, instance_locations = normalized_locations(master_coordinates, instance_coordinates, origin_index)
+	model = VariationModel(master_locations)
+	return numpy.array([model.getMasterScalars(location) for location in instance_locations], dtype=numpy.float64)
+
+
+def instance_weights(font, instances, master_ids):
+	"""
+	(instances, masters) interpolation weights in master_ids order, from
+	instanceInterpolations or, failing that, from the axis coordinates.
+	"""
+	master_number = dict((master_id, i) for i, master_id in enumerate(master_ids))
+	weights = numpy.zeros((len(instances), len(master_ids)), dtype=numpy.float64)
+	missing = []
+	for row, instance in enumerate(instances):
+		interpolations = getattr(instance, "instanceInterpolations", None)
+		if not interpolations:
+			missing.append(row)
+			continue
+		for master_id, weight in interpolations.items():
+			if master_id in master_number:
+				weights[row, master_number[master_id]] = weight
+
+	if missing:
+		if VariationModel is None:
+			raise ImportError("fontTools is needed to interpolate instances without instanceInterpolations.")
+		masters = dict((master.id, master) for master in font.masters)
+		master_coordinates = [list(masters[master_id].axes) for master_id in master_ids]
+		instance_coordinates = [list(instances[row].axes) for row in missing]
+		weights[missing] = model_weights(master_coordinates, instance_coordinates)
+	return weights
+
+
+def effective_master_values(matrix, resolvers=None):
+	"""
+	(pairs, masters) kerning of the KerningMatrix; cells missing in a master
+	get the fallback value of that master's KerningResolver (resolvers is
+	{master ID: resolver}), or 0 without one.
+	"""
+	values = numpy.where(matrix.present, matrix.values, 0).astype(numpy.float64)
+	if resolvers:
+		missing_rows, missing_columns = numpy.nonzero(~matrix.present)
+		for position, column in zip(missing_rows.tolist(), missing_columns.tolist()):
+			resolver = resolvers.get(matrix.master_ids[column])
+			if resolver is not None:
+				values[position, column] = resolver.fallback_value(*matrix.pair(position))
+	return values
+
+
+def interpolated_values(matrix, weights, master_values=None):
+	"""(pairs, instances) kerning for every pair of the KerningMatrix at every instance."""
+	if master_values is None:
+		master_values = effective_master_values(matrix)
+	return master_values @ weights.T
+
+
+def interpolation_flags(matrix, instance_values, threshold=None, master_values=None):
+	"""
+	Boolean arrays per pair: crosses_zero (instances disagree in sign),
+	exceeds (|value| above threshold at any instance), master_sign (masters
+	disagree in sign) and partial (missing in some masters).
+	"""
+	if master_values is None:
+		master_values = effective_master_values(matrix)
+	flags = {
+		"crosses_zero": (instance_values.min(axis=1) < 0) & (instance_values.max(axis=1) > 0),
+		"master_sign": (master_values.min(axis=1) < 0) & (master_values.max(axis=1) > 0),
+		"partial": ~matrix.present.all(axis=1),
+	}
+	if threshold is not None:
+		flags["exceeds"] = (numpy.abs(instance_values) > threshold).any(axis=1)
+	return flags
+
+
+def write_instance_tables(matrix, instance_values, instance_names, folder, key_name=None):
+	"""
+	Write one left,right,value CSV per instance into folder; returns the paths.
+	Instances sharing a name get numbered files, "name [n] kerning.csv".
+	"""
+	key_name = key_name or (lambda key: key)
+	rows = matrix.rows().tolist()
+	lefts = [key_name(matrix.left_keys[row]) for row in rows]
+	rights = [key_name(matrix.right_keys[column]) for column in matrix.indices.tolist()]
+	paths = []
+	for column, instance_name in enumerate(numbered_labels(list(instance_names))):
+		path = os.path.join(folder, "%s kerning.csv" % instance_name)
+		values = numpy.round(instance_values[:, column]).astype(int).tolist()
+		with io.open(path, "w", encoding="utf-8", newline="") as table:
+			writer = csv.writer(table)
+			writer.writerow(["left", "right", "value"])
+			for left, right, value in zip(lefts, rights, values):
+				if value:
+					writer.writerow([left, right, value])
+		paths.append(path)
+	return paths
@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+"""
+Streaming kerning export and import.
+
+iter_kerning() yields one master's pairs with glyph names instead of IDs,
+straight from font.kerning, and the writers consume any such iterable in
+chunks without building intermediate lists: CSV and JSON lines carry a
+master column, UFO kerning.plist/groups.plist use public.kern1/public.kern2
+group names. The readers are plain Python generators that work outside
+Glyphs, and import_kerning() applies rows to a font in batches.
+"""
+
+import csv
+import io
+import json
+from itertools import islice
+from xml.etree.ElementTree import iterparse
+from xml.sax.saxutils import escape
+
+from oprCore.kerning_changes import KerningChangeSet
+from oprCore.kerning_index import LEFT_GROUP_PREFIX, RIGHT_GROUP_PREFIX, kerning_index_for_font
+
+CHUNK_SIZE = 10000
+BATCH_SIZE = 50000
+UFO_LEFT_PREFIX = "public.kern1."
+UFO_RIGHT_PREFIX = "public.kern2."
+CSV_HEADER = ["master", "left", "right", "value"]
+
+PLIST_HEADER = (
+	'<?xml version="1.0" encoding="UTF-8"?>\n'
+	'<!DOCTYPE plist PUBLIC "-//Apple//DTD PLIST 1.0//EN" "http://www.apple.com/DTDs/PropertyList-1.0.dtd">\n'
+	'<plist version="1.0">\n<dict>\n'
+)
+PLIST_FOOTER = "</dict>\n</plist>\n"
+
+
+def iter_kerning(font, master_id, index=None):
+	"""Yield (left, right, value) for one master; glyph IDs become names, class keys stay."""
+	index = index or kerning_index_for_font(font)
+	name_for_id = index.name_for_id
+	for left_key, right_dict in (font.kerning.get(master_id) or {}).items():
+		if not right_dict:
+			continue
+		left = left_key if left_key[0] == "@" else name_for_id.get(left_key)
+		if left is None:
+			continue
+		for right_key, value in right_dict.items():
+			if value is None:
+				continue
+			right = right_key if right_key[0] == "@" else name_for_id.get(right_key)
+			if right is not None:
+				yield left, right, value
+
+
+def iter_font_kerning(font, masters=None, index=None):
+	"""Yield (master name, left, right, value) for all (or the given) masters."""
+	index = index or kerning_index_for_font(font)
+	for master in masters or font.masters:
+		for left, right, value in iter_kerning(font, master.id, index):
+			yield master.name, left, right, value
+
+
+def chunks(rows, size=CHUNK_SIZE):
+	rows = iter(rows)
+	while True:
+		chunk = list(islice(rows, size))
+		if not chunk:
+			return
+		yield chunk
+
+
+def write_kerning_csv(rows, path, chunk_size=CHUNK_SIZE):
+	"""Write (master, left, right, value) rows to CSV; returns the number of rows."""
+	count = 0
+	with io.open(path, "w", encoding="utf-8", newline="") as table:
+		writer = csv.writer(table)
+		writer.writerow(CSV_HEADER)
+		for chunk in chunks(rows, chunk_size):
+			writer.writerows(chunk)
+			count += len(chunk)
+	return count
+
+
+def write_kerning_jsonl(rows, path, chunk_size=CHUNK_SIZE):
+	"""Write (master, left, right, value) rows as JSON lines; returns the number of rows."""
+	count = 0
+	with io.open(path, "w", encoding="utf-8") as lines:
+		for chunk in chunks(rows, chunk_size):
+			lines.write("".join(
+				json.dumps({"master": master, "left": left, "right": right, "value": value}, ensure_ascii=False) + "\n"
+				for master, left, right, value in chunk
+			))
+			count += len(chunk)
+	return count
+
+
+def ufo_key(key):
+	if key.startswith(LEFT_GROUP_PREFIX):
+		return UFO_LEFT_PREFIX + key[len(LEFT_GROUP_PREFIX):]
+	if key.startswith(RIGHT_GROUP_PREFIX):
+		return UFO_RIGHT_PREFIX + key[len(RIGHT_GROUP_PREFIX):]
+	return key
+
+
+def glyphs_key(key):
+	if key.startswith(UFO_LEFT_PREFIX):
+		return LEFT_GROUP_PREFIX + key[len(UFO_LEFT_PREFIX):]
+	if key.startswith(UFO_RIGHT_PREFIX):
+		return RIGHT_GROUP_PREFIX + key[len(UFO_RIGHT_PREFIX):]
+	return key
+
+
+def plist_number(value):
+	if value == int(value):
+		return "<integer>%i</integer>" % value
+	return "<real>%r</real>" % float(value)
+
+
+def write_ufo_kerning(pairs, path):
+	"""
+	Write (left, right, value) pairs of one master as a UFO kerning.plist.
+	Pairs must arrive grouped by left key, as iter_kerning() yields them.
+	Returns the number of pairs.
+	"""
+	count = 0
+	current = None
+	with io.open(path, "w", encoding="utf-8") as plist:
+		plist.write(PLIST_HEADER)
+		for left, right, value in pairs:
+			if left != current:
+				if current is not None:
+					plist.write("\t</dict>\n")
+				plist.write("\t<key>%s</key>\n\t<dict>\n" % escape(ufo_key(left)))
+				current = left
+			plist.write("\t\t<key>%s</key>\n\t\t%s\n" % (escape(ufo_key(right)), plist_number(value)))
+			count += 1
+		if current is not None:
+			plist.write("\t</dict>\n")
+		plist.write(PLIST_FOOTER)
+	return count
+
+
+def write_ufo_groups(font, path, index=None):
+	"""Write the font's kerning groups as a UFO groups.plist; returns the number of groups."""
+	index = index or kerning_index_for_font(font)
+	count = 0
+	with io.open(path, "w", encoding="utf-8") as plist:
+		plist.write(PLIST_HEADER)
+		for key in sorted(index.members_for_key):
+			if not index.is_group_key(key):
+				continue
+			plist.write("\t<key>%s</key>\n\t<array>\n" % escape(ufo_key(key)))
+			for name in index.members(key):
+				plist.write("\t\t<string>%s</string>\n" % escape(name))
+			plist.write("\t</array>\n")
+			count += 1
+		plist.write(PLIST_FOOTER)
+	return count
+
+
+def read_kerning_csv(path):
+	"""Yield (master, left, right, value) from a CSV written by write_kerning_csv()."""
+	with io.open(path, encoding="utf-8", newline="") as table:
+		reader = csv.reader(table)
+		header = next(reader, None)
+		if header != CSV_HEADER:
+			raise ValueError("Not a kerning CSV: expected columns %s" % ", ".join(CSV_HEADER))
+		for row in reader:
+			if len(row) == 4:
+				yield row[0], row[1], row[2], number(row[3])
+
+
+def read_kerning_jsonl(path):
+	"""Yield (master, left, right, value) from a JSON-lines file."""
+	with io.open(path, encoding="utf-8") as lines:
+		for line_number, line in enumerate(lines, 1):
+			if not line.strip():
+				continue
+			try:
+				record = json.loads(line)
+			except ValueError as e:
+				raise ValueError("Not a kerning JSON-lines file: line %i is not JSON (%s)" % (line_number, e))
+			if not isinstance(record, dict) or any(field not in record for field in ("left", "right", "value")):
+				raise ValueError("Not a kerning JSON-lines file: line %i needs left, right and value" % line_number)
+			yield record.get("master"), record["left"], record["right"], record["value"]
+
+
+def read_ufo_kerning(path):
+	"""Yield (left, right, value) from a UFO kerning.plist, parsing it incrementally."""
+	depth = 0
+	left = None
+	right = None
+	for event, element in iterparse(path, events=("start", "end")):
+		if event == "start":
+			if element.tag == "dict":
+				depth += 1
+			continue
+		if element.tag == "dict":
+			depth -= 1
+			if depth == 1:
+				left = None
+		elif element.tag == "key":
+			if depth == 1:
+				left = glyphs_key(element.text or "")
+			elif depth == 2:
+				right = glyphs_key(element.text or "")
+		elif element.tag in ("integer", "real") and depth == 2 and left is not None:
+			yield left, right, number(element.text)
+		element.clear()
+
+
+def number(text):
+	value = float(text)
+	return int(value) if value == int(value) else value
+
+
+def import_kerning(font, rows, master_id=None, batch_size=BATCH_SIZE, clear=False):
+	"""
+	Apply (master, left, right, value) rows to font in batches of batch_size,
+	one undoable write per master and batch. The master column may hold a
+	master name or ID; with master_id, rows are (left, right, value) for that
+	master. clear=True empties every master that receives rows first.
+	Returns (written, skipped), skipped counting unknown masters and keys.
+	"""
+	master_for_label = {}
+	for master in font.masters:
+		master_for_label[master.name] = master.id
+		master_for_label[master.id] = master.id
+	index = kerning_index_for_font(font)
+	cleared = set()
+	written = 0
+	skipped = 0
+	for chunk in chunks(rows, batch_size):
+		changes = KerningChangeSet(font, index=index)
+		for row in chunk:
+			if master_id is not None:
+				target = master_id
+				left, right, value = row
+			else:
+				label, left, right, value = row
+				target = master_for_label.get(label)
+				if target is None:
+					skipped += 1
+					continue
+			if clear and target not in cleared:
+				# through the change set, so clearing is undone together with the import
+				for left_key, right_dict in (font.kerning.get(target) or {}).items():
+					for right_key in right_dict or {}:
+						changes.remove_raw(target, left_key, right_key)
+				cleared.add(target)
+			if changes.set(target, left, right, value):
+				written += 1
+			else:
+				skipped += 1
+		changes.apply()
+	return written, skipped
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""
+Journal of the kerning a cleanup script left behind on its last run.
+
+The journal stores the value of every (master, left, right) pair as it was
+after the last run, plus a digest of the kerning groups, in a JSON sidecar
+next to the .glyphs file, together with the script's settings. Unsaved
+fonts get no journal, so the kerning never ends up in the font's userData.
+changed_pairs() then yields only pairs that were added or edited since.
+Every left row is stored with an order-independent digest, so unchanged
+rows are skipped by comparing one number, without copying the row. If
+glyph names, groups or settings changed, every pair counts as changed;
+that check runs once per journal, not once per master.
+"""
+
+import hashlib
+import io
+import json
+import os
+import zlib
+
+JOURNAL_SUFFIX = ".kerning-journal.json"
+JOURNAL_VERSION = 2
+
+
+def groups_digest(font):
+	"""Stable digest of glyph IDs, names and kerning groups."""
+	digest = hashlib.sha1()
+	for glyph in font.glyphs:
+		digest.update(("%s\t%s\t%s\t%s\n" % (
+			glyph.id, glyph.name, glyph.leftKerningGroup, glyph.rightKerningGroup,
+		)).encode("utf-8"))
+	return digest.hexdigest()
+
+
+def row_digest(right_dict):
+	"""Fingerprint of one left key's row, independent of order and stable across sessions."""
+	total = 0
+	count = 0
+	for right_key, value in right_dict.items():
+		if value is not None:
+			total += zlib.crc32(("%s\t%r" % (right_key, float(value))).encode("utf-8"))
+			count += 1
+	return "%i:%x" % (count, total)
+
+
+def kerning_rows(font, master_id):
+	"""{left key: [row digest, {right key: value}]} for one master."""
+	rows = {}
+	for left_key, right_dict in (font.kerning.get(master_id) or {}).items():
+		if right_dict:
+			values = dict((right_key, value) for right_key, value in right_dict.items() if value is not None)
+			rows[left_key] = [row_digest(values), values]
+	return rows
+
+
+class KerningJournal(object):
+	"""Last-run kerning state of one cleanup script (name) for one font."""
+
+	def __init__(self, font, name, settings=None):
+		self.font = font
+		self.name = name
+		self.settings = settings or {}
+		self.recorded_settings = None
+		self.groups = None
+		self.masters = {}
+		self._current = None
+		self.load()
+
+	@property
+	def path(self):
+		file_path = getattr(self.font, "filepath", None)
+		if not file_path:
+			return None
+		return "%s.%s%s" % (os.path.splitext(file_path)[0], self.name, JOURNAL_SUFFIX)
+
+	def load(self):
+		data = None
+		path = self.path
+		if path and os.path.exists(path):
+			try:
+				with io.open(path, encoding="utf-8") as journal:
+					data = json.load(journal)
+			except (IOError, OSError, ValueError):
+				data = None
+		# journals of an older layout count as no journal
+		if data and data.get("version") == JOURNAL_VERSION:
+			self.groups = data.get("groups")
+			self.recorded_settings = data.get("settings") or {}
+			self.masters = data.get("masters") or {}
+		else:
+			data = None
+		self._current = None
+		return bool(data)
+
+	def is_available(self):
+		"""Journals live next to the .glyphs file, so unsaved fonts have none."""
+		return self.path is not None
+
+	def is_empty(self):
+		return not self.masters
+
+	def is_current(self):
+		"""
+		True if groups and settings are unchanged since the journal was written,
+		so deltas are meaningful. Computed once; the font is not expected to
+		change its groups while a script run uses the journal.
+		"""
+		if self._current is None:
+			self._current = (
+				bool(self.masters)
+				and self.recorded_settings == self.settings
+				and self.groups == groups_digest(self.font)
+			)
+		return self._current
+
+	def changed_pairs(self, master_id):
+		"""Yield (left key, right key, value) added or edited since the last run."""
+		journal = self.masters.get(master_id) if self.is_current() else None
+		journal = journal or {}
+		for left_key, right_dict in (self.font.kerning.get(master_id) or {}).items():
+			if not right_dict:
+				continue
+			stored = journal.get(left_key)
+			if stored is not None and stored[0] == row_digest(right_dict):
+				continue
+			previous = stored[1] if stored is not None else {}
+			for right_key, value in right_dict.items():
+				if value is not None and previous.get(right_key) != value:
+					yield left_key, right_key, value
+
+	def unchanged_values(self, master_id):
+		"""Values of the pairs that are still as the last run left them."""
+		journal = self.masters.get(master_id) if self.is_current() else None
+		if not journal:
+			return []
+		values = []
+		kerning = self.font.kerning.get(master_id) or {}
+		for left_key, (digest, previous) in journal.items():
+			right_dict = kerning.get(left_key)
+			if not right_dict:
+				continue
+			if row_digest(right_dict) == digest:
+				values.extend(previous.values())
+				continue
+			for right_key, value in previous.items():
+				if right_dict.get(right_key) == value:
+					values.append(value)
+		return values
+
+	def record(self):
+		"""Remember the font's current kerning as the result of this run and save; a no-op for unsaved fonts."""
+		if not self.is_available():
+			return
+		self.groups = groups_digest(self.font)
+		self.recorded_settings = dict(self.settings)
+		self.masters = dict((master.id, kerning_rows(self.font, master.id)) for master in self.font.masters)
+		self._current = None
+		self.save()
+
+	def save(self):
+		data = {
+			"version": JOURNAL_VERSION,
+			"groups": self.groups,
+			"settings": self.recorded_settings,
+			"masters": self.masters,
+		}
+		path = self.path
+		if not path:
+			return
+		temporary_path = path + ".tmp"
+		with io.open(temporary_path, "w", encoding="utf-8") as journal:
+			journal.write(json.dumps(data, separators=(",", ":"), ensure_ascii=False))
+		os.replace(temporary_path, path)
+
+	def clear(self):
+		self.groups = None
+		self.recorded_settings = None
+		self.masters = {}
+		self._current = None
+		path = self.path
+		if path and os.path.exists(path):
+			os.remove(path)
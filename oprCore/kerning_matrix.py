@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""
+Compact NumPy representation of the kerning of all masters.
+
+Left and right keys are interned to integer IDs. The pairs of all masters
+share one CSR layout (indptr/indices over left rows and right columns), and
+the values form an (nnz, masters) array with a presence mask, so masters are
+stacked along the last axis. class_block() gives the class-class part as a
+dense array. Requires NumPy.
+"""
+
+try:
+	import numpy
+except ImportError:
+	numpy = None
+
+
+class KerningMatrix(object):
+
+	def __init__(self, master_ids, left_keys, right_keys, indptr, indices, values, present):
+		self.master_ids = list(master_ids)
+		self.left_keys = list(left_keys)
+		self.right_keys = list(right_keys)
+		self.left_id = dict((key, i) for i, key in enumerate(self.left_keys))
+		self.right_id = dict((key, i) for i, key in enumerate(self.right_keys))
+		self.indptr = indptr
+		self.indices = indices
+		self.values = values
+		self.present = present
+
+	@property
+	def shape(self):
+		return len(self.left_keys), len(self.right_keys), len(self.master_ids)
+
+	@property
+	def nbytes(self):
+		return self.indptr.nbytes + self.indices.nbytes + self.values.nbytes + self.present.nbytes
+
+	def __len__(self):
+		return len(self.indices)
+
+	def rows(self):
+		"""Left key ID for every stored pair, aligned with indices and values."""
+		return numpy.repeat(numpy.arange(len(self.left_keys), dtype=numpy.int32), numpy.diff(self.indptr))
+
+	def pair(self, position):
+		row = int(numpy.searchsorted(self.indptr, position, side="right") - 1)
+		return self.left_keys[row], self.right_keys[int(self.indices[position])]
+
+	def position(self, left_key, right_key):
+		"""Index of the pair in indices/values, or None."""
+		row = self.left_id.get(left_key)
+		column = self.right_id.get(right_key)
+		if row is None or column is None:
+			return None
+		start, end = self.indptr[row], self.indptr[row + 1]
+		found = start + numpy.searchsorted(self.indices[start:end], column)
+		if found < end and self.indices[found] == column:
+			return int(found)
+		return None
+
+	def value(self, left_key, right_key, master_index, default=None):
+		position = self.position(left_key, right_key)
+		if position is None or not self.present[position, master_index]:
+			return default
+		return self.values[position, master_index].item()
+
+	def class_block(self, dtype=None):
+		"""
+		Dense (left classes, right classes, masters) array of class-class
+		pairs, int16 by default, plus the presence mask and both key lists.
+		"""
+		dtype = dtype or numpy.int16
+		left_classes = [key for key in self.left_keys if key[0] == "@"]
+		right_classes = [key for key in self.right_keys if key[0] == "@"]
+		left_number = numpy.full(len(self.left_keys), -1, dtype=numpy.int32)
+		right_number = numpy.full(len(self.right_keys), -1, dtype=numpy.int32)
+		for i, key in enumerate(left_classes):
+			left_number[self.left_id[key]] = i
+		for i, key in enumerate(right_classes):
+			right_number[self.right_id[key]] = i
+
+		rows = left_number[self.rows()]
+		columns = right_number[self.indices]
+		selected = (rows >= 0) & (columns >= 0)
+		block = numpy.zeros((len(left_classes), len(right_classes), len(self.master_ids)), dtype=dtype)
+		mask = numpy.zeros(block.shape, dtype=bool)
+		block[rows[selected], columns[selected]] = numpy.round(self.values[selected]).astype(dtype)
+		mask[rows[selected], columns[selected]] = self.present[selected]
+		return block, mask, left_classes, right_classes
+
+	def to_kerning_dicts(self):
+		"""{master ID: {left: {right: value}}} as font.kerning stores it."""
+		kerning = dict((master_id, {}) for master_id in self.master_ids)
+		left_of_pair = [self.left_keys[row] for row in self.rows().tolist()]
+		right_of_pair = [self.right_keys[column] for column in self.indices.tolist()]
+		for master_index, master_id in enumerate(self.master_ids):
+			master_kerning = kerning[master_id]
+			master_values = self.values[:, master_index].tolist()
+			for position in numpy.flatnonzero(self.present[:, master_index]).tolist():
+				master_kerning.setdefault(left_of_pair[position], {})[right_of_pair[position]] = master_values[position]
+		return kerning
+
+
+def kerning_matrix_from_dicts(kerning_by_master, dtype=None):
+	"""Build a KerningMatrix from {master ID: {left: {right: value}}}."""
+	dtype = dtype or numpy.float32
+	master_ids = list(kerning_by_master)
+	left_id = {}
+	right_id = {}
+	rows = []
+	columns = []
+	masters = []
+	pair_values = []
+	for master_index, master_id in enumerate(master_ids):
+		for left_key, right_dict in kerning_by_master[master_id].items():
+			if not right_dict:
+				continue
+			row = left_id.setdefault(left_key, len(left_id))
+			for right_key, value in right_dict.items():
+				if value is None:
+					continue
+				rows.append(row)
+				columns.append(right_id.setdefault(right_key, len(right_id)))
+				masters.append(master_index)
+				pair_values.append(value)
+
+	# renumber keys in sorted order so the layout does not depend on dict order
+	left_keys = sorted(left_id)
+	right_keys = sorted(right_id)
+	left_order = numpy.zeros(len(left_keys), dtype=numpy.int64)
+	left_order[[left_id[key] for key in left_keys]] = numpy.arange(len(left_keys))
+	right_order = numpy.zeros(len(right_keys), dtype=numpy.int64)
+	right_order[[right_id[key] for key in right_keys]] = numpy.arange(len(right_keys))
+
+	rows = left_order[numpy.asarray(rows, dtype=numpy.int64)]
+	columns = right_order[numpy.asarray(columns, dtype=numpy.int64)]
+	# union of pairs over all masters, so they share one layout
+	flat, position = numpy.unique(rows * max(len(right_keys), 1) + columns, return_inverse=True)
+	pair_rows = flat // max(len(right_keys), 1)
+	indices = (flat % max(len(right_keys), 1)).astype(numpy.int32)
+	indptr = numpy.zeros(len(left_keys) + 1, dtype=numpy.int64)
+	numpy.cumsum(numpy.bincount(pair_rows, minlength=len(left_keys)), out=indptr[1:])
+
+	values = numpy.zeros((len(flat), len(master_ids)), dtype=dtype)
+	present = numpy.zeros((len(flat), len(master_ids)), dtype=bool)
+	masters = numpy.asarray(masters, dtype=numpy.int64)
+	values[position, masters] = numpy.asarray(pair_values, dtype=numpy.float64)
+	present[position, masters] = True
+	return KerningMatrix(master_ids, left_keys, right_keys, indptr, indices, values, present)
+
+
+def kerning_matrix_from_font(font, masters=None, dtype=None):
+	"""KerningMatrix of the font's kerning for all (or the given) masters."""
+	return kerning_matrix_from_dicts(
+		dict((master.id, font.kerning.get(master.id) or {}) for master in masters or font.masters),
+		dtype=dtype,
+	)
+
+
+def apply_kerning_matrix(font, matrix):
+	"""Replace the kerning of the matrix's masters in font, one assignment per master."""
+	for master_id, master_kerning in matrix.to_kerning_dicts().items():
+		font.kerning[master_id] = master_kerning
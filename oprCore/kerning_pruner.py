@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+Find kerning pairs that do not change the kerning of any glyph pair.
+
+A pair is redundant in a master when it can never apply (a side has no
+glyphs, or every glyph pair it covers is taken by a higher exception), or
+when each glyph pair it covers would get the same value from the next pair
+in the precedence chain without it. Pairs are checked highest precedence
+first and dropped as they are found, so removing them together is as safe
+as removing any one of them. Only pairs that are redundant in every master
+that has them are removable, so interpolation does not change.
+"""
+
+from oprCore.kerning_changes import KerningChangeSet
+from oprCore.kerning_resolver import kerning_resolvers_for_font
+
+
+REASON_DEAD = "dead key"
+REASON_SHADOWED = "never applies"
+REASON_SAME_AS_CLASS = "same as class value"
+REASON_ZERO = "zero class pair"
+
+
+def fallback_value(resolver, left_name, right_name, key):
+	"""Value the glyph pair would get if key were removed."""
+	candidates = resolver.candidate_keys(left_name, right_name)
+	pairs = resolver.pairs
+	for candidate in candidates[candidates.index(key) + 1:]:
+		if candidate in pairs:
+			return pairs[candidate]
+	return 0
+
+
+def redundancy_reason(resolver, left_key, right_key, value):
+	index = resolver.index
+	if not index.members(left_key) or not index.members(right_key):
+		return REASON_DEAD
+	if index.is_group_key(left_key) and index.is_group_key(right_key):
+		# class pairs are only redundant at zero
+		covered = list(resolver.effective_glyph_pairs(left_key, right_key))
+		if not covered:
+			return REASON_SHADOWED
+		return REASON_ZERO if value == 0 else None
+
+	covered = False
+	for left_name, right_name in resolver.effective_glyph_pairs(left_key, right_key):
+		covered = True
+		if fallback_value(resolver, left_name, right_name, (left_key, right_key)) != value:
+			return None
+	if not covered:
+		return REASON_SHADOWED
+	return REASON_SAME_AS_CLASS
+
+
+def precedence_order(pair):
+	left_key, right_key = pair
+	# glyph-glyph, glyph-group, group-glyph, group-group
+	return (left_key[0] == "@", right_key[0] == "@", pair)
+
+
+def redundant_pairs_in_master(resolver, allowed=None):
+	"""
+	{(left key, right key): reason} for one master. Redundant pairs are taken
+	out of the resolver as they are found; pass allowed to only consider
+	those pairs. The resolver's pairs are restored afterwards.
+	"""
+	original = resolver.pairs
+	resolver.pairs = dict(original)
+	redundant = {}
+	try:
+		for pair in sorted(original, key=precedence_order):
+			if allowed is not None and pair not in allowed:
+				continue
+			reason = redundancy_reason(resolver, pair[0], pair[1], original[pair])
+			if reason:
+				redundant[pair] = reason
+				del resolver.pairs[pair]
+	finally:
+		resolver.pairs = original
+	return redundant
+
+
+def redundant_pairs_by_master(font, masters=None):
+	"""{master ID: {(left key, right key): reason}} for every master on its own."""
+	return dict(
+		(master_id, redundant_pairs_in_master(resolver))
+		for master_id, resolver in kerning_resolvers_for_font(font, masters).items()
+	)
+
+
+def removable_pairs(font, masters=None):
+	"""
+	{(left key, right key): reason} for pairs that are redundant in every
+	master where they exist, and can all be removed together.
+	"""
+	resolvers = kerning_resolvers_for_font(font, masters)
+	allowed = None
+	while True:
+		by_master = dict(
+			(master_id, redundant_pairs_in_master(resolver, allowed))
+			for master_id, resolver in resolvers.items()
+		)
+		candidates = {}
+		vetoed = set()
+		for master_id, resolver in resolvers.items():
+			for pair in resolver.pairs:
+				if allowed is not None and pair not in allowed:
+					continue
+				reason = by_master[master_id].get(pair)
+				if reason:
+					candidates.setdefault(pair, reason)
+				else:
+					vetoed.add(pair)
+		removable = dict((pair, reason) for pair, reason in candidates.items() if pair not in vetoed)
+		# a pair dropped in one master changes what later pairs fall back to, so
+		# repeat with the smaller set until every master agrees
+		if allowed is not None and (not removable or set(removable) == allowed):
+			return removable
+		allowed = set(removable)
+
+
+def prune_changes(font, removable, masters=None):
+	"""KerningChangeSet removing the given pairs from every master."""
+	changes = KerningChangeSet(font)
+	for master in masters or font.masters:
+		kerning = font.kerning.get(master.id) or {}
+		for left_key, right_key in removable:
+			if right_key in (kerning.get(left_key) or {}):
+				changes.remove_raw(master.id, left_key, right_key)
+	return changes
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+Optimal 1-D quantization of kerning values.
+
+All values of all masters are reduced to one histogram of distinct values.
+A dynamic program over the sorted histogram then picks the palette: the
+fewest integer values that keep every pair within max_tweak of its original,
+or the best palette of a given size, minimizing the count-weighted squared
+error in both cases. Requires NumPy.
+"""
+
+import math
+
+try:
+	import numpy
+except ImportError:
+	numpy = None
+
+
+def numpy_available():
+	return numpy is not None
+
+
+def value_histogram(values):
+	"""Sorted distinct values and their counts as NumPy arrays."""
+	distinct, counts = numpy.unique(numpy.asarray(list(values), dtype=numpy.float64), return_counts=True)
+	return distinct, counts.astype(numpy.float64)
+
+
+def minimum_palette_size(distinct, max_tweak):
+	"""
+	Fewest integer centers covering the sorted values within max_tweak
+	(greedy is optimal in 1-D). Values may be fractional; a run fits one
+	center while ceil(last - max_tweak) <= floor(first + max_tweak).
+	"""
+	size = 0
+	highest_center = None
+	for value in distinct:
+		if highest_center is None or math.ceil(value - max_tweak) > highest_center:
+			highest_center = math.floor(value + max_tweak)
+			size += 1
+			if math.ceil(value - max_tweak) > highest_center:
+				raise ValueError("No integer lies within %s units of %s." % (max_tweak, value))
+	return size
+
+
+def segment_costs(distinct, counts, max_tweak=None):
+	"""
+	Cost and integer center of mapping every run distinct[i..j] to one value,
+	as (n, n) arrays; runs that cannot stay within max_tweak cost infinity.
+	"""
+	n = len(distinct)
+	s0 = numpy.concatenate(([0.0], numpy.cumsum(counts)))
+	s1 = numpy.concatenate(([0.0], numpy.cumsum(counts * distinct)))
+	s2 = numpy.concatenate(([0.0], numpy.cumsum(counts * distinct * distinct)))
+	i, j = numpy.triu_indices(n)
+	w = s0[j + 1] - s0[i]
+	wv = s1[j + 1] - s1[i]
+	wvv = s2[j + 1] - s2[i]
+	centers = numpy.round(wv / w)
+	feasible = numpy.ones(len(i), dtype=bool)
+	if max_tweak is not None:
+		# integer centers only, so the bounds are rounded inwards
+		low = numpy.ceil(distinct[j] - max_tweak)
+		high = numpy.floor(distinct[i] + max_tweak)
+		feasible = low <= high
+		centers = numpy.clip(centers, low, high)
+	costs = wvv - 2.0 * centers * wv + centers * centers * w
+
+	cost = numpy.full((n, n), numpy.inf)
+	center = numpy.zeros((n, n))
+	cost[i[feasible], j[feasible]] = numpy.maximum(costs[feasible], 0.0)
+	center[i, j] = centers
+	return cost, center
+
+
+def optimal_segments(cost, palette_size):
+	"""Split the sorted values into palette_size runs with minimal total cost; returns run start indices."""
+	n = cost.shape[0]
+	palette_size = max(1, min(palette_size, n))
+	# best[j]: minimal cost of covering values 0..j with the current number of runs
+	best = cost[0].copy()
+	starts = []
+	for _ in range(1, palette_size):
+		# previous[i - 1] + cost[i, j] for every start i >= 1 of the last run
+		candidates = best[:-1, numpy.newaxis] + cost[1:, :]
+		argmin = numpy.argmin(candidates, axis=0)
+		best = candidates[argmin, numpy.arange(n)]
+		starts.append(argmin + 1)
+
+	boundaries = []
+	end = n - 1
+	for step in reversed(starts):
+		start = int(step[end])
+		boundaries.append(start)
+		end = start - 1
+	boundaries.append(0)
+	return sorted(boundaries), best[n - 1]
+
+
+def optimal_palette(values, max_tweak=None, palette_size=None):
+	"""
+	Return {value: quantized value} for the given kerning values.
+	With max_tweak, the palette has the minimum number of values that keeps
+	every change within max_tweak (palette_size may only make it larger).
+	With palette_size alone, the palette minimizes squared error for that size.
+	"""
+	distinct, counts = value_histogram(values)
+	if not len(distinct):
+		return {}
+
+	size = palette_size or len(distinct)
+	if max_tweak is not None:
+		size = max(size if palette_size else 0, minimum_palette_size(distinct, max_tweak))
+
+	cost, center = segment_costs(distinct, counts, max_tweak)
+	starts, total = optimal_segments(cost, size)
+	if not numpy.isfinite(total):
+		raise ValueError("No palette of %i values keeps kerning within %s units." % (size, max_tweak))
+
+	mapping = {}
+	ends = starts[1:] + [len(distinct)]
+	for start, end in zip(starts, ends):
+		quantized = int(round(center[start, end - 1]))
+		for value in distinct[start:end]:
+			mapping[value.item()] = quantized
+	return mapping
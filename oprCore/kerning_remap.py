@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+Copy kerning from groups to other groups, many mappings at once.
+
+A mapping is (source group, target group, side mode), with group names as
+in the glyph info (no @MMK prefix). Side modes follow Copy Kerning Between
+Groups: "RR", "LL", "RL", "LR". All mappings are applied in one pass over
+each master's kerning; if two mappings write the same target pair with
+different values, the first one wins and the clash is reported.
+"""
+
+import csv
+import io
+
+from oprCore.kerning_changes import KerningChangeSet
+from oprCore.kerning_index import LEFT_GROUP_PREFIX, RIGHT_GROUP_PREFIX
+
+
+SIDE_MODES = ("RR", "LL", "RL", "LR")
+
+_MODE_ALIASES = {
+	"right → right": "RR",
+	"left → left": "LL",
+	"right → left": "RL",
+	"left → right": "LR",
+}
+
+
+def normalize_side_mode(mode):
+	mode = (mode or "").strip()
+	normalized = _MODE_ALIASES.get(mode.lower(), mode.upper().replace(">", "").replace("-", "").replace(" ", ""))
+	if normalized not in SIDE_MODES:
+		raise ValueError("Unknown side mode: %s" % mode)
+	return normalized
+
+
+def load_group_mappings(path):
+	"""
+	Read source,target,mode rows from a CSV file. Empty lines, lines starting
+	with # and a source,target,mode header are skipped.
+	"""
+	mappings = []
+	with io.open(path, "r", encoding="utf-8", newline="") as mapping_file:
+		for line_number, row in enumerate(csv.reader(mapping_file), 1):
+			row = [cell.strip() for cell in row]
+			if not row or not row[0] or row[0].startswith("#"):
+				continue
+			if row[0].lower() == "source":
+				continue
+			if len(row) < 3:
+				raise ValueError("Line %i of %s needs source, target and mode" % (line_number, path))
+			mappings.append((row[0], row[1], normalize_side_mode(row[2])))
+	return mappings
+
+
+def remap_group_kerning(font, mappings, masters=None, index=None):
+	"""
+	Collect the copies for all mappings in a KerningChangeSet.
+	Returns (change set, conflicts), conflicts being readable messages.
+	"""
+	changes = KerningChangeSet(font, index=index)
+	conflicts = []
+
+	# source key -> [(mapping, target key)], split by which side of the pair is matched
+	by_right = {}
+	by_left = {}
+	for mapping in mappings:
+		source, target, mode = mapping
+		if mode in ("RR", "RL"):
+			target_key = (RIGHT_GROUP_PREFIX if mode == "RR" else LEFT_GROUP_PREFIX) + target
+			by_right.setdefault(RIGHT_GROUP_PREFIX + source, []).append((mapping, target_key))
+		else:
+			target_key = (LEFT_GROUP_PREFIX if mode == "LL" else RIGHT_GROUP_PREFIX) + target
+			by_left.setdefault(LEFT_GROUP_PREFIX + source, []).append((mapping, target_key))
+
+	for master in masters or font.masters:
+		written = {}
+		for left_key, right_dict in (font.kerning.get(master.id) or {}).items():
+			left_targets = by_left.get(left_key, ())
+			for right_key, value in (right_dict or {}).items():
+				targets = []
+				for mapping, target_key in by_right.get(right_key, ()):
+					if mapping[2] == "RR":
+						targets.append((mapping, (left_key, target_key)))
+					else:
+						targets.append((mapping, (target_key, right_key)))
+				for mapping, target_key in left_targets:
+					if mapping[2] == "LL":
+						targets.append((mapping, (target_key, right_key)))
+					else:
+						targets.append((mapping, (left_key, target_key)))
+
+				for mapping, pair in targets:
+					if pair in written:
+						first_mapping, first_value = written[pair]
+						if first_value != value:
+							conflicts.append("%s: %s %s gets %s from %s→%s and %s from %s→%s; kept first" % (
+								master.name, pair[0], pair[1],
+								first_value, first_mapping[0], first_mapping[1],
+								value, mapping[0], mapping[1],
+							))
+						continue
+					if changes.set(master.id, pair[0], pair[1], value):
+						written[pair] = (mapping, value)
+	return changes, conflicts
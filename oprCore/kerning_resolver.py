@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+"""
+Effective kerning for concrete glyph pairs in one master.
+
+Precedence follows the feature code Glyphs writes: glyph-glyph exceptions,
+then glyph-group, then group-glyph, then group-group.
+"""
+
+from oprCore.kerning_index import kerning_index_for_font
+
+try:
+	import numpy
+except ImportError:
+	numpy = None
+
+
+class KerningResolver(object):
+
+	def __init__(self, font, master_id, index=None):
+		self.font = font
+		self.master_id = master_id
+		self.index = index or kerning_index_for_font(font)
+		self.pairs = {}
+		for left_key, right_dict in (font.kerning.get(master_id) or {}).items():
+			if not right_dict:
+				continue
+			for right_key, value in right_dict.items():
+				if value is not None:
+					self.pairs[(left_key, right_key)] = value
+
+		# per glyph name: (glyph ID, class key) for each side
+		index = self.index
+		self.left_lookup = {}
+		self.right_lookup = {}
+		for name in index.glyph_names:
+			glyph_id = index.id_for_name[name]
+			self.left_lookup[name] = (glyph_id, index.left_key(name))
+			self.right_lookup[name] = (glyph_id, index.right_key(name))
+		self._pair_table = None
+
+	def candidate_keys(self, left_name, right_name):
+		"""Kerning key pairs that could apply to the glyph pair, highest precedence first."""
+		left = self.left_lookup.get(left_name)
+		right = self.right_lookup.get(right_name)
+		if left is None or right is None:
+			return []
+		left_id, left_class = left
+		right_id, right_class = right
+		keys = [(left_id, right_id)]
+		if right_class:
+			keys.append((left_id, right_class))
+		if left_class:
+			keys.append((left_class, right_id))
+			if right_class:
+				keys.append((left_class, right_class))
+		return keys
+
+	def source(self, left_name, right_name):
+		"""The (left key, right key) pair that kerns the glyph pair, or None."""
+		pairs = self.pairs
+		for key in self.candidate_keys(left_name, right_name):
+			if key in pairs:
+				return key
+		return None
+
+	def fallback_value(self, left_key, right_key, default=0):
+		"""
+		Value the key glyphs of a kerning pair get from lower-precedence
+		pairs, i.e. what Glyphs applies where this pair is not set.
+		"""
+		left_name = self.index.key_glyph(left_key)
+		right_name = self.index.key_glyph(right_key)
+		if not left_name or not right_name:
+			return default
+		keys = self.candidate_keys(left_name, right_name)
+		if (left_key, right_key) in keys:
+			keys = keys[keys.index((left_key, right_key)) + 1:]
+		pairs = self.pairs
+		for key in keys:
+			if key in pairs:
+				return pairs[key]
+		return default
+
+	def value(self, left_name, right_name, default=0):
+		pairs = self.pairs
+		left = self.left_lookup.get(left_name)
+		right = self.right_lookup.get(right_name)
+		if left is None or right is None:
+			return default
+		left_id, left_class = left
+		right_id, right_class = right
+		key = (left_id, right_id)
+		if key in pairs:
+			return pairs[key]
+		if right_class:
+			key = (left_id, right_class)
+			if key in pairs:
+				return pairs[key]
+		if left_class:
+			if (left_class, right_id) in pairs:
+				return pairs[(left_class, right_id)]
+			if right_class and (left_class, right_class) in pairs:
+				return pairs[(left_class, right_class)]
+		return default
+
+	def values(self, left_names, right_names, default=0):
+		"""Resolve many glyph pairs at once; returns a list aligned with the inputs."""
+		if numpy is None:
+			value = self.value
+			return [value(left, right, default) for left, right in zip(left_names, right_names)]
+		left_names = numpy.asarray(left_names, dtype=object)
+		right_names = numpy.asarray(right_names, dtype=object)
+		if not len(left_names):
+			return []
+		key_codes, pair_codes, pair_values = self.pair_table()
+		key_count = len(key_codes) + 1
+
+		# per distinct glyph name: codes of its glyph ID and class key (-1: none)
+		left_unique, left_inverse = numpy.unique(left_names, return_inverse=True)
+		right_unique, right_inverse = numpy.unique(right_names, return_inverse=True)
+		left_codes = self._side_codes(left_unique, self.left_lookup, key_codes)[:, left_inverse]
+		right_codes = self._side_codes(right_unique, self.right_lookup, key_codes)[:, right_inverse]
+
+		result = numpy.full(len(left_names), default, dtype=object)
+		unresolved = numpy.ones(len(left_names), dtype=bool)
+		# candidates in precedence order: glyph-glyph, glyph-class, class-glyph, class-class
+		for left_row, right_row in ((0, 0), (0, 1), (1, 0), (1, 1)):
+			left = left_codes[left_row]
+			right = right_codes[right_row]
+			wanted = unresolved & (left >= 0) & (right >= 0)
+			if not wanted.any():
+				continue
+			codes = left[wanted] * key_count + right[wanted]
+			found = numpy.searchsorted(pair_codes, codes)
+			found[found >= len(pair_codes)] = 0
+			hit = pair_codes[found] == codes if len(pair_codes) else numpy.zeros(len(codes), dtype=bool)
+			positions = numpy.flatnonzero(wanted)[hit]
+			result[positions] = pair_values[found[hit]]
+			unresolved[positions] = False
+		return result.tolist()
+
+	def pair_table(self):
+		"""Integer codes for all kerning keys and the sorted pair codes with their values."""
+		if self._pair_table is None:
+			key_codes = {}
+			for left_key, right_key in self.pairs:
+				key_codes.setdefault(left_key, len(key_codes))
+				key_codes.setdefault(right_key, len(key_codes))
+			key_count = len(key_codes) + 1
+			codes = numpy.array(
+				[key_codes[left] * key_count + key_codes[right] for left, right in self.pairs],
+				dtype=numpy.int64,
+			)
+			values = numpy.array(list(self.pairs.values()), dtype=object)
+			order = numpy.argsort(codes, kind="stable")
+			self._pair_table = (key_codes, codes[order], values[order])
+		return self._pair_table
+
+	@staticmethod
+	def _side_codes(names, lookup, key_codes):
+		codes = numpy.full((2, len(names)), -1, dtype=numpy.int64)
+		for position, name in enumerate(names):
+			entry = lookup.get(name)
+			if entry is None:
+				continue
+			glyph_id, class_key = entry
+			codes[0, position] = key_codes.get(glyph_id, -1)
+			if class_key:
+				codes[1, position] = key_codes.get(class_key, -1)
+		return codes
+
+	def is_effective(self, left_key, right_key, left_name, right_name):
+		return self.source(left_name, right_name) == (left_key, right_key)
+
+	def effective_glyph_pairs(self, left_key, right_key):
+		"""Yield glyph name pairs that actually receive the value of this kerning pair."""
+		pairs = self.pairs
+		if (left_key, right_key) not in pairs:
+			return
+		is_group_key = self.index.is_group_key
+		left_is_class = is_group_key(left_key)
+		right_is_class = is_group_key(right_key)
+		lefts = [
+			(name, self.left_lookup[name])
+			for name in self.index.members(left_key)
+			if name in self.left_lookup
+		]
+		rights = [
+			(name, self.right_lookup[name])
+			for name in self.index.members(right_key)
+			if name in self.right_lookup
+		]
+		# drop members shadowed by a higher-precedence pair on their own side
+		# once, so the cross product only has to test glyph-glyph exceptions
+		if left_is_class and right_is_class:
+			lefts = [left for left in lefts if (left[1][0], right_key) not in pairs]
+			rights = [right for right in rights if (left_key, right[1][0]) not in pairs]
+		elif left_is_class:
+			for _, (_, right_class) in rights:
+				if right_class:
+					lefts = [left for left in lefts if (left[1][0], right_class) not in pairs]
+		elif not right_is_class:
+			for left_name, _ in lefts:
+				for right_name, _ in rights:
+					yield left_name, right_name
+			return
+		for left_name, (left_id, _) in lefts:
+			for right_name, (right_id, _) in rights:
+				if (left_id, right_id) not in pairs:
+					yield left_name, right_name
+
+	def example_glyph_pair(self, left_key, right_key):
+		"""First glyph pair that shows this kerning pair, falling back to the key glyphs."""
+		for pair in self.effective_glyph_pairs(left_key, right_key):
+			return pair
+		left_name = self.index.key_glyph(left_key)
+		right_name = self.index.key_glyph(right_key)
+		if left_name and right_name:
+			return left_name, right_name
+		return None
+
+
+def kerning_resolvers_for_font(font, masters=None):
+	"""Resolvers for all (or the given) masters, sharing one index."""
+	index = kerning_index_for_font(font)
+	return dict(
+		(master.id, KerningResolver(font, master.id, index=index))
+		for master in (masters or font.masters)
+	)
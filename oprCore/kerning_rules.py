@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+Rule engine for questionable kerning pairs.
+
+Rules name glyphs that should not be kerned on one or both sides, either
+directly or through name patterns. compile_rules() resolves them once
+against the font's glyph names into hashed sets of glyph IDs and class keys,
+so classifying a pair is a few set lookups. Classification runs on a plain
+kerning snapshot, which can be split across worker processes.
+"""
+
+import io
+import json
+
+
+RULE_KEYS = (
+	"noKerningToTheLeft",        # glyph names that should not have kerning on their left
+	"noKerningToTheRight",       # glyph names that should not have kerning on their right
+	"unlikelyToBeKerned",        # glyph names that should not be kerned at all
+	"extensionsWithoutKerning",  # name parts (not at the start) of glyphs that should not be kerned
+	"prefixesWithoutKerning",    # name prefixes of glyphs that should not be kerned
+	"suffixesWithoutKerning",    # name suffixes of glyphs that should not be kerned
+)
+
+
+def load_rules_file(path):
+	"""Read a JSON rule file with any of RULE_KEYS mapped to lists of strings."""
+	with io.open(path, "r", encoding="utf-8") as rules_file:
+		data = json.load(rules_file)
+	unknown = set(data) - set(RULE_KEYS)
+	if unknown:
+		raise ValueError("Unknown kerning rule(s) in %s: %s" % (path, ", ".join(sorted(unknown))))
+	return data
+
+
+def merge_rules(*rule_dicts):
+	"""Combine rule dicts; lists for the same key are concatenated."""
+	merged = dict((key, []) for key in RULE_KEYS)
+	for rules in rule_dicts:
+		for key, values in (rules or {}).items():
+			merged[key].extend(values)
+	return merged
+
+
+class CompiledKerningRules(object):
+	"""Hashed sets of kerning keys that make a pair questionable, with the reason."""
+
+	def __init__(self):
+		self.left_keys = {}
+		self.right_keys = {}
+
+	def classify(self, left_key, right_key):
+		"""Reason the pair is questionable, or None."""
+		reason = self.left_keys.get(left_key)
+		if reason is None:
+			reason = self.right_keys.get(right_key)
+		return reason
+
+
+def pattern_matches(name, extensions, prefixes, suffixes):
+	for extension in extensions:
+		if extension in name and not name.startswith(extension):
+			return "extension %s" % extension
+	for prefix in prefixes:
+		if name.startswith(prefix):
+			return "prefix %s" % prefix
+	for suffix in suffixes:
+		if name.endswith(suffix):
+			return "suffix %s" % suffix
+	return None
+
+
+def compile_rules(rules, index):
+	"""Resolve rules against the font behind index into a CompiledKerningRules."""
+	compiled = CompiledKerningRules()
+	no_left = set(rules.get("noKerningToTheLeft", ()))
+	no_right = set(rules.get("noKerningToTheRight", ()))
+	unlikely = set(rules.get("unlikelyToBeKerned", ()))
+	extensions = tuple(rules.get("extensionsWithoutKerning", ()))
+	prefixes = tuple(rules.get("prefixesWithoutKerning", ()))
+	suffixes = tuple(rules.get("suffixesWithoutKerning", ()))
+
+	for name in index.glyph_names:
+		glyph_id = index.id_for_name[name]
+		pattern = pattern_matches(name, extensions, prefixes, suffixes)
+		dont_kern = pattern or ("unlikely to be kerned" if name in unlikely else None)
+
+		if dont_kern:
+			compiled.left_keys[glyph_id] = dont_kern
+			compiled.right_keys[glyph_id] = dont_kern
+			# a class that contains such a glyph is questionable on that side
+			left_key = index.left_key(name)
+			if left_key:
+				compiled.left_keys.setdefault(left_key, "group contains /%s" % name)
+			right_key = index.right_key(name)
+			if right_key:
+				compiled.right_keys.setdefault(right_key, "group contains /%s" % name)
+			continue
+
+		if name in no_right:
+			compiled.left_keys[glyph_id] = "no kerning to the right"
+		if name in no_left:
+			compiled.right_keys[glyph_id] = "no kerning to the left"
+	return compiled
+
+
+def kerning_snapshot(font, masters=None):
+	"""Plain {master ID: {left: {right: value}}} copy of the font's kerning."""
+	snapshot = {}
+	for master in masters or font.masters:
+		kerning = font.kerning.get(master.id) or {}
+		snapshot[master.id] = dict(
+			(left_key, dict(right_dict)) for left_key, right_dict in kerning.items() if right_dict
+		)
+	return snapshot
+
+
+def classify_kerning(compiled, master_kerning):
+	"""One pass over a master's kerning; returns [(left, right, value, reason)]."""
+	left_keys = compiled.left_keys
+	right_keys = compiled.right_keys
+	found = []
+	for left_key, right_dict in master_kerning.items():
+		left_reason = left_keys.get(left_key)
+		for right_key, value in right_dict.items():
+			reason = left_reason or right_keys.get(right_key)
+			if reason:
+				found.append((left_key, right_key, value, reason))
+	return found
+
+
+def _classify_job(job):
+	compiled, master_id, master_kerning = job
+	return master_id, classify_kerning(compiled, master_kerning)
+
+
+def classify_snapshot(compiled, snapshot, workers=0):
+	"""
+	Classify every master of a snapshot; returns {master ID: findings}.
+	With workers > 1 the masters are split across worker processes, which
+	only works where Python can spawn interpreters (not inside Glyphs).
+	"""
+	jobs = [(compiled, master_id, master_kerning) for master_id, master_kerning in snapshot.items()]
+	if workers and workers > 1 and len(jobs) > 1:
+		from concurrent.futures import ProcessPoolExecutor
+		with ProcessPoolExecutor(max_workers=workers) as executor:
+			return dict(executor.map(_classify_job, jobs))
+	return dict(_classify_job(job) for job in jobs)
@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+"""
+Cache of side profiles keyed by layer and outline content.
+
+Entries are keyed by (glyph name, layer ID) and carry a hash of the
+decomposed outline and advance width, so an entry is reused until that glyph
+(or a component it uses) is edited. Within a session, a cheap change token
+(the lastChange dates of the glyph and its component bases) is checked
+first, so unchanged layers are not even decomposed. The cache is LRU-bounded
+and can be kept on disk next to the .glyphs file, so repeated runs only
+sample edited glyphs. Requires NumPy.
+"""
+
+import hashlib
+import os
+from collections import OrderedDict
+
+try:
+	import numpy
+except ImportError:
+	numpy = None
+
+from oprCore.side_profiles import BAND_HEIGHT, CURVE_STEPS, SideProfile, decomposed_paths, paths_profile
+
+MAX_ENTRIES = 20000
+CACHE_SUFFIX = ".profiles.npz"
+
+_font_caches = {}
+
+
+def outline_hash(paths, width):
+	digest = hashlib.sha1(repr(float(width)).encode("ascii"))
+	for path in paths:
+		nodes = ";".join("%s %r %r" % (node.type, float(node.x), float(node.y)) for node in path.nodes)
+		digest.update(("%s|%s\n" % (path.closed, nodes)).encode("ascii"))
+	return digest.hexdigest()
+
+
+def change_token(layer, depth=0):
+	"""
+	Token that changes whenever the layer's glyph or a component base glyph
+	is edited, or None where Glyphs does not track changes.
+	"""
+	glyph = layer.parent
+	last_change = getattr(glyph, "lastChange", None)
+	if last_change is None or depth > 8:
+		return None
+	token = [repr(last_change), repr(float(layer.width))]
+	for component in getattr(layer, "components", None) or []:
+		base = component.component
+		if base is None:
+			token.append(component.componentName)
+			continue
+		base_layer = base.layers[layer.layerId] or base.layers[layer.associatedMasterId]
+		base_token = change_token(base_layer, depth + 1) if base_layer is not None else None
+		if base_token is None:
+			return None
+		token.append(base_token)
+	return tuple(token)
+
+
+def layer_cache_key(layer):
+	return "%s\t%s" % (layer.parent.name, layer.layerId)
+
+
+def cache_path_for_font(font):
+	"""Path of the on-disk profile store next to the .glyphs file, or None for unsaved fonts."""
+	file_path = getattr(font, "filepath", None)
+	if not file_path:
+		return None
+	return os.path.splitext(file_path)[0] + CACHE_SUFFIX
+
+
+class ProfileCache(object):
+
+	def __init__(self, band_height=BAND_HEIGHT, curve_steps=CURVE_STEPS, max_entries=MAX_ENTRIES, path=None):
+		self.band_height = band_height
+		self.curve_steps = curve_steps
+		self.max_entries = max_entries
+		self.path = path
+		self.entries = OrderedDict()
+		# key -> change token of the layer when its entry was last confirmed
+		self.tokens = {}
+		self.hits = 0
+		self.misses = 0
+		self.dirty = False
+
+	def __len__(self):
+		return len(self.entries)
+
+	@property
+	def nbytes(self):
+		return sum(profile.nbytes for digest, profile in self.entries.values())
+
+	def profile(self, layer, key=None, use_token=True):
+		"""
+		SideProfile of the layer, sampled only if its outline changed since it
+		was cached. use_token=False skips the change token shortcut, for layers
+		whose outline can change without their glyph's lastChange (interpolations).
+		"""
+		key = key or layer_cache_key(layer)
+		token = change_token(layer) if use_token else None
+		entry = self.entries.get(key)
+		if entry is not None and token is not None and self.tokens.get(key) == token:
+			self.entries.move_to_end(key)
+			self.hits += 1
+			return entry[1]
+
+		# token unknown or changed: the outline hash decides, e.g. for entries loaded from disk
+		paths = decomposed_paths(layer)
+		digest = outline_hash(paths, layer.width)
+		self.tokens[key] = token
+		if entry is not None and entry[0] == digest:
+			self.entries.move_to_end(key)
+			self.hits += 1
+			return entry[1]
+
+		self.misses += 1
+		profile = paths_profile(paths, layer.width, self.band_height, self.curve_steps)
+		self.entries[key] = (digest, profile)
+		self.entries.move_to_end(key)
+		while len(self.entries) > self.max_entries:
+			removed_key, _ = self.entries.popitem(last=False)
+			self.tokens.pop(removed_key, None)
+		self.dirty = True
+		return profile
+
+	def clear(self):
+		self.entries.clear()
+		self.tokens.clear()
+		self.dirty = True
+
+	def load(self, path=None):
+		"""Read entries from an .npz store; a missing or unreadable store is ignored."""
+		path = path or self.path
+		if not path or not os.path.exists(path):
+			return 0
+		try:
+			with numpy.load(path, allow_pickle=False) as store:
+				settings = store["settings"].tolist()
+				if settings != [self.band_height, self.curve_steps]:
+					return 0
+				keys = store["keys"].tolist()
+				digests = store["digests"].tolist()
+				first_bands = store["first_bands"].tolist()
+				widths = store["widths"].tolist()
+				offsets = store["offsets"].tolist()
+				left = store["left"]
+				right = store["right"]
+		except (IOError, OSError, KeyError, ValueError):
+			return 0
+		for i, key in enumerate(keys):
+			if key in self.entries:
+				continue
+			start, stop = offsets[i], offsets[i + 1]
+			profile = SideProfile(first_bands[i], left[start:stop].copy(), right[start:stop].copy(), widths[i])
+			self.entries[key] = (digests[i], profile)
+			self.entries.move_to_end(key, last=False)
+		while len(self.entries) > self.max_entries:
+			removed_key, _ = self.entries.popitem(last=False)
+			self.tokens.pop(removed_key, None)
+		return len(keys)
+
+	def save(self, path=None):
+		"""Write all entries to an .npz store as flat float32 arrays."""
+		path = path or self.path
+		if not path:
+			return False
+		keys = list(self.entries)
+		profiles = [self.entries[key][1] for key in keys]
+		offsets = numpy.zeros(len(profiles) + 1, dtype=numpy.int64)
+		offsets[1:] = numpy.cumsum([len(profile) for profile in profiles])
+		empty = numpy.zeros(0, dtype=numpy.float32)
+		temporary_path = path + ".tmp"
+		with open(temporary_path, "wb") as store:
+			numpy.savez_compressed(
+				store,
+				settings=numpy.array([self.band_height, self.curve_steps]),
+				keys=numpy.array(keys, dtype=str),
+				digests=numpy.array([self.entries[key][0] for key in keys], dtype=str),
+				first_bands=numpy.array([profile.first_band for profile in profiles], dtype=numpy.int64),
+				widths=numpy.array([profile.width for profile in profiles], dtype=numpy.float64),
+				offsets=offsets,
+				left=numpy.concatenate([profile.left for profile in profiles] or [empty]),
+				right=numpy.concatenate([profile.right for profile in profiles] or [empty]),
+			)
+		os.replace(temporary_path, path)
+		self.dirty = False
+		return True
+
+
+def profile_cache_for_font(font, persistent=False):
+	"""
+	The in-memory profile cache for font. With persistent=True it is backed
+	by the store next to the .glyphs file, loaded on first use; call
+	save_profile_cache() to write it back.
+	"""
+	cache = _font_caches.get(id(font))
+	if cache is None or cache[0] is not font:
+		cache = (font, ProfileCache())
+		_font_caches[id(font)] = cache
+	profile_cache = cache[1]
+	if persistent and profile_cache.path is None:
+		profile_cache.path = cache_path_for_font(font)
+		profile_cache.load()
+	return profile_cache
+
+
+def save_profile_cache(font):
+	"""Write the font's profile cache to disk if it is persistent and has changed."""
+	cache = _font_caches.get(id(font))
+	if cache is None or cache[0] is not font:
+		return False
+	profile_cache = cache[1]
+	if not profile_cache.dirty:
+		return False
+	return profile_cache.save()
+
+
+def invalidate_profile_cache(font=None):
+	if font is None:
+		_font_caches.clear()
+	else:
+		_font_caches.pop(id(font), None)
@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+"""
+Left and right side profiles of glyph outlines.
+
+Outlines are decomposed and flattened to polygons, then sampled in horizontal
+bands on a fixed grid anchored at y=0: for every band the profile holds the
+distance from the left edge of the advance (the origin) to the leftmost ink,
+and from the rightmost ink to the advance width. Bands without ink are NaN.
+Because the grid is fixed, profiles of single glyphs can be computed and
+stored independently and stacked later. Requires NumPy.
+"""
+
+import math
+
+try:
+	import numpy
+except ImportError:
+	numpy = None
+
+BAND_HEIGHT = 10
+CURVE_STEPS = 12
+
+# GlyphsApp node type names, so this module does not need to import GlyphsApp
+OFFCURVE = "offcurve"
+CURVE = "curve"
+
+
+def decomposed_paths(layer):
+	try:
+		decomposed_layer = layer.copyDecomposedLayer()
+		if decomposed_layer is not None and decomposed_layer.paths:
+			return decomposed_layer.paths
+	except Exception:
+		pass
+	return layer.paths
+
+
+def flattened_contour(path, curve_steps=CURVE_STEPS):
+	"""Closed path as a list of (x, y) points with cubic segments subdivided."""
+	if not path.closed:
+		return []
+	nodes = [(node.type, node.x, node.y) for node in path.nodes]
+	start = None
+	for i, node in enumerate(nodes):
+		if node[0] != OFFCURVE:
+			start = i
+			break
+	if start is None or len(nodes) < 3:
+		return []
+
+	current = nodes[start][1:]
+	points = [current]
+	controls = []
+	for offset in range(1, len(nodes) + 1):
+		node_type, x, y = nodes[(start + offset) % len(nodes)]
+		if node_type == OFFCURVE:
+			controls.append((x, y))
+			continue
+		if node_type == CURVE and len(controls) == 2:
+			(x0, y0), (x1, y1), (x2, y2) = current, controls[0], controls[1]
+			for step in range(1, curve_steps + 1):
+				t = step / float(curve_steps)
+				mt = 1.0 - t
+				points.append((
+					mt * mt * mt * x0 + 3 * mt * mt * t * x1 + 3 * mt * t * t * x2 + t * t * t * x,
+					mt * mt * mt * y0 + 3 * mt * mt * t * y1 + 3 * mt * t * t * y2 + t * t * t * y,
+				))
+		else:
+			# lines, and quadratic controls as a polyline through them
+			points.extend(controls)
+			points.append((x, y))
+		current = (x, y)
+		controls = []
+	return points
+
+
+def path_edges(paths, curve_steps=CURVE_STEPS):
+	"""All polygon edges of the paths as an (n, 4) array of x0, y0, x1, y1."""
+	edges = []
+	for path in paths:
+		points = flattened_contour(path, curve_steps)
+		if len(points) < 2:
+			continue
+		points = numpy.asarray(points, dtype=numpy.float64)
+		edges.append(numpy.hstack((points, numpy.roll(points, -1, axis=0))))
+	if not edges:
+		return numpy.zeros((0, 4))
+	return numpy.vstack(edges)
+
+
+def edge_extents(edges, first_band, band_count, band_height=BAND_HEIGHT):
+	"""
+	Leftmost and rightmost x of the edges within each band, as two arrays of
+	band_count values (NaN without ink). Each edge is clipped to each band, so
+	thin horizontal strokes between band centers are not missed.
+	"""
+	x0, y0, x1, y1 = edges[:, 0:1], edges[:, 1:2], edges[:, 2:3], edges[:, 3:4]
+	bottoms = (first_band + numpy.arange(band_count)) * float(band_height)
+	tops = bottoms + band_height
+	dy = y1 - y0
+	flat = dy == 0
+	with numpy.errstate(divide="ignore", invalid="ignore"):
+		t_bottom = numpy.where(flat, 0.0, (bottoms - y0) / dy)
+		t_top = numpy.where(flat, 1.0, (tops - y0) / dy)
+	t_low = numpy.clip(numpy.minimum(t_bottom, t_top), 0.0, 1.0)
+	t_high = numpy.clip(numpy.maximum(t_bottom, t_top), 0.0, 1.0)
+	inside = numpy.where(
+		flat,
+		(y0 >= bottoms) & (y0 < tops),
+		(numpy.minimum(y0, y1) < tops) & (numpy.maximum(y0, y1) >= bottoms) & (t_low <= t_high),
+	)
+	dx = x1 - x0
+	xa = x0 + t_low * dx
+	xb = x0 + t_high * dx
+	lows = numpy.where(inside, numpy.minimum(xa, xb), numpy.inf).min(axis=0)
+	highs = numpy.where(inside, numpy.maximum(xa, xb), -numpy.inf).max(axis=0)
+	empty = numpy.isinf(lows)
+	lows[empty] = numpy.nan
+	highs[empty] = numpy.nan
+	return lows, highs
+
+
+class SideProfile(object):
+	"""Profile of one layer: bands first_band .. first_band + len(left) - 1."""
+
+	__slots__ = ("first_band", "left", "right", "width")
+
+	def __init__(self, first_band, left, right, width):
+		self.first_band = first_band
+		self.left = left
+		self.right = right
+		self.width = width
+
+	def __len__(self):
+		return len(self.left)
+
+	@property
+	def nbytes(self):
+		return self.left.nbytes + self.right.nbytes
+
+
+def paths_profile(paths, width, band_height=BAND_HEIGHT, curve_steps=CURVE_STEPS):
+	"""SideProfile of outlines in an advance width, with float32 distances from the advance edges."""
+	width = float(width)
+	edges = path_edges(paths, curve_steps)
+	if not len(edges):
+		empty = numpy.zeros(0, dtype=numpy.float32)
+		return SideProfile(0, empty, empty, width)
+	first_band = int(math.floor(edges[:, [1, 3]].min() / band_height))
+	last_band = int(math.floor(edges[:, [1, 3]].max() / band_height))
+	lows, highs = edge_extents(edges, first_band, last_band - first_band + 1, band_height)
+	return SideProfile(
+		first_band,
+		lows.astype(numpy.float32),
+		(width - highs).astype(numpy.float32),
+		width,
+	)
+
+
+def layer_profile(layer, band_height=BAND_HEIGHT, curve_steps=CURVE_STEPS):
+	return paths_profile(decomposed_paths(layer), layer.width, band_height, curve_steps)
+
+
+class ProfileSet(object):
+	"""
+	Profiles of many glyphs stacked on one band grid: left and right are
+	(glyphs, bands) float32 arrays, rows in the order of names.
+	"""
+
+	def __init__(self, names, profiles, band_height=BAND_HEIGHT):
+		self.names = list(names)
+		self.row_for_name = dict((name, i) for i, name in enumerate(self.names))
+		self.band_height = band_height
+		filled = [p for p in profiles if len(p)]
+		self.first_band = min(p.first_band for p in filled) if filled else 0
+		last_band = max(p.first_band + len(p) for p in filled) if filled else 0
+		band_count = last_band - self.first_band
+		self.left = numpy.full((len(self.names), band_count), numpy.nan, dtype=numpy.float32)
+		self.right = numpy.full((len(self.names), band_count), numpy.nan, dtype=numpy.float32)
+		for row, profile in enumerate(profiles):
+			start = profile.first_band - self.first_band
+			self.left[row, start:start + len(profile)] = profile.left
+			self.right[row, start:start + len(profile)] = profile.right
+
+	def __len__(self):
+		return len(self.names)
+
+	def rows(self, names):
+		"""Row numbers for glyph names, -1 for names without a profile."""
+		get = self.row_for_name.get
+		return numpy.array([get(name, -1) for name in names], dtype=numpy.int64)
+
+	def band_bottoms(self):
+		return (self.first_band + numpy.arange(self.left.shape[1])) * float(self.band_height)
+
+	def envelope(self, names, side):
+		"""
+		Band-wise most protruding profile of several glyphs on one side
+		("left" or "right"), e.g. all members of a kerning group.
+		"""
+		rows = self.rows(names)
+		rows = rows[rows >= 0]
+		profiles = self.left if side == "left" else self.right
+		if not len(rows):
+			return numpy.full(profiles.shape[1], numpy.nan, dtype=numpy.float32)
+		return numpy.fmin.reduce(profiles[rows], axis=0)
+
+
+def master_profiles(font, master_id, names=None, band_height=BAND_HEIGHT, profile_for_layer=None):
+	"""ProfileSet of the given (default: all exporting) glyphs in one master."""
+	profile_for_layer = profile_for_layer or (lambda layer: layer_profile(layer, band_height))
+	if names is None:
+		names = [glyph.name for glyph in font.glyphs if glyph.export]
+	profiles = []
+	for name in names:
+		glyph = font.glyphs[name]
+		profiles.append(profile_for_layer(glyph.layers[master_id]))
+	return ProfileSet(names, profiles, band_height)
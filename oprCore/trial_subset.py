@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+Derive trial fonts from finished release binaries.
+
+Instead of regenerating every instance with a reduced glyphset, the release
+TTF/OTF/WOFF/WOFF2 files are subset with fontTools to the trial glyphs and
+their name tables are rewritten to the trial naming. A job is a plain dict,
+so jobs can run in worker processes where Python can spawn interpreters
+(not inside Glyphs). Requires fontTools.
+"""
+
+import os
+import time
+
+try:
+	from fontTools import subset
+	from fontTools.ttLib import TTFont
+except ImportError:
+	TTFont = None
+
+# A trial generated from Glyphs switches off the manual features but
+# regenerates the automatic ones (liga, locl, case, kern, mark ...), so
+# subset trials keep every feature tag except the manual ones
+FAMILY_NAME_IDS = (1, 3, 4, 16, 18, 21)
+POSTSCRIPT_NAME_IDS = (6, 20)
+FONT_EXTENSIONS = (".ttf", ".otf", ".woff", ".woff2")
+
+
+def postscript_name(path):
+	"""Name ID 6 of a font file, read without decompiling the other tables."""
+	font = TTFont(path, lazy=True)
+	try:
+		return font["name"].getDebugName(6)
+	finally:
+		font.close()
+
+
+def release_fonts_by_postscript_name(folder, extension=None):
+	"""{PostScript name: path} for the font files directly in folder."""
+	fonts = {}
+	for file_name in sorted(os.listdir(folder)):
+		file_extension = os.path.splitext(file_name)[1].lower()
+		if file_extension not in FONT_EXTENSIONS or (extension and file_extension != extension):
+			continue
+		path = os.path.join(folder, file_name)
+		try:
+			name = postscript_name(path)
+		except Exception:
+			continue
+		if name:
+			fonts.setdefault(name, path)
+	return fonts
+
+
+def trial_job(source_path, output_path, glyph_names, base_family, trial_family, full_name, postscript_name, manual_features=()):
+	return {
+		"source": source_path,
+		"output": output_path,
+		"glyphs": list(glyph_names),
+		"base_family": base_family,
+		"trial_family": trial_family,
+		"full_name": full_name,
+		"postscript_name": postscript_name,
+		"manual_features": list(manual_features),
+	}
+
+
+def trial_layout_features(font, manual_features=()):
+	"""Feature tags of the GSUB and GPOS in font, without the manual features."""
+	tags = set()
+	for table_tag in ("GSUB", "GPOS"):
+		if table_tag in font and font[table_tag].table.FeatureList:
+			tags.update(record.FeatureTag for record in font[table_tag].table.FeatureList.FeatureRecord)
+	return sorted(tags - set(manual_features))
+
+
+def rename_font(font, job):
+	"""Rewrite family, full and PostScript names (name table and CFF) to the trial naming."""
+	name_table = font["name"]
+	old_postscript_name = name_table.getDebugName(6) or ""
+	base_family = job["base_family"]
+	for record in name_table.names:
+		if record.nameID not in FAMILY_NAME_IDS and record.nameID not in POSTSCRIPT_NAME_IDS:
+			continue
+		value = record.toUnicode()
+		if record.nameID in POSTSCRIPT_NAME_IDS:
+			value = job["postscript_name"]
+		elif record.nameID == 4:
+			value = job["full_name"]
+		elif record.nameID == 3 and old_postscript_name in value:
+			value = value.replace(old_postscript_name, job["postscript_name"])
+		elif base_family and base_family in value:
+			value = value.replace(base_family, job["trial_family"], 1)
+		record.string = value
+
+	if "CFF " in font:
+		cff = font["CFF "].cff
+		top_dict = cff[cff.fontNames[0]]
+		cff.fontNames[0] = job["postscript_name"]
+		top_dict.FullName = job["full_name"]
+		top_dict.FamilyName = job["trial_family"]
+
+
+def derive_trial(job):
+	"""Run one job; returns (job, error or None, seconds)."""
+	start = time.time()
+	try:
+		font = TTFont(job["source"], recalcTimestamp=False)
+		options = subset.Options()
+		options.layout_features = trial_layout_features(font, job.get("manual_features", ()))
+		options.name_IDs = ["*"]
+		options.name_languages = ["*"]
+		options.name_legacy = True
+		options.notdef_outline = True
+		options.glyph_names = True
+		options.hinting = True
+		options.legacy_kern = True
+		options.symbol_cmap = True
+		options.recalc_timestamp = False
+		subsetter = subset.Subsetter(options)
+		glyph_order = set(font.getGlyphOrder())
+		subsetter.populate(glyphs=[name for name in job["glyphs"] if name in glyph_order])
+		subsetter.subset(font)
+		rename_font(font, job)
+		folder = os.path.dirname(job["output"])
+		if folder and not os.path.isdir(folder):
+			os.makedirs(folder)
+		font.save(job["output"])
+		font.close()
+	except Exception as e:
+		return job, "%s: %s" % (type(e).__name__, e), time.time() - start
+	return job, None, time.time() - start
+
+
+def derive_trials(jobs, workers=0):
+	"""
+	Yield derive_trial() results, in job order. With workers > 1 the jobs
+	run in worker processes, which only works where Python can spawn
+	interpreters (not inside Glyphs).
+	"""
+	if workers and workers > 1 and len(jobs) > 1:
+		from concurrent.futures import ProcessPoolExecutor
+		with ProcessPoolExecutor(max_workers=workers) as executor:
+			for result in executor.map(derive_trial, jobs):
+				yield result
+		return
+	for job in jobs:
+		yield derive_trial(job)
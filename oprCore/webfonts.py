@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""
+Derive WOFF and WOFF2 files from a compiled TTF/OTF.
+
+Compressing an existing binary is much cheaper than generating the
+instance again for every container. Jobs are plain dicts; with workers > 1
+they run on a thread pool (zlib and brotli release the GIL, and threads
+work inside Glyphs) or, with processes=True, on a process pool where
+Python can spawn interpreters. WOFF2 needs the brotli module. Requires
+fontTools.
+"""
+
+import os
+import time
+
+try:
+	from fontTools.ttLib import TTFont
+except ImportError:
+	TTFont = None
+
+try:
+	import brotli
+except ImportError:
+	brotli = None
+
+WEB_FLAVORS = ("woff", "woff2")
+
+
+def woff2_available():
+	return TTFont is not None and brotli is not None
+
+
+def webfont_job(source_path, flavor, output_path=None, label=None):
+	return {
+		"source": source_path,
+		"flavor": flavor,
+		"output": output_path or "%s.%s" % (os.path.splitext(source_path)[0], flavor),
+		"label": label or os.path.basename(source_path),
+	}
+
+
+def derive_webfont(job):
+	"""Run one job; returns (job, error or None, seconds, output size in bytes)."""
+	start = time.time()
+	try:
+		font = TTFont(job["source"], recalcBBoxes=False, recalcTimestamp=False)
+		font.flavor = job["flavor"]
+		font.save(job["output"], reorderTables=False)
+		font.close()
+	except Exception as e:
+		return job, "%s: %s" % (type(e).__name__, e), time.time() - start, 0
+	return job, None, time.time() - start, os.path.getsize(job["output"])
+
+
+def derive_webfonts(jobs, workers=0, processes=False):
+	"""Yield derive_webfont() results in job order."""
+	if workers and workers > 1 and len(jobs) > 1:
+		if processes:
+			from concurrent.futures import ProcessPoolExecutor as Executor
+		else:
+			from concurrent.futures import ThreadPoolExecutor as Executor
+		with Executor(max_workers=workers) as executor:
+			for result in executor.map(derive_webfont, jobs):
+				yield result
+		return
+	for job in jobs:
+		yield derive_webfont(job)